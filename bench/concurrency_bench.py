@@ -0,0 +1,191 @@
+# bench/concurrency_bench.py — párhuzamos írás SQLite-on, gunicorn alatt (mobil /qr + desktop /update)
+#
+# Futtatás a repo gyökeréből:
+#   python bench/concurrency_bench.py                       # 4 worker × 4 szál, 16 űrlap-kliens, 10 mp
+#   python bench/concurrency_bench.py --clients 32 --seconds 20 --out eredmeny.json
+#
+# Beállításonként friss SQLite fájl + gunicorn (gthread). A kliensszálak folyamatosan új tételt
+# küldenek a /qr űrlapra, közben egy "desktop" szál 200 soros /update feltöltéseket végez.
+# Mérjük: sikeres űrlap/mp, hibák száma (pl. "database is locked" → 500), késleltetés, és
+# hogy minden sikeresnek jelzett beküldés tényleg megvan-e az adatbázisban.
+#   alap     SQLITE_TUNE=0 (pysqlite alapértelmezés: rollback journal, 5 mp timeout)
+#   wal      WAL + synchronous=NORMAL + busy_timeout + BEGIN IMMEDIATE az író kéréseknél
+#   wal+sor  ugyanez + WRITE_QUEUE=1 (a workeren belüli párhuzamos kis írások egy tranzakcióban)
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+import tempfile
+import threading
+import urllib.request
+import urllib.parse
+from urllib.error import HTTPError
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from server_bench import general_sor, git_commit
+
+BEALLITASOK = {
+    "alap": {"SQLITE_TUNE": "0"},
+    "wal": {"SQLITE_TUNE": "1"},
+    "wal+sor": {"SQLITE_TUNE": "1", "WRITE_QUEUE": "1"},
+}
+
+def keres(method, url, body=None, form=None, timeout=120):
+    """(státusz, törzs) — hálózati hiba esetén (0, hibaszöveg)."""
+    data, headers = None, {}
+    if body is not None:
+        data = json.dumps(body).encode("utf-8"); headers["Content-Type"] = "application/json"
+    elif form is not None:
+        data = urllib.parse.urlencode(form).encode("utf-8")
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+    req = urllib.request.Request(url, data=data, method=method, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as r:
+            return r.status, r.read()
+    except HTTPError as e:
+        return e.code, e.read()
+    except OSError as e:
+        return 0, str(e).encode("utf-8")
+
+def indit(env, workers, threads, naplo):
+    """gunicorn (gthread) indítása; a kimenete a naplo fájlba megy (a sok hiba ne töltse meg a pipe-ot)."""
+    port = 19000 + random.randint(0, 999)
+    base = f"http://127.0.0.1:{port}"
+    with open(naplo, "w") as f:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-w", str(workers), "--threads", str(threads),
+             "-b", f"127.0.0.1:{port}", "--timeout", "300", "server:app"],
+            cwd=ROOT, env=env, stdout=f, stderr=subprocess.STDOUT,
+        )
+    for _ in range(300):
+        if keres("GET", base + "/_health", timeout=5)[0] == 200:
+            return proc, base
+        time.sleep(0.1)
+    proc.terminate()
+    with open(naplo) as f:
+        raise RuntimeError("gunicorn nem indult el:\n" + f.read()[-2000:])
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return round(xs[min(len(xs) - 1, int(round(p * (len(xs) - 1))))] * 1000, 2) if xs else None
+
+def meres(nev, env, args, naplo):
+    proc, base = indit(env, args.workers, args.threads, naplo)
+    try:
+        meta = json.loads(keres("GET", base + "/meta")[1])
+        fields, lists = meta["mezok"], meta["listak"]
+        desktop_ids = range(args.desktop_rows)
+        kezdo = keres("POST", base + "/update", body={"adatok": [general_sor(i, fields, lists) for i in desktop_ids]})
+        if kezdo[0] != 200:
+            raise RuntimeError(f"feltöltés: {kezdo}")
+
+        stop = time.perf_counter() + args.seconds
+        lock = threading.Lock()
+        urlap = {"ok": 0, "hiba": 0, "idok": [], "hibak": {}}
+        desktop = {"ok": 0, "hiba": 0, "idok": []}
+
+        def urlap_kliens(k):
+            n = 0
+            while time.perf_counter() < stop:
+                n += 1
+                form = {f: "" for f in fields if f != "Azonosító"}
+                form.update({"Név": f"kliens {k}", "Fok": str(n % 5 + 1), "Beszállító": "Beszállító 1",
+                             "Megjegyzés": f"{k}/{n}"})
+                t = time.perf_counter()
+                status, body = keres("POST", base + "/qr", form=form)
+                dt = time.perf_counter() - t
+                with lock:
+                    urlap["idok"].append(dt)
+                    if status == 200:
+                        urlap["ok"] += 1
+                    else:
+                        urlap["hiba"] += 1
+                        kulcs = "database is locked" if b"locked" in body else f"HTTP {status}"
+                        urlap["hibak"][kulcs] = urlap["hibak"].get(kulcs, 0) + 1
+
+        def desktop_kliens():
+            k = 0
+            while time.perf_counter() < stop:
+                k += 1
+                recs = [dict(general_sor(i, fields, lists), Megjegyzés=f"desktop {k}") for i in desktop_ids]
+                t = time.perf_counter()
+                status, _ = keres("POST", base + "/update", body={"adatok": recs})
+                with lock:
+                    desktop["idok"].append(time.perf_counter() - t)
+                    desktop["ok" if status == 200 else "hiba"] += 1
+
+        szalak = [threading.Thread(target=urlap_kliens, args=(k,)) for k in range(args.clients)]
+        if args.desktop_rows:
+            szalak.append(threading.Thread(target=desktop_kliens))
+        t0 = time.perf_counter()
+        for s in szalak:
+            s.start()
+        for s in szalak:
+            s.join()
+        fal = time.perf_counter() - t0
+
+        # túlélés: minden 200-zal nyugtázott űrlap megvan-e
+        total = json.loads(keres("GET", base + "/data?limit=1&count=1")[1])["total"]
+        return {
+            "config": nev, "env": {k: v for k, v in env.items() if k in ("SQLITE_TUNE", "WRITE_QUEUE")},
+            "workers": args.workers, "threads": args.threads, "clients": args.clients, "seconds": round(fal, 2),
+            "forms_ok": urlap["ok"], "forms_failed": urlap["hiba"], "errors": urlap["hibak"],
+            "forms_ok_per_s": round(urlap["ok"] / fal, 1),
+            "form_p50_ms": pct(urlap["idok"], 0.5), "form_p95_ms": pct(urlap["idok"], 0.95),
+            "form_max_ms": pct(urlap["idok"], 1.0),
+            "desktop_ok": desktop["ok"], "desktop_failed": desktop["hiba"], "desktop_p50_ms": pct(desktop["idok"], 0.5),
+            "rows_expected": args.desktop_rows + urlap["ok"], "rows_found": total,
+        }
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+def main():
+    ap = argparse.ArgumentParser(description="SQLite párhuzamos írás mérése gunicorn alatt")
+    ap.add_argument("--configs", default=",".join(BEALLITASOK), help="beállítások, vesszővel: " + ", ".join(BEALLITASOK))
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--threads", type=int, default=4, help="szál / worker (gthread); az írási sor ezeket vonja össze")
+    ap.add_argument("--clients", type=int, default=16, help="párhuzamos űrlap-kliensek")
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--desktop-rows", type=int, default=200, help="a desktop /update mérete (0: nincs desktop kliens)")
+    ap.add_argument("--out", help="kimeneti JSON (alap: bench/results/concurrency_<idő>.json)")
+    args = ap.parse_args()
+
+    eredmenyek = []
+    for nev in [c for c in args.configs.split(",") if c]:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, QR_CACHE_DIR="", LABEL_CACHE_DIR=os.path.join(tmp, "labels"),
+                       METRICS_DIR=os.path.join(tmp, "metrics"), SLOW_REQUEST_MS="60000",
+                       DATABASE_URL="sqlite:///" + os.path.join(tmp, "bench.db"))
+            env.pop("WRITE_QUEUE", None)
+            env.update(BEALLITASOK[nev])
+            print(f"{nev} ...", file=sys.stderr, flush=True)
+            r = meres(nev, env, args, os.path.join(tmp, "gunicorn.log"))
+            print(f"  {nev:<8} {r['forms_ok_per_s']:>7.1f} űrlap/mp  hibás {r['forms_failed']:>5} {r['errors'] or ''}"
+                  f"  p50 {r['form_p50_ms']} ms  p95 {r['form_p95_ms']} ms"
+                  f"  desktop {r['desktop_ok']} ok / {r['desktop_failed']} hibás"
+                  f"  sorok {r['rows_found']}/{r['rows_expected']}", file=sys.stderr)
+            eredmenyek.append(r)
+
+    doc = {
+        "meta": {
+            "commit": git_commit(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": eredmenyek,
+    }
+    out = args.out or os.path.join(ROOT, "bench", "results", time.strftime("concurrency_%Y%m%d_%H%M%S.json"))
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, indent=2)
+    print(out)
+
+if __name__ == "__main__":
+    main()
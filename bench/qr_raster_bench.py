@@ -0,0 +1,67 @@
+# bench/qr_raster_bench.py — QR renderelés: régi (make_image + átméretezés) vs. közös mátrix-raszter
+# Futtatás a repo gyökeréből:  python bench/qr_raster_bench.py [darab]
+import io
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qrcode
+from PIL import Image
+
+from qr_raster import qr_matrix, encode_many, rasterize, rasterize_fit, png_bytes
+
+URL = "https://qr-app-emfo.onrender.com/edit/"
+
+def regi_szerver(url):
+    qr = qrcode.QRCode(version=1, box_size=10, border=2)
+    qr.add_data(url); qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white").convert("RGB")
+    bio = io.BytesIO(); img.save(bio, format="PNG")
+    return bio.getvalue()
+
+def uj_szerver(url):
+    return png_bytes(qr_matrix(url, border=2), module_px=10)
+
+def regi_desktop(url):
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(url); qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white").convert("RGB")
+    return img, img.resize((260, 260), getattr(Image, "LANCZOS", Image.BICUBIC))
+
+def uj_desktop(url):
+    m = qr_matrix(url, border=5)
+    return rasterize(m, 10, "1"), rasterize_fit(m, 260, "L")
+
+def meres(nev, fn, urls):
+    t = time.perf_counter()
+    out = [fn(u) for u in urls]
+    dt = time.perf_counter() - t
+    meret = ""
+    if isinstance(out[0], bytes):
+        meret = f"  átl. PNG {sum(map(len, out)) / len(out):.0f} B"
+    print(f"{nev:<28} {dt * 1000 / len(urls):8.3f} ms/db{meret}")
+    return dt
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    urls = [URL + uuid.uuid4().hex for _ in range(n)]
+    print(f"{n} QR, Python {sys.version.split()[0]}")
+    meres("szerver régi (RGB PNG)", regi_szerver, urls)
+    meres("szerver új (1 bites PNG)", uj_szerver, urls)
+    meres("desktop régi (LANCZOS)", regi_desktop, urls)
+    meres("desktop új (egész skála)", uj_desktop, urls)
+
+    t = time.perf_counter(); ms = encode_many(urls, border=5)
+    t_mtx = time.perf_counter() - t
+    t = time.perf_counter()
+    for m in ms:
+        rasterize(m, 10, "1")
+    t_ras = time.perf_counter() - t
+    print(f"{'csak mátrix (encode_many)':<28} {t_mtx * 1000 / n:8.3f} ms/db")
+    print(f"{'csak raszter (numpy)':<28} {t_ras * 1000 / n:8.3f} ms/db")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+# bench/server_bench.py — a Flask backend mérése szintetikus adatokkal (1k / 10k / 100k sor)
+#
+# Futtatás a repo gyökeréből:
+#   python bench/server_bench.py                                  # SQLite, test client, 1k/10k/100k
+#   python bench/server_bench.py --sizes 1000,10000 --gunicorn 4  # + 4 workeres gunicorn HTTP-n
+#   python bench/server_bench.py --pg postgresql://localhost/qrbench --out eredmeny.json
+#
+# Minden méret/backend külön folyamatban fut (a server modul importkor olvassa a DATABASE_URL-t).
+# Az eredmény gépi feldolgozásra szánt JSON (alapból bench/results/server_<idő>.json).
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+import tempfile
+import threading
+import urllib.request
+import urllib.parse
+from urllib.error import HTTPError
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+NEVEK = ["Kovács János", "Nagy Éva", "Tóth Gábor", "Szabó Anna", "Horváth Péter", "Kiss Zoltán",
+         "Varga Katalin", "Molnár László", "Németh Ildikó", "Farkas Árpád", "Balogh Zsuzsanna"]
+MEGJEGYZESEK = ["", "", "sérült csomagolás", "ellenőrizni", "átvéve hiányosan", "fotózás után vissza"]
+
+# --------------------------------------------------------------------------- mérés
+def osszegez(nev, idok, bajtok=0, **extra):
+    """Egy végpont mért idői (mp) → ms statisztika + átviteli sebesség."""
+    idok = sorted(idok)
+    n = len(idok)
+    ossz = sum(idok)
+    pct = lambda p: idok[min(n - 1, int(round(p * (n - 1))))] * 1000
+    out = {
+        "endpoint": nev, "n": n,
+        "mean_ms": round(ossz / n * 1000, 3), "p50_ms": round(pct(0.5), 3),
+        "p95_ms": round(pct(0.95), 3), "max_ms": round(idok[-1] * 1000, 3),
+        "rps": round(n / ossz, 2) if ossz else None, "bytes": bajtok,
+    }
+    out.update(extra)
+    return out
+
+def general_sor(i, fields, lists):
+    rec = {}
+    for f in fields:
+        if f == "Azonosító":
+            rec[f] = f"B{i:08d}"
+        elif f == "Sorszám":
+            rec[f] = i % 250 + 1
+        elif f == "Fémzárszám":
+            rec[f] = f"FZ-{random.randint(100000, 999999)}"
+        elif f == "Név":
+            rec[f] = random.choice(NEVEK)
+        elif f == "Fok":
+            rec[f] = str(random.randint(1, 5))
+        elif f == "Súly":
+            rec[f] = f"{random.uniform(0.5, 80):.1f}"
+        elif f == "Megjegyzés":
+            rec[f] = random.choice(MEGJEGYZESEK)
+        elif f in lists:
+            rec[f] = random.choice(lists[f])
+        else:
+            rec[f] = ""
+    return rec
+
+def feltolt(server, n):
+    """n szintetikus sor közvetlen tömeges beszúrása (a mérendő végpontokat nem terheli), rev számlálóval."""
+    random.seed(n)
+    fields, lists = server.DEFAULT_FIELDS, server.DEFAULT_LISTS
+    with server.app.app_context():
+        server.run_migrations()
+        server.save_meta(fields, lists)
+        tbl = server.Adat.__table__
+        for s in range(0, n, 5000):
+            rows = []
+            for i in range(s, min(n, s + 5000)):
+                rec = general_sor(i, fields, lists)
+                rows.append({"azonosito": rec["Azonosító"], "data": json.dumps(rec, ensure_ascii=False),
+                             "deleted": 0, "rev": i + 1})
+            server.db.session.execute(tbl.insert(), rows)
+        server.db.session.execute(server.text("UPDATE meta_kv SET value = :v WHERE key = :k"),
+                                  {"v": str(n), "k": server.DATA_REV_KEY})
+        server.db.session.commit()
+        server.rebuild_sorszam_counters()
+
+def ismetles(n_sor, alap):
+    """Nagy adatnál kevesebb ismétlés (a teljes letöltés / teljes upsert drága)."""
+    return max(3, alap // max(1, n_sor // 1000))
+
+# --------------------------------------------------------------------------- test client
+def meres_test_client(n_sor, repeat):
+    import server
+    c = server.app.test_client()
+    ids = [f"B{i:08d}" for i in range(n_sor)]
+    rnd = random.Random(1)
+    out = []
+
+    def fut(nev, hivas, db, **extra):
+        idok, bajt = [], 0
+        for k in range(db):
+            t = time.perf_counter()
+            r = hivas(k)
+            bajt = len(r.data)   # streamelt válasznál a törzs is itt készül el → a mérésbe tartozik
+            idok.append(time.perf_counter() - t)
+            if r.status_code >= 400:
+                raise RuntimeError(f"{nev}: {r.status_code} {r.data[:200]!r}")
+        out.append(osszegez(nev, idok, bajt, **extra))
+
+    teljes = ismetles(n_sor, repeat)
+    fut("GET /data", lambda k: c.get("/data"), teljes)
+    fut("GET /data?stream=1", lambda k: c.get("/data?stream=1"), teljes)
+    rev = c.get("/data?limit=1").json["rev"]
+    fut("GET /data?since (10 változás)", lambda k: c.get(f"/data?since={rev - 10}"), repeat)
+    fut("GET /data?limit=100", lambda k: c.get("/data?limit=100&sort=Név"), repeat)
+
+    def kis_update(k):
+        recs = [dict(general_sor(int(a[1:]), server.DEFAULT_FIELDS, server.DEFAULT_LISTS), Megjegyzés=f"kis {k}")
+                for a in rnd.sample(ids, min(10, n_sor))]
+        return c.post("/update", json={"adatok": recs})
+    fut("POST /update (10 sor)", kis_update, repeat)
+
+    def teljes_update(k):
+        recs = [dict(general_sor(i, server.DEFAULT_FIELDS, server.DEFAULT_LISTS), Megjegyzés=f"teljes {k}")
+                for i in range(n_sor)]
+        return c.post("/update", json={"mezok": server.DEFAULT_FIELDS, "listak": server.DEFAULT_LISTS, "adatok": recs})
+    fut("POST /update (teljes)", teljes_update, max(1, teljes // 3), rows_sent=n_sor)
+
+    def torles(k):
+        chunk = ids[k * 10:(k + 1) * 10]
+        r = c.post("/delete", json={"azonositok": chunk})
+        c.post("/restore", json={"azonositok": chunk})   # visszaállítás, hogy a méret ne változzon
+        return r
+    fut("POST /delete (10 sor)", torles, repeat)
+
+    urlap = {f: "x" for f in server.DEFAULT_FIELDS if f != "Azonosító"}
+    fut("POST /qr", lambda k: c.post("/qr", data=dict(urlap, Név=f"bench {k}")), repeat)
+    fut("GET /edit/<az>", lambda k: c.get(f"/edit/{rnd.choice(ids)}"), repeat)
+    fut("POST /edit/<az>", lambda k: c.post(f"/edit/{ids[k % n_sor]}", data=dict(urlap, Megjegyzés=f"edit {k}")), repeat)
+    fut("GET /qrimg (hideg)", lambda k: c.get(f"/qrimg/{ids[-1 - k]}.png"), repeat)
+    fut("GET /qrimg (meleg)", lambda k: c.get(f"/qrimg/{ids[-1]}.png"), repeat)
+    return out
+
+# --------------------------------------------------------------------------- gunicorn (HTTP)
+def http_keres(method, url, body=None, form=None):
+    data, headers = None, {}
+    if body is not None:
+        data = json.dumps(body).encode("utf-8"); headers["Content-Type"] = "application/json"
+    elif form is not None:
+        data = urllib.parse.urlencode(form).encode("utf-8")
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+    req = urllib.request.Request(url, data=data, method=method, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=300) as r:
+            return r.status, len(r.read())
+    except HTTPError as e:
+        return e.code, len(e.read())
+
+def terheles(nev, base, hivas, concurrency, darab):
+    """darab kérés concurrency szálon; késleltetés-eloszlás + összesített kérés/mp."""
+    idok, bajt, hibak = [], [0], [0]
+    lock = threading.Lock()
+    szamlalo = iter(range(darab))
+
+    def dolgozo():
+        while True:
+            with lock:
+                k = next(szamlalo, None)
+            if k is None:
+                return
+            t = time.perf_counter()
+            status, n = hivas(base, k)
+            dt = time.perf_counter() - t
+            with lock:
+                idok.append(dt); bajt[0] = n
+                if status >= 400:
+                    hibak[0] += 1
+
+    t0 = time.perf_counter()
+    szalak = [threading.Thread(target=dolgozo) for _ in range(concurrency)]
+    for s in szalak:
+        s.start()
+    for s in szalak:
+        s.join()
+    fal = time.perf_counter() - t0
+    res = osszegez(nev, idok, bajt[0], concurrency=concurrency, errors=hibak[0])
+    res["rps"] = round(len(idok) / fal, 2)   # valódi áteresztés: kérés / faliidő
+    return res
+
+def meres_gunicorn(n_sor, repeat, workers, concurrency, env):
+    import server
+    port = 18000 + random.randint(0, 999)
+    base = f"http://127.0.0.1:{port}"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-w", str(workers), "-b", f"127.0.0.1:{port}", "--timeout", "300", "server:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(300):
+            try:
+                if http_keres("GET", base + "/_health")[0] == 200:
+                    break
+            except OSError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError("gunicorn nem indult el")
+        ids = [f"B{i:08d}" for i in range(n_sor)]
+        urlap = {f: "x" for f in server.DEFAULT_FIELDS if f != "Azonosító"}
+        sok = repeat * concurrency
+        teljes = ismetles(n_sor, repeat) * concurrency
+        out = [
+            terheles("GET /data", base, lambda b, k: http_keres("GET", b + "/data"), concurrency, teljes),
+            terheles("GET /data?stream=1", base, lambda b, k: http_keres("GET", b + "/data?stream=1"), concurrency, teljes),
+            terheles("POST /update (10 sor)", base, lambda b, k: http_keres("POST", b + "/update", body={"adatok": [
+                dict(general_sor(int(a[1:]), server.DEFAULT_FIELDS, server.DEFAULT_LISTS), Megjegyzés=f"g {k}")
+                for a in ids[(k * 10) % n_sor:(k * 10) % n_sor + 10]]}), concurrency, sok),
+            terheles("POST /delete (10 sor)", base, lambda b, k: http_keres("POST", b + "/delete", body={
+                "azonositok": ids[(k * 10) % n_sor:(k * 10) % n_sor + 10]}), concurrency, sok),
+            terheles("POST /restore (10 sor)", base, lambda b, k: http_keres("POST", b + "/restore", body={
+                "azonositok": ids[(k * 10) % n_sor:(k * 10) % n_sor + 10]}), concurrency, sok),
+            terheles("POST /qr", base, lambda b, k: http_keres("POST", b + "/qr", form=dict(urlap, Név=f"g {k}")), concurrency, sok),
+            terheles("GET /edit/<az>", base, lambda b, k: http_keres("GET", f"{b}/edit/{ids[k % n_sor]}"), concurrency, sok),
+            terheles("POST /edit/<az>", base, lambda b, k: http_keres("POST", f"{b}/edit/{ids[k % n_sor]}",
+                                                                      form=dict(urlap, Megjegyzés=f"g {k}")), concurrency, sok),
+            terheles("GET /qrimg", base, lambda b, k: http_keres("GET", f"{b}/qrimg/{ids[k % n_sor]}.png"), concurrency, sok),
+        ]
+        for r in out:
+            r["workers"] = workers
+        return out
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+# --------------------------------------------------------------------------- vezérlés
+def egy_futas(args):
+    """Gyermekfolyamat: egy backend + méret feltöltése és mérése; JSON a stdout utolsó sorában."""
+    import server
+    t = time.perf_counter()
+    feltolt(server, args.rows)
+    seed_s = time.perf_counter() - t
+    eredmeny = [dict(r, mode="test_client") for r in meres_test_client(args.rows, args.repeat)]
+    if args.gunicorn:
+        # a test client mérés módosította az adatokat → friss feltöltés a HTTP méréshez nem kell,
+        # a sorok száma (restore miatt) és a tartalom jellege ugyanaz
+        eredmeny += [dict(r, mode="gunicorn") for r in
+                     meres_gunicorn(args.rows, args.repeat, args.gunicorn, args.concurrency, dict(os.environ))]
+    print(json.dumps({"seed_s": round(seed_s, 2), "results": eredmeny}, ensure_ascii=False))
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+def main():
+    ap = argparse.ArgumentParser(description="QR app backend benchmark")
+    ap.add_argument("--sizes", default="1000,10000,100000", help="sorok száma, vesszővel")
+    ap.add_argument("--repeat", type=int, default=20, help="ismétlés végpontonként (nagy adatnál arányosan kevesebb)")
+    ap.add_argument("--pg", help="Postgres URL (a táblákat üríti!); SQLite mellett ezen is mér")
+    ap.add_argument("--no-sqlite", action="store_true", help="csak a --pg backenden mérjen")
+    ap.add_argument("--gunicorn", type=int, default=0, metavar="WORKERS", help="gunicorn HTTP mérés ennyi workerrel")
+    ap.add_argument("--concurrency", type=int, default=8, help="párhuzamos kliensszálak a gunicorn méréshez")
+    ap.add_argument("--out", help="kimeneti JSON (alap: bench/results/server_<idő>.json)")
+    ap.add_argument("--rows", type=int, help=argparse.SUPPRESS)   # belső: gyermekfolyamat
+    args = ap.parse_args()
+
+    if args.rows:
+        egy_futas(args)
+        return
+
+    backends = [] if args.no_sqlite else ["sqlite"]
+    if args.pg:
+        backends.append("postgresql")
+    futasok, eredmenyek = [], []
+    for backend in backends:
+        for n in [int(x) for x in args.sizes.split(",") if x]:
+            with tempfile.TemporaryDirectory() as tmp:
+                env = dict(os.environ, QR_CACHE_DIR="", LABEL_CACHE_DIR=os.path.join(tmp, "labels"))
+                if backend == "sqlite":
+                    env["DATABASE_URL"] = "sqlite:///" + os.path.join(tmp, "bench.db")
+                else:
+                    env["DATABASE_URL"] = args.pg
+                    pg_urit(args.pg)
+                cmd = [sys.executable, os.path.abspath(__file__), "--rows", str(n), "--repeat", str(args.repeat),
+                       "--gunicorn", str(args.gunicorn), "--concurrency", str(args.concurrency)]
+                print(f"[{backend}] {n} sor ...", file=sys.stderr, flush=True)
+                kimenet = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True)
+                if kimenet.returncode != 0:
+                    print(kimenet.stderr, file=sys.stderr)
+                    raise SystemExit(f"[{backend}] {n} sor: a mérés hibával állt le")
+                res = json.loads(kimenet.stdout.strip().splitlines()[-1])
+                for r in res["results"]:
+                    r.update(backend=backend, rows=n)
+                    print(f"  {r['mode']:<11} {r['endpoint']:<32} p50 {r['p50_ms']:>9.2f} ms  p95 {r['p95_ms']:>9.2f} ms"
+                          f"  {r['rps'] or 0:>8.1f}/s", file=sys.stderr)
+                futasok.append({"backend": backend, "rows": n, "seed_s": res["seed_s"]})
+                eredmenyek += res["results"]
+
+    doc = {
+        "meta": {
+            "commit": git_commit(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "args": {k: v for k, v in vars(args).items() if k != "rows"},
+        },
+        "runs": futasok,
+        "results": eredmenyek,
+    }
+    out = args.out or os.path.join(ROOT, "bench", "results", time.strftime("server_%Y%m%d_%H%M%S.json"))
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, indent=2)
+    print(out)
+
+def pg_urit(url):
+    """Postgres: a bench táblák eldobása, hogy minden méret tiszta sémával induljon."""
+    from sqlalchemy import create_engine, text
+    eng = create_engine(url.replace("postgres://", "postgresql://", 1))
+    with eng.begin() as conn:
+        for t in ("adat", "meta_kv", "sorszam_szamlalo", "schema_version"):
+            conn.execute(text(f"DROP TABLE IF EXISTS {t} CASCADE"))
+    eng.dispose()
+
+if __name__ == "__main__":
+    main()
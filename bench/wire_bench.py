@@ -0,0 +1,147 @@
+# bench/wire_bench.py — átviteli formátumok összevetése: JSON vs. oszlopos MessagePack (± gzip)
+#
+# Futtatás a repo gyökeréből:
+#   python bench/wire_bench.py                         # 1k / 10k / 100k sor, SQLite
+#   python bench/wire_bench.py --sizes 10000 --repeat 5 --out eredmeny.json
+#
+# Mért értékek formátumonként: a hálón átmenő bájtok, a szerver válaszideje (test client),
+# és a kliens oldali kódolás / dekódolás ideje. GET /data (teljes letöltés) és
+# POST /update (teljes feltöltés) mindkét irányban.
+import os
+import sys
+import json
+import gzip
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from server_bench import general_sor, feltolt, git_commit
+
+def median(xs):
+    xs = sorted(xs)
+    return xs[len(xs) // 2]
+
+def meres(n_sor, repeat):
+    import server
+    import wire
+    if not wire.elerheto():
+        raise SystemExit("A msgpack nincs telepítve (pip install msgpack).")
+    c = server.app.test_client()
+    out = []
+
+    def fut(irany, formatum, hivas, dekodol):
+        szerver, kliens, bajt = [], [], 0
+        for _ in range(repeat):
+            t = time.perf_counter()
+            r, kodolas = hivas()
+            r.get_data()   # streamelt válasznál a törzs itt készül el → a szerver idejébe tartozik
+            szerver.append(time.perf_counter() - t)
+            if r.status_code >= 400:
+                raise RuntimeError(f"{irany} {formatum}: {r.status_code} {r.data[:200]!r}")
+            t = time.perf_counter()
+            n = dekodol(r)
+            kliens.append(time.perf_counter() - t + kodolas[1])
+            bajt = kodolas[0] or len(r.data)
+        out.append({
+            "irany": irany, "formatum": formatum, "rows": n_sor, "bytes": bajt,
+            "bytes_per_row": round(bajt / n_sor, 1), "server_ms": round(median(szerver) * 1000, 2),
+            "client_ms": round(median(kliens) * 1000, 2), "check": n,
+        })
+
+    # --- letöltés: GET /data ---
+    sima = {"Accept-Encoding": "identity"}
+    letolt = {
+        "JSON": (lambda: c.get("/data", headers=sima),
+                 lambda r: len(json.loads(r.data)["adatok"])),
+        "JSON + gzip (stream=1)": (lambda: c.get("/data?stream=1", headers={"Accept-Encoding": "gzip"}),
+                                   lambda r: len(json.loads(gzip.decompress(r.data))["adatok"])),
+        "msgpack": (lambda: c.get("/data", headers=dict(sima, Accept=wire.MSGPACK)),
+                    lambda r: len(wire.dekodol(r.data)["adatok"])),
+        "msgpack + gzip": (lambda: c.get("/data", headers={"Accept": wire.MSGPACK, "Accept-Encoding": "gzip"}),
+                           lambda r: len(wire.dekodol(gzip.decompress(r.data))["adatok"])),
+    }
+    for nev, (get, dek) in letolt.items():
+        fut("GET /data", nev, lambda: (get(), (0, 0.0)), dek)
+
+    # --- feltöltés: POST /update (a teljes tábla, mint a desktop „Mentés szerverre”) ---
+    recs = [general_sor(i, server.DEFAULT_FIELDS, server.DEFAULT_LISTS) for i in range(n_sor)]
+    payload = {"mezok": server.DEFAULT_FIELDS, "listak": server.DEFAULT_LISTS, "adatok": recs}
+
+    def feltolt_keres(kodolo, ctype, gz):
+        def hivas():
+            t = time.perf_counter()
+            body = kodolo(payload)
+            headers = {"Content-Type": ctype}
+            if gz:
+                body = gzip.compress(body, compresslevel=6)
+                headers["Content-Encoding"] = "gzip"
+            kodolas = time.perf_counter() - t
+            return c.post("/update", data=body, headers=headers), (len(body), kodolas)
+        return hivas
+
+    json_kodolo = lambda p: json.dumps(p, ensure_ascii=False).encode("utf-8")
+    for nev, hivas in {
+        "JSON": feltolt_keres(json_kodolo, "application/json", False),
+        "JSON + gzip": feltolt_keres(json_kodolo, "application/json", True),
+        "msgpack": feltolt_keres(wire.kodol, wire.MSGPACK, False),
+        "msgpack + gzip": feltolt_keres(wire.kodol, wire.MSGPACK, True),
+    }.items():
+        fut("POST /update", nev, hivas, lambda r: r.get_json()["upserted"])
+    return out
+
+def egy_futas(args):
+    import server
+    feltolt(server, args.rows)
+    print(json.dumps(meres(args.rows, args.repeat), ensure_ascii=False))
+
+def main():
+    ap = argparse.ArgumentParser(description="JSON vs. MessagePack átvitel mérése")
+    ap.add_argument("--sizes", default="1000,10000,100000", help="sorok száma, vesszővel")
+    ap.add_argument("--repeat", type=int, default=5, help="ismétlés formátumonként (medián)")
+    ap.add_argument("--out", help="kimeneti JSON (alap: bench/results/wire_<idő>.json)")
+    ap.add_argument("--rows", type=int, help=argparse.SUPPRESS)   # belső: gyermekfolyamat
+    args = ap.parse_args()
+
+    if args.rows:
+        egy_futas(args)
+        return
+
+    eredmenyek = []
+    for n in [int(x) for x in args.sizes.split(",") if x]:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, QR_CACHE_DIR="", DATABASE_URL="sqlite:///" + os.path.join(tmp, "bench.db"))
+            print(f"{n} sor ...", file=sys.stderr, flush=True)
+            kimenet = subprocess.run([sys.executable, os.path.abspath(__file__), "--rows", str(n), "--repeat", str(args.repeat)],
+                                     cwd=ROOT, env=env, capture_output=True, text=True)
+            if kimenet.returncode != 0:
+                print(kimenet.stderr, file=sys.stderr)
+                raise SystemExit(f"{n} sor: a mérés hibával állt le")
+            res = json.loads(kimenet.stdout.strip().splitlines()[-1])
+            alap = {r["irany"]: r["bytes"] for r in res if r["formatum"] == "JSON"}
+            for r in res:
+                r["vs_json"] = round(r["bytes"] / alap[r["irany"]], 3)
+                print(f"  {r['irany']:<13} {r['formatum']:<24} {r['bytes']:>11} B ({r['vs_json'] * 100:5.1f}%)"
+                      f"  szerver {r['server_ms']:>9.2f} ms  kliens {r['client_ms']:>8.2f} ms", file=sys.stderr)
+            eredmenyek += res
+
+    doc = {
+        "meta": {
+            "commit": git_commit(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k != "rows"},
+        },
+        "results": eredmenyek,
+    }
+    out = args.out or os.path.join(ROOT, "bench", "results", time.strftime("wire_%Y%m%d_%H%M%S.json"))
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, indent=2)
+    print(out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# label_pdf.py — QR címke PDF (A4, N×M rács): vektoros modulok, oldalanként kiírva
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from qr_raster import encode_many
+
+MM = 72 / 25.4                      # 1 mm pontban
+A4_PT = (210 * MM, 297 * MM)
+QR_BORDER = 5                       # csendes zóna modulokban (mint a desktop előnézetnél)
+POOL_KUSZOB = 64                    # ennyi címke fölött használjuk a megadott process poolt
+BATCH_OLDAL = 8                     # egyszerre ennyi oldalnyi QR készül (korlátos memória)
+
+def qr_ops(m: np.ndarray) -> tuple:
+    """
+    A QR mátrix rajzoló operátorai egységnyi modulmérettel, (0,0) bal alsó sarokkal:
+    soronként a szomszédos sötét modulok egy téglalapba vonva. (méret, bytes)
+    """
+    n = len(m)
+    # futamok határai: a 0-val kiegészített sorokban ahol az érték vált
+    d = np.diff(np.pad(m, ((0, 0), (1, 1))).astype(np.int8), axis=1)
+    rs, starts = np.nonzero(d == 1)
+    _, ends = np.nonzero(d == -1)
+    out = ["0 g"]
+    out += [f"{c} {n - r - 1} {e - c} 1 re" for r, c, e in zip(rs.tolist(), starts.tolist(), ends.tolist())]
+    out.append("f")
+    return n, "\n".join(out).encode("ascii")
+
+class PdfIro:
+    """
+    Minimális PDF író: minden oldal azonnal a kimenetre kerül, memóriában csak
+    az objektumok offsetjei maradnak. out: write(bytes) metódusú objektum.
+    """
+    def __init__(self, out):
+        self.out = out
+        self.pos = 0
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 3            # 1: Catalog, 2: Pages (a végén írjuk ki)
+        self._w(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _w(self, b: bytes):
+        self.out.write(b)
+        self.pos += len(b)
+
+    def _obj(self, oid: int, body: bytes):
+        self.offsets[oid] = self.pos
+        self._w(f"{oid} 0 obj\n".encode("ascii") + body + b"\nendobj\n")
+
+    def add_page(self, content: bytes, w: float, h: float):
+        cid, pid = self.next_id, self.next_id + 1
+        self.next_id += 2
+        data = zlib.compress(content)
+        self._obj(cid, f"<< /Length {len(data)} /Filter /FlateDecode >>\nstream\n".encode("ascii") + data + b"\nendstream")
+        self._obj(pid, (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {w:.2f} {h:.2f}] "
+                        f"/Contents {cid} 0 R /Resources << >> >>").encode("ascii"))
+        self.page_ids.append(pid)
+
+    def close(self):
+        kids = " ".join(f"{p} 0 R" for p in self.page_ids)
+        self._obj(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode("ascii"))
+        self._obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref = self.pos
+        n = self.next_id
+        lines = [f"xref\n0 {n}\n", "0000000000 65535 f \n"]
+        lines += [f"{self.offsets[i]:010d} 00000 n \n" for i in range(1, n)]
+        self._w("".join(lines).encode("ascii"))
+        self._w(f"trailer\n<< /Size {n} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii"))
+
+class _Gyujto:
+    """write()-képes puffer, amit oldalanként kiürítünk (streameléshez)."""
+    def __init__(self):
+        self.parts = []
+
+    def write(self, b: bytes):
+        self.parts.append(b)
+
+    def take(self) -> bytes:
+        out = b"".join(self.parts)
+        self.parts = []
+        return out
+
+def _page_contents(datas, cols: int, rows: int, page=A4_PT, executor=None):
+    """
+    Oldalanként a tartalomfolyam; a QR-ek BATCH_OLDAL oldalanként készülnek.
+    executor: a hívó (hosszú életű) process poolja, nagy listánál ebben; None = soros.
+    """
+    per_page = cols * rows
+    slot_w, slot_h = page[0] / cols, page[1] / rows
+    side = min(slot_w, slot_h)
+    batch = per_page * BATCH_OLDAL
+    pool = executor if len(datas) >= POOL_KUSZOB else None
+    for b in range(0, len(datas), batch):
+        part = datas[b:b + batch]
+        ops = [qr_ops(m) for m in encode_many(part, QR_BORDER, executor=pool)]
+        for p in range(0, len(ops), per_page):
+            out = []
+            for i, (n, body) in enumerate(ops[p:p + per_page]):
+                col, row = i % cols, i // cols
+                s = side / n
+                x = col * slot_w + (slot_w - side) / 2
+                y = page[1] - (row + 1) * slot_h + (slot_h - side) / 2   # PDF-ben y felfelé nő
+                out.append(f"q {s:.4f} 0 0 {s:.4f} {x:.2f} {y:.2f} cm\n".encode("ascii") + body + b"\nQ\n")
+            yield b"".join(out)
+
+def iter_label_pdf(datas, cols: int = 2, rows: int = 2, executor=None):
+    """A PDF bájtjai oldalanként (generátor) — a teljes dokumentum sosincs egyben a memóriában."""
+    buf = _Gyujto()
+    pdf = PdfIro(buf)
+    for content in _page_contents(list(datas), cols, rows, executor=executor):
+        pdf.add_page(content, *A4_PT)
+        yield buf.take()
+    pdf.close()
+    yield buf.take()
+
+def write_label_pdf(path: str, datas, cols: int = 2, rows: int = 2, executor=None) -> int:
+    """
+    A4 címke PDF fájlba írása oldalanként; visszaadja az oldalszámot.
+    executor=None: soros; a poolt a hívó adja (és állítja le), nem kérésenként indul.
+    """
+    oldalak = 0
+    with open(path, "wb") as f:
+        for chunk in iter_label_pdf(datas, cols, rows, executor=executor):
+            f.write(chunk)
+            oldalak += 1
+    return oldalak - 1
+
+def write_label_pdf_pool(path: str, datas, cols: int = 2, rows: int = 2) -> int:
+    """Asztali (egyszeri) használat: nagy listánál saját process poolt indít erre az egy PDF-re."""
+    datas = list(datas)
+    if len(datas) < POOL_KUSZOB:
+        return write_label_pdf(path, datas, cols, rows)
+    with ProcessPoolExecutor() as pool:
+        return write_label_pdf(path, datas, cols, rows, executor=pool)
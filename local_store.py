@@ -0,0 +1,273 @@
+# local_store.py — a desktop app helyi tára (SQLite az app-data könyvtárban)
+# Tükrözi az adatok / mezok / listak állapotot, a szerver revíziót és ETag-et: induláskor
+# innen rajzolunk azonnal (hálózat nélkül is), a szinkron a háttérben frissít.
+# A keresés és a rendezés is innen olvas. A 'kimeno' tábla a még fel nem küldött
+# műveletek tartós sora (újraindítás / órákig tartó offline után is megmarad); a szerver
+# által véglegesen elutasított műveletek 'hiba'-val jelölve ott maradnak, de nem tartják fel a sort.
+import os
+import sys
+import json
+import sqlite3
+import time
+
+APP_NEV = "QRApp"
+# kimenő műveletek: rekord upsert/törlés/visszaállítás, meta (mezok+listak), mező átnevezés/törlés
+KIMENO_MUVELETEK = ("upsert", "delete", "restore", "meta", "mezo_atnevez", "mezo_torol")
+
+def app_data_dir() -> str:
+    """A felhasználó app-data könyvtára (Windows: %APPDATA%, macOS: Application Support, egyéb: XDG)."""
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(base, APP_NEV)
+
+def _kereso(rec: dict) -> str:
+    """Kisbetűs, soronként összefűzött mezőértékek (a kereséshez, íráskor számolva)."""
+    return "\n".join(str(v).casefold() for k, v in rec.items() if k != "Azonosító" and v not in (None, ""))
+
+class HelyiTar:
+    """
+    rekord: a sorok a helyi sorrendben (sor = beszúrási sorrend, mint az 'adatok' listában);
+    kv: mezok, listak, rev, etag (JSON szövegként);
+    kimeno: függő műveletek beszúrási sorrendben (id); hiba IS NOT NULL: elutasított, félretett.
+    Csak a Tk fő szálról használjuk.
+    """
+    def __init__(self, path: str = None):
+        if path is None:
+            os.makedirs(app_data_dir(), exist_ok=True)
+            path = os.path.join(app_data_dir(), "helyi.db")
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS rekord ("
+                " sor INTEGER PRIMARY KEY,"
+                " azonosito TEXT NOT NULL UNIQUE,"
+                " data TEXT NOT NULL,"
+                " kereso TEXT NOT NULL DEFAULT '')"
+            )
+            self.conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS kimeno ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " muvelet TEXT NOT NULL,"
+                " azonosito TEXT,"
+                " adat TEXT,"
+                " letrehozva REAL NOT NULL,"
+                " hiba TEXT)"
+            )
+            if "hiba" not in {c[1] for c in self.conn.execute("PRAGMA table_info(kimeno)")}:
+                self.conn.execute("ALTER TABLE kimeno ADD COLUMN hiba TEXT")   # régebbi helyi tár
+            self.conn.execute("CREATE INDEX IF NOT EXISTS ix_kimeno_azonosito ON kimeno(azonosito)")
+
+    # --- olvasás ---
+    def _kv(self, key, alap=None):
+        row = self.conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return alap
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return alap
+
+    def betolt(self):
+        """(adatok, mezok, listak, rev) — üres tárnál mezok/listak None, rev None."""
+        adatok = [json.loads(d) for (d,) in self.conn.execute("SELECT data FROM rekord ORDER BY sor")]
+        return adatok, self._kv("mezok"), self._kv("listak"), self._kv("rev")
+
+    def etag(self):
+        """A tárolt állapothoz tartozó /data ETag (None → feltétel nélküli letöltés)."""
+        return self._kv("etag")
+
+    def ures(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM rekord LIMIT 1").fetchone() is None and self._kv("mezok") is None
+
+    def keres(self, szoveg: str = "", rendez: str = None, csokkeno: bool = False) -> list:
+        """
+        Azonosítók a szűrés/rendezés szerint. szoveg: kis/nagybetű-független részszöveg
+        bármely mezőben; rendez: mezőnév (számok a szövegek előtt, mint a szerveren).
+        """
+        sql, args = "SELECT azonosito FROM rekord", []
+        szoveg = (szoveg or "").strip().casefold()
+        if szoveg:
+            sql += " WHERE instr(kereso, ?) > 0"
+            args.append(szoveg)
+        if rendez:
+            irany = "DESC" if csokkeno else "ASC"
+            sql += f" ORDER BY json_extract(data, ?) COLLATE NOCASE {irany}, sor {irany}"
+            args.append('$."' + rendez.replace('"', '\\"') + '"')
+        else:
+            sql += " ORDER BY sor"
+        return [az for (az,) in self.conn.execute(sql, args)]
+
+    # --- írás ---
+    def _kv_ir(self, key, value):
+        self.conn.execute(
+            "INSERT INTO kv (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value, ensure_ascii=False)),
+        )
+
+    def _rekordok_ir(self, recs):
+        self.conn.executemany(
+            "INSERT INTO rekord (azonosito, data, kereso) VALUES (?, ?, ?) "
+            "ON CONFLICT(azonosito) DO UPDATE SET data = excluded.data, kereso = excluded.kereso",
+            [(r["Azonosító"], json.dumps(r, ensure_ascii=False), _kereso(r)) for r in recs if r.get("Azonosító")],
+        )
+
+    def mindent_ment(self, adatok, mezok, listak, rev=None, etag=None):
+        """Teljes csere egy tranzakcióban (teljes letöltés / lokális betöltés után)."""
+        with self.conn:
+            self.conn.execute("DELETE FROM rekord")
+            self._rekordok_ir(adatok)
+            self._kv_ir("mezok", mezok); self._kv_ir("listak", listak)
+            self._kv_ir("rev", rev); self._kv_ir("etag", etag)
+
+    def delta_ment(self, valtozott, torolt, mezok, listak, rev, etag=None):
+        """Szerver delta: változott sorok upsert, töröltek ki, meta + rev + ETag — egy tranzakcióban."""
+        with self.conn:
+            self._rekordok_ir(valtozott)
+            self._torol(torolt)
+            self._kv_ir("mezok", mezok); self._kv_ir("listak", listak)
+            self._kv_ir("rev", rev); self._kv_ir("etag", etag)
+
+    def rekordok_ment(self, recs):
+        with self.conn:
+            self._rekordok_ir(recs)
+
+    def _torol(self, azonositok):
+        self.conn.executemany("DELETE FROM rekord WHERE azonosito = ?", [(a,) for a in azonositok or []])
+
+    def meta_ment(self, mezok, listak):
+        with self.conn:
+            self._kv_ir("mezok", mezok); self._kv_ir("listak", listak)
+
+    # --- kimenő sor ---
+    def _kimeno_ir(self, muvelet, azonosito=None, adat=None):
+        """
+        Egy művelet a sor végére. Ha ugyanarra a rekordra (meta: a metára) a legutóbbi
+        függő művelet is ugyanilyen upsert/meta, azt írjuk felül: a régi állapotot
+        úgysem kell felküldeni, és a többi művelethez képesti sorrend is megmarad.
+        """
+        if muvelet not in KIMENO_MUVELETEK:
+            raise ValueError(f"Ismeretlen művelet: {muvelet}")
+        blob = json.dumps(adat, ensure_ascii=False) if adat is not None else None
+        if muvelet in ("upsert", "meta"):
+            if muvelet == "upsert":
+                utolso = self.conn.execute(
+                    "SELECT id, muvelet FROM kimeno WHERE azonosito = ? AND hiba IS NULL ORDER BY id DESC LIMIT 1",
+                    (azonosito,)
+                ).fetchone()
+            else:
+                # a meta a mezőműveletekhez képest is sorrendben kell maradjon
+                utolso = self.conn.execute(
+                    "SELECT id, muvelet FROM kimeno WHERE muvelet IN ('meta', 'mezo_atnevez', 'mezo_torol') "
+                    "AND hiba IS NULL ORDER BY id DESC LIMIT 1"
+                ).fetchone()
+            if utolso and utolso[1] == muvelet:
+                self.conn.execute("UPDATE kimeno SET adat = ? WHERE id = ?", (blob, utolso[0]))
+                return
+        self.conn.execute(
+            "INSERT INTO kimeno (muvelet, azonosito, adat, letrehozva) VALUES (?, ?, ?, ?)",
+            (muvelet, azonosito, blob, time.time()),
+        )
+
+    def kimeno_upsert(self, recs):
+        """Rekordok mentése a helyi tárba ÉS a kimenő sorba, egy tranzakcióban."""
+        recs = [r for r in recs if r.get("Azonosító")]
+        with self.conn:
+            self._rekordok_ir(recs)
+            for r in recs:
+                self._kimeno_ir("upsert", r["Azonosító"], r)
+
+    def kimeno_torles(self, azonositok, visszaallit_recs=None):
+        """
+        Törlés: helyi tárból ki + 'delete' a sorba. visszaallit_recs megadásakor
+        visszavonás: a rekordok vissza a tárba + 'restore' a sorba.
+        """
+        with self.conn:
+            if visszaallit_recs is None:
+                self._torol(azonositok)
+                for az in azonositok:
+                    self._kimeno_ir("delete", az)
+            else:
+                self._rekordok_ir(visszaallit_recs)
+                for az in azonositok:
+                    self._kimeno_ir("restore", az)
+
+    def kimeno_meta(self, mezok, listak):
+        with self.conn:
+            self._kv_ir("mezok", mezok); self._kv_ir("listak", listak)
+            self._kimeno_ir("meta", adat={"mezok": mezok, "listak": listak})
+
+    def kimeno_mezo(self, muvelet, adat):
+        """Mező átnevezés/törlés a sorba (a helyi tár teljes állapotát a hívó menti)."""
+        with self.conn:
+            self._kimeno_ir(muvelet, adat=adat)
+
+    def kimeno_kovetkezo(self, max_db: int):
+        """
+        A sor elején álló, összevonható műveletek: azonos típusú egymást követő
+        rekordműveletek (az upsert mellé a közbeeső meta is befér: egy /update-ben megy).
+        [(id, muvelet, azonosito, adat), ...]
+        """
+        out = []
+        for rid, muvelet, az, blob in self.conn.execute(
+            "SELECT id, muvelet, azonosito, adat FROM kimeno WHERE hiba IS NULL ORDER BY id LIMIT ?", (max_db,)
+        ):
+            adat = json.loads(blob) if blob else None
+            if out:
+                elso = out[0][1]
+                osszevonhato = (
+                    {elso, muvelet} <= {"upsert", "meta"} if elso in ("upsert", "meta")
+                    else muvelet == elso and elso in ("delete", "restore")
+                )
+                if not osszevonhato:
+                    break
+            out.append((rid, muvelet, az, adat))
+        return out
+
+    def kimeno_kesz(self, ids):
+        with self.conn:
+            self.conn.executemany("DELETE FROM kimeno WHERE id = ?", [(i,) for i in ids])
+
+    def kimeno_sikertelen(self, ids, hiba: str):
+        """A szerver által véglegesen elutasított (4xx) műveletek félretétele; a sor többi eleme megy tovább."""
+        with self.conn:
+            self.conn.executemany("UPDATE kimeno SET hiba = ? WHERE id = ?", [(hiba, i) for i in ids])
+
+    def kimeno_hibasak(self):
+        """Elutasított műveletek: [(id, muvelet, azonosito, hiba), ...]"""
+        return self.conn.execute(
+            "SELECT id, muvelet, azonosito, hiba FROM kimeno WHERE hiba IS NOT NULL ORDER BY id"
+        ).fetchall()
+
+    def kimeno_ujra(self, ids):
+        """Elutasított műveletek visszatétele a sorba (eredeti helyükre, id szerint)."""
+        with self.conn:
+            self.conn.executemany("UPDATE kimeno SET hiba = NULL WHERE id = ?", [(i,) for i in ids])
+
+    def kimeno_db(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM kimeno WHERE hiba IS NULL").fetchone()[0]
+
+    def kimeno_hibas_db(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM kimeno WHERE hiba IS NOT NULL").fetchone()[0]
+
+    def kimeno_azonositok(self) -> set:
+        """Azok a rekordok, amelyekre még függő művelet van (ezekre a szerver delta nem íródhat rá)."""
+        return {az for (az,) in self.conn.execute(
+            "SELECT DISTINCT azonosito FROM kimeno WHERE azonosito IS NOT NULL AND hiba IS NULL"
+        )}
+
+    def kimeno_meta_fuggo(self) -> bool:
+        """Van-e még fel nem küldött meta / mezőművelet (addig a szerver metája nem íródhat rá)."""
+        return self.conn.execute(
+            "SELECT 1 FROM kimeno WHERE muvelet IN ('meta', 'mezo_atnevez', 'mezo_torol') AND hiba IS NULL LIMIT 1"
+        ).fetchone() is not None
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,262 @@
+# metrics.py — folyamatonkénti metrikák (számlálók, hisztogramok, mérőórák) + Prometheus szöveges kimenet
+# Több worker (gunicorn) esetén mindegyik a saját <pid>.json fájljába írja az állapotát egy közös
+# könyvtárba; a /_metrics ezeket összegzi. Kilépett worker számlálói megmaradnak (monoton nőnek),
+# a mérőórák (gauge) viszont csak az élő folyamatoktól számítanak. A kilépett workerek fájljait
+# az élők időnként egyetlen halottak.acc fájlba vonják össze, így a könyvtár nem nő korlátlanul.
+import os
+import json
+import time
+import threading
+try:
+    import fcntl
+except ImportError:   # Windows: nincs összevonás (ott gunicorn sincs)
+    fcntl = None
+
+HALOTTAK = "halottak.acc"   # a kilépett workerek összevont számlálói és hisztogramjai
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500, 1000)
+
+def _kulcs(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+def _esc(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _fmt_labels(kulcs, extra=()) -> str:
+    parts = [f'{k}="{_esc(v)}"' for k, v in tuple(kulcs) + tuple(extra)]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _fmt_num(v) -> str:
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+def _osszead(acc: dict, snap: dict):
+    """snap számlálóinak és hisztogramjainak hozzáadása acc-hoz (a mérőórák elvesznek)."""
+    for fajta in ("counters", "hists"):
+        cel = {(n, _kulcs(labels)): i for i, (n, labels, _) in enumerate(acc[fajta])}
+        for n, labels, v in snap.get(fajta, []):
+            i = cel.get((n, _kulcs(labels)))
+            if i is None:
+                cel[(n, _kulcs(labels))] = len(acc[fajta])
+                acc[fajta].append([n, labels, list(v) if fajta == "hists" else v])
+            elif fajta == "hists":
+                acc[fajta][i][2] = [a + b for a, b in zip(acc[fajta][i][2], v)]
+            else:
+                acc[fajta][i][2] += v
+
+def _json_ir(path: str, doc: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(doc, f)
+    os.replace(tmp, path)
+
+def _el(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (OSError, AttributeError, ValueError):
+        return True   # nincs jogunk / nem támogatott → inkább élőnek tekintjük
+    return True
+
+class Registry:
+    """
+    Egy folyamat metrikái. describe() után inc() / observe(); a gyűjtők (collector)
+    a pillanatnyi értékeket (cache statisztika, pool) a kiíráskor adják.
+    """
+    def __init__(self, directory: str = None, flush_s: float = 1.0, prune_s: float = 30.0):
+        self.dir = directory
+        self.flush_s = flush_s
+        self.prune_s = prune_s
+        self.lock = threading.Lock()
+        self.meta = {}          # név → (típus, súgó, bucketek)
+        self.counters = {}      # (név, címkék) → érték
+        self.hists = {}         # (név, címkék) → [bucket darabok..., összeg, darab]
+        self.collectors = []    # fn() → [(név, {címkék}, érték), ...]
+        self._utolso_iras = 0.0
+        self._utolso_takaritas = 0.0
+
+    def describe(self, name: str, typ: str, help_: str, buckets=None):
+        self.meta[name] = (typ, help_, tuple(buckets) if buckets else None)
+
+    def collector(self, fn):
+        """Pillanatnyi értékeket adó függvény (számlálót és mérőórát is adhat, a describe szerinti típussal)."""
+        self.collectors.append(fn)
+        return fn
+
+    def inc(self, name: str, labels: dict = None, v: float = 1):
+        k = (name, _kulcs(labels))
+        with self.lock:
+            self.counters[k] = self.counters.get(k, 0) + v
+
+    def observe(self, name: str, labels: dict, v: float):
+        buckets = self.meta[name][2]
+        k = (name, _kulcs(labels))
+        with self.lock:
+            h = self.hists.get(k)
+            if h is None:
+                h = self.hists[k] = [0] * (len(buckets) + 2)
+            for i, b in enumerate(buckets):
+                if v <= b:
+                    h[i] += 1
+                    break
+            h[-2] += v
+            h[-1] += 1
+
+    # --- pillanatkép / fájl ---
+    def snapshot(self) -> dict:
+        with self.lock:
+            counters = [[n, dict(k), v] for (n, k), v in self.counters.items()]
+            hists = [[n, dict(k), list(h)] for (n, k), h in self.hists.items()]
+        gauges = []
+        for fn in self.collectors:
+            try:
+                for n, labels, v in fn():
+                    (counters if self.meta.get(n, ("gauge",))[0] == "counter" else gauges).append([n, labels, v])
+            except Exception:
+                continue   # egy hibás gyűjtő ne vigye el a többit
+        return {"pid": os.getpid(), "time": time.time(), "counters": counters, "gauges": gauges, "hists": hists}
+
+    def flush(self, force: bool = False):
+        """Az állapot kiírása a közös könyvtárba (legfeljebb flush_s másodpercenként, atomikusan)."""
+        if not self.dir:
+            return
+        now = time.time()
+        if not force and now - self._utolso_iras < self.flush_s:
+            return
+        self._utolso_iras = now
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            _json_ir(os.path.join(self.dir, f"{os.getpid()}.json"), self.snapshot())
+        except OSError:
+            pass
+        if now - self._utolso_takaritas >= self.prune_s:
+            self._utolso_takaritas = now
+            self.prune()
+
+    def _halottak(self) -> dict:
+        try:
+            with open(os.path.join(self.dir, HALOTTAK), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"pid": 0, "counters": [], "gauges": [], "hists": [], "osszevont": []}
+
+    def prune(self):
+        """
+        A kilépett workerek <pid>.json fájljainak összevonása a halottak.acc-ba, majd törlése.
+        Egyszerre egy folyamat csinálja (flock); az 'osszevont' lista védi a kettős
+        beszámítást, ha a törlés előtt szakadna meg.
+        """
+        if not self.dir or fcntl is None:
+            return
+        try:
+            with open(os.path.join(self.dir, ".lock"), "w") as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return   # épp egy másik worker takarít
+                acc = self._halottak()
+                kesz = set(acc.get("osszevont", []))
+                halott = []
+                for name in os.listdir(self.dir):
+                    if not name.endswith(".json"):
+                        continue
+                    try:
+                        pid = int(name[:-5])
+                    except ValueError:
+                        continue
+                    if pid == os.getpid() or _el(pid):
+                        continue
+                    if pid not in kesz:
+                        try:
+                            with open(os.path.join(self.dir, name), encoding="utf-8") as f:
+                                _osszead(acc, json.load(f))
+                        except (OSError, ValueError):
+                            pass
+                    halott.append(pid)
+                if not halott:
+                    return
+                acc["osszevont"] = halott
+                _json_ir(os.path.join(self.dir, HALOTTAK), acc)
+                for pid in halott:
+                    try:
+                        os.remove(os.path.join(self.dir, f"{pid}.json"))
+                    except FileNotFoundError:
+                        pass
+                acc["osszevont"] = []   # a pid később újra kiosztható
+                _json_ir(os.path.join(self.dir, HALOTTAK), acc)
+        except OSError:
+            pass
+
+    def _snapshots(self):
+        own = self.snapshot()
+        out = [(own, True)]
+        if not self.dir:
+            return out
+        lock = None
+        try:
+            if fcntl is not None and os.path.isdir(self.dir):
+                # közös zár: összevonás (prune) közben ne lássunk egy workert kétszer vagy sehogy
+                lock = open(os.path.join(self.dir, ".lock"), "w")
+                fcntl.flock(lock, fcntl.LOCK_SH)
+            names = os.listdir(self.dir)
+            kesz = set()
+            if HALOTTAK in names:
+                acc = self._halottak()
+                kesz = {f"{p}.json" for p in acc.get("osszevont", [])}
+                out.append((acc, False))
+            for name in names:
+                if not name.endswith(".json") or name == f"{own['pid']}.json" or name in kesz:
+                    continue
+                try:
+                    with open(os.path.join(self.dir, name), encoding="utf-8") as f:
+                        snap = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                out.append((snap, _el(int(snap.get("pid", 0)))))
+        except OSError:
+            pass
+        finally:
+            if lock is not None:
+                lock.close()
+        return out
+
+    # --- Prometheus szöveges formátum ---
+    def render(self) -> str:
+        """Az összes (élő és kilépett) worker összegzett metrikái Prometheus text formátumban."""
+        counters, gauges, hists = {}, {}, {}
+        for snap, el in self._snapshots():
+            for n, labels, v in snap.get("counters", []):
+                k = (n, _kulcs(labels))
+                counters[k] = counters.get(k, 0) + v
+            if el:
+                for n, labels, v in snap.get("gauges", []):
+                    k = (n, _kulcs(labels))
+                    gauges[k] = gauges.get(k, 0) + v
+            for n, labels, h in snap.get("hists", []):
+                k = (n, _kulcs(labels))
+                cur = hists.get(k)
+                hists[k] = list(h) if cur is None else [a + b for a, b in zip(cur, h)]
+
+        out = []
+        for name in sorted(self.meta):
+            typ, help_, buckets = self.meta[name]
+            rows = [(k, v) for (n, k), v in (hists if typ == "histogram" else counters if typ == "counter" else gauges).items()
+                    if n == name]
+            if not rows:
+                continue
+            out.append(f"# HELP {name} {help_}")
+            out.append(f"# TYPE {name} {typ}")
+            for k, v in sorted(rows):
+                if typ != "histogram":
+                    out.append(f"{name}{_fmt_labels(k)} {_fmt_num(v)}")
+                    continue
+                acc = 0
+                for b, c in zip(buckets, v):   # v: bucketenkénti darab (nem kumulált), majd összeg, darab
+                    acc += c
+                    out.append(f"{name}_bucket{_fmt_labels(k, [('le', _fmt_num(b))])} {acc}")
+                out.append(f"{name}_bucket{_fmt_labels(k, [('le', '+Inf')])} {v[-1]}")
+                out.append(f"{name}_sum{_fmt_labels(k)} {_fmt_num(v[-2])}")
+                out.append(f"{name}_count{_fmt_labels(k)} {_fmt_num(v[-1])}")
+        return "\n".join(out) + "\n"
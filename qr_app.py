@@ -2,14 +2,22 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
 import json
-import qrcode
-from PIL import Image, ImageTk, ImageDraw, ImageFont
+from PIL import ImageTk, ImageDraw, ImageFont
 import tempfile
 import os
 import platform
 import tkinter.font as tkfont
 import requests
 import uuid
+import copy
+import gzip
+import queue
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+import label_pdf
+from local_store import HelyiTar
+from qr_raster import encode_many, rasterize, rasterize_fit
+import wire
 
 # (Ajánlott) TLS cert megbízhatóság Windows alatt
 try:
@@ -23,6 +31,10 @@ SERVER_URL = "https://qr-app-emfo.onrender.com"
 
 # --- Globális adatok ---
 adatok = []
+adat_rev = None  # utoljára látott szerver revízió; None → teljes letöltés kell
+adat_etag = None # a legutóbbi /data válasz ETag-je; egyezésnél a szerver 304-et ad (nincs újraépítés)
+utolso_torolt = []  # az utolsó törlés rekordjai (visszavonáshoz)
+tar = None          # helyi tár (local_store.HelyiTar); induláskor nyitjuk
 fix_mezok = [
     "Azonosító", "Sorszám", "Fémzárszám",
     "Beszállító", "Név", "Fok", "Hely",
@@ -41,80 +53,444 @@ listak = {
 def gen_id(n=8):
     return uuid.uuid4().hex[:n].upper()
 
-# --- API segédfüggvények ---
-def api_get_data():
+# --- Háttér hálózati réteg ---
+# Egyetlen hálózati szál → egy keep-alive Session, és a kérések sorrendje is megmarad.
+_halo = ThreadPoolExecutor(max_workers=1, thread_name_prefix="halo")
+_session = requests.Session()   # csak a hálózati szál használja
+_eredmenyek = queue.Queue()     # kész kérések → Tk fő szál (root.after pollozza)
+_folyamatban = {"db": 0}
+_legutobbi = {}                 # kulcs → (generáció, future); az újabb kérés elavulttá teszi a régit
+
+class ApiHiba(Exception):
+    """Hibás HTTP válasz; status: a státuszkód (a kimenő sor ez alapján dönt az újrapróbálásról)."""
+    def __init__(self, msg, status=None):
+        super().__init__(msg)
+        self.status = status
+
+def halo_kuld(fn, *args, kesz=None, hiba=None, kulcs=None):
+    """
+    fn(*args) futtatása a hálózati szálon; az eredmény a Tk fő szálon érkezik:
+    kesz(eredmény) vagy hiba(kivétel) (alapból hibaablak). Azonos 'kulcs'-ú újabb
+    kérés az előzőt felülírja: ha még nem indult el, töröljük, ha fut, eldobjuk az eredményét.
+    """
+    gen = None
+    if kulcs:
+        regi = _legutobbi.get(kulcs)
+        if regi:
+            regi[1].cancel()
+        gen = regi[0] + 1 if regi else 1
+    _folyamatban["db"] += 1
+    halo_jelzo()
+    fut = _halo.submit(fn, *args)
+    if kulcs:
+        _legutobbi[kulcs] = (gen, fut)
+    fut.add_done_callback(lambda f: _eredmenyek.put((f, kesz, hiba, kulcs, gen)))
+    return fut
+
+def halo_feldolgoz():
+    """Kész hálózati kérések eredményeinek kézbesítése a Tk fő szálon."""
     try:
-        r = requests.get(f"{SERVER_URL}/data", **REQ)
-        if r.status_code >= 400:
-            messagebox.showerror("Szerver hiba", f"GET /data -> {r.status_code}\n{r.text[:400]}")
-            return None
-        return r.json()
-    except requests.exceptions.SSLError as e:
-        messagebox.showerror("SSL hiba", f"Tanúsítvány/HTTPS gond: {e}")
-        return None
-    except Exception as e:
-        messagebox.showerror("Hiba", f"GET /data kivétel: {e}")
-        return None
-
-def api_update_data(full_data):
-    """Teljes push /update-re (mezők + listák + összes adat); a szerver upsert-el Azonosító alapján."""
+        while True:
+            f, kesz, hiba, kulcs, gen = _eredmenyek.get_nowait()
+            _folyamatban["db"] -= 1
+            if f.cancelled() or (kulcs and _legutobbi.get(kulcs, (None,))[0] != gen):
+                continue  # felülírt kérés
+            exc = f.exception()
+            if exc is not None:
+                (hiba or halo_hiba)(exc)
+            elif kesz:
+                kesz(f.result())
+    except queue.Empty:
+        pass
+    halo_jelzo()
+    root.after(50, halo_feldolgoz)
+
+def halo_hiba(exc):
+    if isinstance(exc, requests.exceptions.SSLError):
+        messagebox.showerror("SSL hiba", f"Tanúsítvány/HTTPS gond: {exc}")
+    elif isinstance(exc, ApiHiba):
+        messagebox.showerror("Szerver hiba", str(exc))
+    else:
+        messagebox.showerror("Hiba", f"Hálózati hiba: {exc}")
+
+def halo_jelzo():
+    n = _folyamatban["db"]
     try:
-        r = requests.post(f"{SERVER_URL}/update", json=full_data, **REQ)
-        if r.status_code >= 400:
-            messagebox.showerror("Szerver hiba", f"POST /update -> {r.status_code}\n{r.text[:400]}")
-            return False
-        return True
-    except requests.exceptions.SSLError as e:
-        messagebox.showerror("SSL hiba", f"Tanúsítvány/HTTPS gond: {e}")
-        return False
-    except Exception as e:
-        messagebox.showerror("Hiba", f"POST /update kivétel: {e}")
-        return False
+        halo_lbl.config(text=f"⟳ Hálózat: {n} kérés folyamatban" if n else "")
+    except NameError:
+        pass  # a UI még nem épült fel
+
+# --- API segédfüggvények (a hálózati szálon futnak; hiba esetén kivételt dobnak) ---
+def _http(method, path, **kw):
+    r = _session.request(method, f"{SERVER_URL}{path}", **REQ, **kw)
+    if r.status_code >= 400:
+        raise ApiHiba(f"{method} {path} -> {r.status_code}\n{r.text[:400]}", r.status_code)
+    return r
+
+# Mit fogad el a szerver a kérés törzsben (a /data és /update válaszfejléceiből tanuljuk);
+# amíg nem láttuk, sima JSON megy — a régi szerver a msgpack / gzip törzset üresnek látná.
+_szerver_fogad = {"msgpack": False, "gzip": False}
+GZIP_MIN = 1024   # ennél kisebb törzset nem tömörítünk
+
+def _fogad_tanul(r):
+    _szerver_fogad["gzip"] = "gzip" in r.headers.get("Accept-Encoding", "")
+    _szerver_fogad["msgpack"] = wire.MSGPACK in r.headers.get("Accept-Post", "")
+
+def api_get_data(since=None, etag=None):
+    """
+    GET /data; since=<rev> esetén csak a változások (delta) jönnek. etag megadásakor
+    feltételes kérés: ha azóta semmi sem változott, {"nem_valtozott": True} (304, törzs nélkül).
+    Ha elérhető, tömör MessagePack választ kérünk (a szerver dönt, JSON is jöhet).
+    """
+    headers = {"If-None-Match": etag} if etag else {}
+    if wire.elerheto():
+        headers["Accept"] = f"{wire.MSGPACK}, application/json;q=0.5"
+    r = _http("GET", "/data", params={"since": since} if since else None, headers=headers)
+    if r.status_code == 304:
+        return {"nem_valtozott": True}
+    _fogad_tanul(r)
+    if r.headers.get("Content-Type", "").startswith(wire.MSGPACK):
+        data = wire.dekodol(r.content)
+    else:
+        data = r.json()
+    data["etag"] = r.headers.get("ETag")
+    return data
 
-def api_update_row(mezok_list, listak_dict, row_data):
-    """EGY rekord upsert /update-re (a szerver így is érti)."""
-    try:
-        payload = {"mezok": mezok_list, "listak": listak_dict, "adatok": [row_data]}
-        r = requests.post(f"{SERVER_URL}/update", json=payload, **REQ)
-        if r.status_code >= 400:
-            messagebox.showerror("Szerver hiba", f"POST /update (1) -> {r.status_code}\n{r.text[:400]}")
-            return False
-        return True
-    except Exception as e:
-        messagebox.showerror("Hiba", f"POST /update kivétel: {e}")
-        return False
+def api_update_data(full_data):
+    """
+    Push /update-re (mezők + listák + adatok); a szerver upsert-el Azonosító alapján.
+    Ha a szerver fogadja: MessagePack oszlopos sorokkal, nagyobb törzs gzip-elve.
+    """
+    if _szerver_fogad["msgpack"] and wire.elerheto():
+        body, ctype = wire.kodol(full_data), wire.MSGPACK
+    else:
+        body, ctype = json.dumps(full_data, ensure_ascii=False).encode("utf-8"), "application/json"
+    headers = {"Content-Type": ctype}
+    if _szerver_fogad["gzip"] and len(body) >= GZIP_MIN:
+        body = gzip.compress(body, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+    r = _http("POST", "/update", data=body, headers=headers)
+    _fogad_tanul(r)
+    return r.json()
 
 def api_delete_rows(azonositok):
     """Tételek törlése (soft delete) a szerveren, hogy ne jöjjenek vissza szinkronnál."""
-    try:
-        r = requests.post(f"{SERVER_URL}/delete", json={"azonositok": azonositok}, **REQ)
-        if r.status_code >= 400:
-            messagebox.showerror("Szerver hiba", f"POST /delete -> {r.status_code}\n{r.text[:400]}")
-            return False
-        return True
-    except Exception as e:
-        messagebox.showerror("Hiba", f"Törlés szerveren nem sikerült:\n{e}")
-        return False
+    _http("POST", "/delete", json={"azonositok": azonositok})
+    return True
+
+def api_restore_rows(azonositok):
+    """Soft delete visszavonása a szerveren (egy kérésben)."""
+    _http("POST", "/restore", json={"azonositok": azonositok})
+    return True
+
+def api_field_rename(regi, uj):
+    """Mező átnevezése a szerveren, az adatbázison belül (a sorokat nem kell újra feltölteni)."""
+    return _http("POST", "/field/rename", json={"regi": regi, "uj": uj}).json()
+
+def api_field_drop(mezo):
+    """Mező törlése a szerveren, az adatbázison belül."""
+    return _http("POST", "/field/drop", json={"mezo": mezo}).json()
+
+def api_search(szoveg, limit=None):
+    """Teljes szöveges keresés a szerveren (GET /search): relevancia szerinti azonosítók."""
+    return _http("GET", "/search", params={"q": szoveg, "limit": limit or SZERVER_KERESES_MAX}).json()
 
 # --- Szinkron ---
-def sync_from_server():
-    global adatok, mezok, listak
-    data = api_get_data()
+def merge_delta(valtozott, torolt):
+    """Szerver delta beolvasztása az 'adatok' listába Azonosító szerint (helyben)."""
+    pos = {d.get("Azonosító"): i for i, d in enumerate(adatok)}
+    for rec in valtozott:
+        az = rec.get("Azonosító")
+        i = pos.get(az)
+        if i is None:
+            pos[az] = len(adatok)
+            adatok.append(rec)
+        else:
+            adatok[i] = rec
+    if torolt:
+        t = set(torolt)
+        adatok[:] = [d for d in adatok if d.get("Azonosító") not in t]
+
+def sync_from_server(jelez=True):
+    """
+    Háttérben letölti a változásokat; az ismételt szinkron felülírja a még futót.
+    jelez=False: háttérfrissítés, hiba esetén sincs felugró ablak (csak az állapotsor).
+    """
+    etag = adat_etag if adat_rev is not None else None
+    halo_kuld(api_get_data, adat_rev, etag, kesz=lambda data: sync_kesz(data, jelez),
+              hiba=None if jelez else kimeno_hiba_jelez, kulcs="sync")
+
+def sync_kesz(data, jelez=True):
+    global adatok, mezok, listak, adat_rev, adat_etag
     if not data:
         return
-    adatok = data.get("adatok", [])
-    mezok = data.get("mezok", fix_mezok.copy())
-    listak = data.get("listak", {})
+    if data.get("nem_valtozott"):
+        # 304: a helyi állapot naprakész, se 'adatok', se a táblázat nem épül újra
+        if jelez:
+            messagebox.showinfo("Szinkron", "Nincs változás a szerveren.")
+        return
+    adat_rev = data.get("rev", adat_rev)
+    adat_etag = data.get("etag")
+    if not tar.kimeno_meta_fuggo():
+        mezok = data.get("mezok", fix_mezok.copy())
+        listak = data.get("listak", {})
+    # a még fel nem küldött helyi változásokra a szerver állapota nem íródhat rá
+    fuggo = tar.kimeno_azonositok()
+    valtozott, torolt = data.get("adatok", []), data.get("torolt", [])
+    if data.get("delta"):
+        if fuggo:
+            valtozott = [r for r in valtozott if r.get("Azonosító") not in fuggo]
+            torolt = [a for a in torolt if a not in fuggo]
+        merge_delta(valtozott, torolt)
+        tar.delta_ment(valtozott, torolt, mezok, listak, adat_rev, adat_etag)
+    else:
+        if fuggo:
+            helyi = {d.get("Azonosító"): d for d in adatok if d.get("Azonosító") in fuggo}
+            szerveren = {r.get("Azonosító") for r in valtozott}
+            # függő sornál a helyi változat marad (helyben törölt → kimarad)
+            valtozott = [helyi[r.get("Azonosító")] if r.get("Azonosító") in fuggo else r
+                         for r in valtozott if r.get("Azonosító") not in fuggo or r.get("Azonosító") in helyi]
+            valtozott += [d for az, d in helyi.items() if az not in szerveren]
+        adatok = valtozott
+        tar.mindent_ment(adatok, mezok, listak, adat_rev, adat_etag)
     update_tree()
-    messagebox.showinfo("Szinkron", "Szerver → helyi szinkron kész.")
+    if jelez:
+        messagebox.showinfo("Szinkron", "Szerver → helyi szinkron kész.")
 
 def sync_to_server():
-    """Összes jelenlegi rekord + mezők + legördülők felküldése (upsert)."""
-    full = {"mezok": mezok, "listak": listak, "adatok": adatok}
-    if api_update_data(full):
-        messagebox.showinfo("Mentés", "Adatok mentve a szerverre.")
+    """Összes jelenlegi rekord + mezők + legördülők felküldése (upsert) a kimenő soron át."""
+    tar.kimeno_meta(list(mezok), copy.deepcopy(listak))
+    tar.kimeno_upsert([dict(d) for d in adatok])
+    kimeno_utemez(0)
+    messagebox.showinfo("Mentés", f"{len(adatok)} rekord felküldésre vár (a háttérben megy fel).")
+
+# --- Kimenő sor: a helyi változások tartósan sorba állítva, háttérben, sorrendben felküldve ---
+PUSH_KESLELTETES_MS = 800              # ennyi csend után indul az ürítés (gyors egymás utáni mentések összevonódnak)
+KIMENO_BATCH = 2000                    # egy kérésbe összevont műveletek legfeljebb (mint a szerver UPSERT_CHUNK-ja)
+VISSZALEPES_MIN_MS = 2000              # hiba után az első újrapróbálás
+VISSZALEPES_MAX_MS = 5 * 60 * 1000     # a várakozás duplázódik, de legfeljebb eddig
+
+kimeno = {"fut": False, "idozito": None, "varakozas": 0, "hiba": ""}
+
+def hiba_ok(exc) -> str:
+    """Rövid hibaszöveg: a státuszsor + a szerver 'error' üzenete, ha JSON-ban jött."""
+    fej, _, torzs = str(exc).partition("\n")
+    try:
+        torzs = json.loads(torzs).get("error") or torzs
+    except (ValueError, AttributeError):
+        pass
+    torzs = str(torzs).strip()[:200]
+    return f"{fej}: {torzs}" if torzs else fej
+
+def vegleges_hiba(exc) -> bool:
+    """A szerver elutasította a kérést (4xx, kivéve 408/429): újraküldve sem menne át."""
+    status = getattr(exc, "status", None)
+    return isinstance(exc, ApiHiba) and status is not None and 400 <= status < 500 and status not in (408, 429)
+
+def jelol_rekordok(recs):
+    """Helyben módosult rekordok: helyi tár + kimenő sor, majd ürítés ütemezése."""
+    tar.kimeno_upsert(recs)
+    kimeno_utemez()
+
+def jelol_meta():
+    tar.kimeno_meta(list(mezok), copy.deepcopy(listak))
+    kimeno_utemez()
+
+def kimeno_utemez(ms=PUSH_KESLELTETES_MS):
+    if kimeno["idozito"]:
+        root.after_cancel(kimeno["idozito"])
+    kimeno["idozito"] = root.after(ms, kimeno_urit)
+    kimeno_jelzo()
+
+def kimeno_urit():
+    """A sor elején álló (összevont) művelet felküldése; siker után azonnal a következő, hiba után visszalépés."""
+    kimeno["idozito"] = None
+    if kimeno["fut"]:
+        return  # a futó kérés végén folytatjuk
+    tetel = tar.kimeno_kovetkezo(KIMENO_BATCH)
+    if not tetel:
+        kimeno_jelzo()
+        return
+    ids = [t[0] for t in tetel]
+    muvelet = tetel[0][1]
+    if muvelet in ("upsert", "meta"):
+        payload = {"adatok": [t[3] for t in tetel if t[1] == "upsert"]}
+        metak = [t[3] for t in tetel if t[1] == "meta"]
+        if metak:
+            payload.update(metak[-1])
+        fn, args = api_update_data, (payload,)
+    elif muvelet == "delete":
+        fn, args = api_delete_rows, ([t[2] for t in tetel],)
+    elif muvelet == "restore":
+        fn, args = api_restore_rows, ([t[2] for t in tetel],)
+    elif muvelet == "mezo_atnevez":
+        fn, args = api_field_rename, (tetel[0][3]["regi"], tetel[0][3]["uj"])
+    else:
+        fn, args = api_field_drop, (tetel[0][3]["mezo"],)
+
+    def kesz(valasz):
+        kimeno.update(fut=False, varakozas=0, hiba="")
+        tar.kimeno_kesz(ids)
+        if muvelet in ("upsert", "meta"):
+            sorszamok_beallit(valasz)
+        elif muvelet != "delete":
+            sync_from_server(jelez=False)  # visszaállított sorok / szerveren átírt mezők
+        kimeno_utemez(0)
+
+    def hiba(exc):
+        kimeno["fut"] = False
+        if vegleges_hiba(exc):
+            # félretesszük (a felületen látszik), a sor többi eleme megy tovább
+            kimeno.update(varakozas=0, hiba="")
+            tar.kimeno_sikertelen(ids, hiba_ok(exc))
+            if muvelet in ("mezo_atnevez", "mezo_torol"):
+                sync_from_server(jelez=False)  # a helyben már átírt mezők visszaállnak a szerver szerintire
+            kimeno_utemez(0)
+            return
+        kimeno["varakozas"] = min(VISSZALEPES_MAX_MS, max(VISSZALEPES_MIN_MS, kimeno["varakozas"] * 2))
+        kimeno_hiba_jelez(exc)
+        kimeno_utemez(kimeno["varakozas"])
+
+    kimeno["fut"] = True
+    halo_kuld(fn, *args, kesz=kesz, hiba=hiba)
+    kimeno_jelzo()
+
+def kimeno_hiba_jelez(exc):
+    """Hiba az állapotsorba (nem felugró ablakba: offline órákig is tarthat)."""
+    if isinstance(exc, ApiHiba):
+        kimeno["hiba"] = str(exc).splitlines()[0]
+    else:
+        kimeno["hiba"] = f"Hálózati hiba: {type(exc).__name__}"
+    kimeno_jelzo()
+
+def kimeno_jelzo():
+    try:
+        n, hibas = tar.kimeno_db(), tar.kimeno_hibas_db()
+        szoveg = f"Kimenő: {n}"
+        if hibas:
+            szoveg += f"  |  Elutasítva: {hibas} (kattints a részletekért)"
+        if kimeno["hiba"]:
+            szoveg += f"  |  Utolsó hiba: {kimeno['hiba']}"
+            if n and not kimeno["fut"] and kimeno["varakozas"]:
+                szoveg += f" (újra {kimeno['varakozas'] // 1000} mp múlva)"
+        kimeno_lbl.config(text=szoveg, fg="#b00000" if kimeno["hiba"] or hibas else "#004080",
+                          cursor="hand2" if hibas else "")
+    except NameError:
+        pass  # a UI még nem épült fel
+
+def kimeno_hibasak_ablak():
+    """A szerver által elutasított műveletek: újraküldés (pl. javítás után) vagy elvetés."""
+    if not tar.kimeno_hibas_db():
+        return
+    ablak = tk.Toplevel(root); ablak.title("Elutasított műveletek"); ablak.geometry("700x320")
+    lb = tk.Listbox(ablak, selectmode="extended"); lb.pack(fill="both", expand=True, padx=10, pady=10)
+    sorok = []
+
+    def refresh():
+        sorok[:] = tar.kimeno_hibasak()
+        lb.delete(0, tk.END)
+        for _, muvelet, az, hiba in sorok:
+            lb.insert(tk.END, f"{muvelet} {az or ''} — {hiba}")
+        kimeno_jelzo()
+        if not sorok:
+            ablak.destroy()
+
+    def kijelolt():
+        return [sorok[i][0] for i in lb.curselection()] or [r[0] for r in sorok]
+
+    def ujra():
+        tar.kimeno_ujra(kijelolt()); refresh(); kimeno_utemez(0)
+
+    def elvet():
+        ids = kijelolt()
+        if not messagebox.askyesno("Elvetés", f"Elveted a(z) {len(ids)} műveletet? A szerverre nem kerülnek fel.", parent=ablak):
+            return
+        tar.kimeno_kesz(ids); refresh()
+
+    btn = tk.Frame(ablak); btn.pack(pady=5)
+    tk.Button(btn, text="Újraküldés", command=ujra).grid(row=0, column=0, padx=4)
+    tk.Button(btn, text="Elvetés", command=elvet).grid(row=0, column=1, padx=4)
+    tk.Button(btn, text="Bezárás", command=ablak.destroy).grid(row=0, column=2, padx=4)
+    refresh()
+
+def sorszamok_beallit(valasz):
+    """A szerver által kiosztott Sorszámok átvezetése a helyi sorokra."""
+    kiosztott = (valasz or {}).get("sorszamok") or {}
+    if not kiosztott:
+        return
+    valtozott = []
+    for i, d in enumerate(adatok):
+        n = kiosztott.get(d.get("Azonosító"))
+        if n is not None:
+            d["Sorszám"] = n
+            valtozott.append(d)
+            frissit_sor(i)
+    tar.rekordok_ment(valtozott)
 
 # --- UI: táblázat ---
+VIRTUAL_KUSZOB = 2000   # e fölött virtuális lista: csak a látható sorok (+ puffer) kerülnek a Treeview-ba
+VIRTUAL_PUFFER = 20     # a látható ablakon felül ennyi sort tartunk még a Treeview-ban
+
+virt = {"aktiv": False, "eleje": 0}   # virtuális mód állapota; 'eleje' = első látható adatok-index
+kijelolt = set()                      # virtuális módban a kijelölt adatok-indexek (a nem láthatók is)
+oszlop_minta = {}                     # oszlop → leghosszabb érték; a szélességet csak ebből mérjük
+SZERVER_KERESES_MAX = 500   # ennyi szerveres találatot kérünk (a szerver /search lapmérete legfeljebb)
+# keresés / rendezés: a helyi tárból kérdezzük le; 'idx' = a megjelenített adatok-indexek (None → mind, sorrendben);
+# 'talalat' = a szerver relevancia szerinti találatai az aktuális szövegre (None → csak helyi keresés)
+nezet = {"idx": None, "szoveg": "", "rendez": None, "csokkeno": False, "talalat": None}
+
+def sor_ertekek(sor, cols):
+    return [sor.get(f, "") for f in cols]
+
+def oszlop_minta_frissit(sorok=None):
+    """Oszloponként a leghosszabb érték nyilvántartása; sorok=None → teljes újraszámolás (tk hívás nélkül)."""
+    cols = tree["columns"]
+    if sorok is None:
+        oszlop_minta.clear()
+        sorok = adatok
+    for sor in sorok:
+        for col in cols:
+            val = str(sor.get(col, ""))
+            if len(val) > len(oszlop_minta.get(col, "")):
+                oszlop_minta[col] = val
+
+def nezet_frissit():
+    """
+    A keresés/rendezés eredménye adatok-indexekre fordítva. Ha van szerveres találat,
+    az kerül előre (relevancia szerint), utána a csak helyben egyező sorok (pl. még
+    fel nem küldött módosítások); a függő sorokra a helyi állapot számít.
+    Oszlop szerinti rendezésnél mindez a helyi rendezés sorrendjében.
+    """
+    if not nezet["szoveg"].strip() and not nezet["rendez"]:
+        nezet["idx"] = None
+        return
+    pos = {d.get("Azonosító"): i for i, d in enumerate(adatok)}
+    ids = tar.keres(nezet["szoveg"], nezet["rendez"], nezet["csokkeno"])
+    if nezet["talalat"] is not None and nezet["szoveg"].strip():
+        fuggo = tar.kimeno_azonositok()
+        szerver = [a for a in nezet["talalat"] if a not in fuggo]
+        if nezet["rendez"]:
+            halmaz = set(szerver).union(ids)
+            ids = [a for a in tar.keres("", nezet["rendez"], nezet["csokkeno"]) if a in halmaz]
+        else:
+            latott = set(szerver)
+            ids = szerver + [a for a in ids if a not in latott]
+    nezet["idx"] = [pos[a] for a in ids if a in pos]
+
+def nezet_sorok():
+    """A megjelenített adatok-indexek sorrendben."""
+    return range(len(adatok)) if nezet["idx"] is None else nezet["idx"]
+
+def rendezes(col):
+    """Fejléc kattintás: növekvő → csökkenő → eredeti sorrend."""
+    if nezet["rendez"] != col:
+        nezet["rendez"], nezet["csokkeno"] = col, False
+    elif not nezet["csokkeno"]:
+        nezet["csokkeno"] = True
+    else:
+        nezet["rendez"], nezet["csokkeno"] = None, False
+    update_tree()
+
 def update_tree():
     # Azonosító marad használatban, de nem jelenítjük meg oszlopként
     display_columns = [c for c in mezok if c != "Azonosító"]
@@ -122,36 +498,157 @@ def update_tree():
     tree["show"] = "headings"
 
     for col in display_columns:
-        tree.heading(col, text=col)
+        jel = (" ▼" if nezet["csokkeno"] else " ▲") if col == nezet["rendez"] else ""
+        tree.heading(col, text=col + jel, command=lambda c=col: rendezes(c))
         tree.column(col, width=150, anchor="center", stretch=tk.NO)
 
-    for i in tree.get_children():
-        tree.delete(i)
-    for idx, sor in enumerate(adatok):
-        values = [sor.get(f, "") for f in display_columns]
-        tree.insert("", "end", iid=idx, values=values)
+    tree.delete(*tree.get_children())
+    oszlop_minta_frissit()
+    nezet_frissit()
+    sorok = nezet_sorok()
+
+    virt["aktiv"] = len(sorok) > VIRTUAL_KUSZOB
+    if virt["aktiv"]:
+        kijelolt.intersection_update(sorok)
+        tree.configure(yscrollcommand=lambda *a: None)
+        virt_render()
+    else:
+        tree.configure(yscrollcommand=vsb.set)
+        for idx in sorok:
+            tree.insert("", "end", iid=idx, values=sor_ertekek(adatok[idx], display_columns))
 
     resize_columns()
 
+def frissit_sor(idx):
+    """Egyetlen (módosított vagy a végére hozzáadott) sor frissítése teljes újrarajzolás nélkül."""
+    cols = tree["columns"]
+    if nezet["idx"] is not None and idx == len(adatok) - 1 and idx not in nezet["idx"][-1:]:
+        nezet["idx"].append(idx)   # új sor: szűrt/rendezett nézetben is a végén látszik
+    if tree.exists(str(idx)):
+        tree.item(str(idx), values=sor_ertekek(adatok[idx], cols))
+    elif virt["aktiv"]:
+        virt_render()
+    elif idx == len(adatok) - 1:
+        tree.insert("", "end", iid=idx, values=sor_ertekek(adatok[idx], cols))
+    if not virt["aktiv"] and len(nezet_sorok()) > VIRTUAL_KUSZOB:
+        update_tree()
+        return
+    regi = dict(oszlop_minta)
+    oszlop_minta_frissit([adatok[idx]])
+    if oszlop_minta != regi:
+        resize_columns()
+
+def lathato_sorok():
+    rh = int(style.lookup("Custom.Treeview", "rowheight") or 25)
+    return max(1, tree.winfo_height() // rh - 1)  # -1: fejléc sor
+
+def virt_render():
+    """Virtuális mód: csak az [eleje, eleje + látható + puffer) sorok kerülnek a Treeview-ba."""
+    sorok = nezet_sorok()
+    n = len(sorok)
+    lat = lathato_sorok()
+    eleje = max(0, min(virt["eleje"], n - lat))
+    virt["eleje"] = eleje
+    vege = min(n, eleje + lat + VIRTUAL_PUFFER)
+    cols = tree["columns"]
+    tree.delete(*tree.get_children())
+    for idx in sorok[eleje:vege]:
+        tree.insert("", "end", iid=idx, values=sor_ertekek(adatok[idx], cols))
+    tree.selection_set([str(i) for i in sorok[eleje:vege] if i in kijelolt])
+    tree.yview_moveto(0)
+    if n:
+        vsb.set(eleje / n, min(1.0, (eleje + lat) / n))
+    else:
+        vsb.set(0, 1)
+
+def virt_yview(*args):
+    """A függőleges gördítősáv parancsa; virtuális módban az ablakot mozgatja."""
+    if not virt["aktiv"]:
+        return tree.yview(*args)
+    if args[0] == "moveto":
+        virt["eleje"] = int(float(args[1]) * len(nezet_sorok()))
+    elif args[0] == "scroll":
+        lep = int(args[1])
+        virt["eleje"] += lep * lathato_sorok() if args[2] == "pages" else lep
+    virt_render()
+
+def virt_gorget(event):
+    if not virt["aktiv"]:
+        return
+    if event.num == 4 or getattr(event, "delta", 0) > 0:
+        virt_yview("scroll", -3, "units")
+    else:
+        virt_yview("scroll", 3, "units")
+    return "break"
+
+def virt_kattintas(event):
+    # Ctrl/Shift nélküli kattintás: a nem látható kijelölések is törlődnek
+    if virt["aktiv"] and not (event.state & 0x0005):
+        kijelolt.clear()
+
+def virt_kijeloles(event=None):
+    if not virt["aktiv"]:
+        return
+    lathato = {int(i) for i in tree.get_children()}
+    kijelolt.difference_update(lathato)
+    kijelolt.update(int(i) for i in tree.selection())
+
+def virt_nyil(lep):
+    def kezelo(event):
+        if not virt["aktiv"] or not tree.focus():
+            return
+        sorok = nezet_sorok()
+        p = sorok.index(int(tree.focus())) + lep   # pozíció a nézetben (nem adatok-index)
+        if not 0 <= p < len(sorok):
+            return "break"
+        if not virt["eleje"] <= p < virt["eleje"] + lathato_sorok():
+            virt["eleje"] += lep
+            virt_render()
+        i = sorok[p]
+        kijelolt.clear(); kijelolt.add(i)
+        tree.selection_set(str(i)); tree.focus(str(i))
+        return "break"
+    return kezelo
+
+def kivalasztott_indexek():
+    """A kijelölt sorok adatok-indexei (virtuális módban a nem látható kijelöltek is)."""
+    if virt["aktiv"]:
+        return sorted(i for i in kijelolt if i < len(adatok))
+    return [int(i) for i in tree.selection()]
+
 def resize_columns():
     factor = scale.get()
     cell_font = tkfont.Font(family="Arial", size=factor)
     heading_font = tkfont.Font(family="Arial", size=factor, weight="bold")
 
+    # csak a fejlécet és oszloponként a leghosszabb ismert értéket mérjük, nem minden cellát
     for col in tree["columns"]:
         heading_width = heading_font.measure(tree.heading(col)["text"]) + 20
-        max_cell_width = 0
-        for child in tree.get_children():
-            val = tree.set(child, col)
-            w = cell_font.measure(val) + 20
-            if w > max_cell_width:
-                max_cell_width = w
+        max_cell_width = cell_font.measure(oszlop_minta.get(col, "")) + 20
         new_width = max(heading_width, max_cell_width, 150)
         tree.column(col, width=new_width)
 
     tree.update_idletasks()
 
+def zoom(v):
+    v = int(v)
+    style.configure("Custom.Treeview", rowheight=int(v * 1.5) + 10, font=("Arial", v))
+    style.configure("Custom.Treeview.Heading", font=("Arial", v, "bold"))
+    resize_columns()
+    if virt["aktiv"]:
+        virt_render()
+
 # --- Mezők kezelése ---
+def mezonev_hiba(nev):
+    """Ugyanazok a szabályok, mint a szerver _field_name_error-ja (különben a kimenő sorban akadna el)."""
+    if not nev.strip():
+        return "Adj meg mezőnevet."
+    if nev == "Azonosító":
+        return "Az 'Azonosító' mező nem módosítható."
+    if '"' in nev or "\\" in nev:
+        return "A mezőnév nem tartalmazhat idézőjelet vagy visszaperjelet."
+    return None
+
 def mezok_kezelese():
     ablak = tk.Toplevel(root); ablak.title("Mezők szerkesztése"); ablak.geometry("400x420")
     lb = tk.Listbox(ablak, selectmode="browse"); lb.pack(fill="both", expand=True, padx=10, pady=10)
@@ -164,13 +661,16 @@ def mezok_kezelese():
     def uj():
         neve = simpledialog.askstring("Új mező", "Mező neve:", parent=ablak)
         if not neve: return
+        if mezonev_hiba(neve):
+            messagebox.showwarning("Figyelem", mezonev_hiba(neve), parent=ablak)
+            return
         if neve in mezok:
             messagebox.showwarning("Figyelem", "Már létezik ilyen mező!")
             return
         mezok.append(neve)
         for r in adatok:
             r.setdefault(neve, "")
-        refresh(); update_tree(); sync_to_server()
+        refresh(); update_tree(); jelol_meta()
 
     def torol():
         sel = lb.curselection()
@@ -187,7 +687,10 @@ def mezok_kezelese():
         for r in adatok:
             r.pop(nev, None)
         listak.pop(nev, None)
-        refresh(); update_tree(); sync_to_server()
+        tar.mindent_ment(adatok, mezok, listak, adat_rev, adat_etag)
+        refresh(); update_tree()
+        # a szerver maga törli a kulcsot minden sorból; utána elég a delta
+        tar.kimeno_mezo("mezo_torol", {"mezo": nev}); kimeno_utemez(0)
 
     def atnevez():
         sel = lb.curselection()
@@ -200,6 +703,9 @@ def mezok_kezelese():
             return
         new = simpledialog.askstring("Mező átnevezése", "Új név:", initialvalue=old, parent=ablak)
         if not new: return
+        if mezonev_hiba(new):
+            messagebox.showwarning("Figyelem", mezonev_hiba(new), parent=ablak)
+            return
         if new in mezok:
             messagebox.showwarning("Figyelem", "Már létezik ilyen mező!")
             return
@@ -211,7 +717,9 @@ def mezok_kezelese():
                 r.setdefault(new, "")
         if old in listak:
             listak[new] = listak.pop(old)
-        refresh(); update_tree(); sync_to_server()
+        tar.mindent_ment(adatok, mezok, listak, adat_rev, adat_etag)
+        refresh(); update_tree()
+        tar.kimeno_mezo("mezo_atnevez", {"regi": old, "uj": new}); kimeno_utemez(0)
 
     def fel():
         sel = lb.curselection(); 
@@ -219,7 +727,7 @@ def mezok_kezelese():
         idx = sel[0]
         if idx == 0: return
         mezok[idx-1], mezok[idx] = mezok[idx], mezok[idx-1]
-        refresh(); lb.select_set(idx-1); update_tree(); sync_to_server()
+        refresh(); lb.select_set(idx-1); update_tree(); jelol_meta()
 
     def le():
         sel = lb.curselection(); 
@@ -227,7 +735,7 @@ def mezok_kezelese():
         idx = sel[0]
         if idx >= len(mezok)-1: return
         mezok[idx+1], mezok[idx] = mezok[idx], mezok[idx+1]
-        refresh(); lb.select_set(idx+1); update_tree(); sync_to_server()
+        refresh(); lb.select_set(idx+1); update_tree(); jelol_meta()
 
     btn = tk.Frame(ablak); btn.pack(pady=5)
     tk.Button(btn, text="Új mező", command=uj).grid(row=0, column=0, padx=4, pady=2)
@@ -269,20 +777,20 @@ def sor_beviteli_ablak(modositott_sor=None, idx=None):
     def ment():
         sor = {f: entries[f].get() for f in entries if f != "Azonosító"}
 
-        # Automatikus Sorszám Név+Fok+Beszállító szerint
-        nev = sor.get("Név", "").strip()
-        fok = sor.get("Fok", "").strip()
-        besz = sor.get("Beszállító", "").strip()
-        if nev and fok and besz:
-            existing = [d for d in adatok if d.get("Név","").strip()==nev and d.get("Fok","").strip()==fok and d.get("Beszállító","").strip()==besz]
-            sor["Sorszám"] = len(existing) + 1
+        # Sorszám: teljes Név+Fok+Beszállító esetén a szerver osztja ki (atomikusan);
+        # változatlan kulcsnál marad a régi szám, a válasz 'sorszamok'-ból frissítünk
+        kulcs = tuple(str(sor.get(f, "")).strip() for f in ("Név", "Fok", "Beszállító"))
+        if all(kulcs):
+            regi = modositott_sor or {}
+            ugyanaz = tuple(str(regi.get(f, "")).strip() for f in ("Név", "Fok", "Beszállító")) == kulcs
+            sor["Sorszám"] = regi.get("Sorszám", "") if ugyanaz else ""
         else:
             sor["Sorszám"] = 1
 
         if modositott_sor and idx is not None:
             sor["Azonosító"] = modositott_sor["Azonosító"]
             adatok[idx] = sor
-            if not api_update_row(mezok, listak, sor): return
+            frissit_sor(idx)
         else:
             az = str(uuid.uuid4())
             if any(d.get("Azonosító")==az for d in adatok):
@@ -290,40 +798,41 @@ def sor_beviteli_ablak(modositott_sor=None, idx=None):
                 return
             sor["Azonosító"] = az
             adatok.append(sor)
-            if not api_update_row(mezok, listak, sor): return
+            frissit_sor(len(adatok) - 1)
 
-        update_tree()
+        jelol_rekordok([sor])
         ablak.destroy()
 
     tk.Button(ablak, text="Mentés", command=ment).grid(row=len(mezok), column=0, columnspan=2, pady=10)
 
 # --- Törlés (szerverrel együtt) ---
 def torles():
-    selected = tree.selection()
+    selected = kivalasztott_indexek()
     if not selected:
         messagebox.showwarning("Figyelem", "Válassz ki egy sort a törléshez!")
         return
     if not messagebox.askyesno("Törlés", "Biztosan törlöd a kiválasztott sort/sorokat?"):
         return
 
-    ids = []
-    for i in selected:
-        idx = int(i)
-        if 0 <= idx < len(adatok):
-            az = adatok[idx].get("Azonosító")
-            if az: ids.append(az)
+    t = {adatok[i].get("Azonosító") for i in selected if 0 <= i < len(adatok)} - {None, ""}
+    # helyben azonnal kivesszük; a szerverre a kimenő soron át megy (offline is)
+    utolso_torolt[:] = [d for d in adatok if d.get("Azonosító") in t]
+    adatok[:] = [d for d in adatok if d.get("Azonosító") not in t]
+    tar.kimeno_torles([d["Azonosító"] for d in utolso_torolt])
+    kijelolt.clear()
+    update_tree()
+    kimeno_utemez(0)
 
-    if not api_delete_rows(ids):
+def torles_visszavonas():
+    if not utolso_torolt:
+        messagebox.showinfo("Visszavonás", "Nincs visszavonható törlés.")
         return
-
-    # helyileg is kivesszük
-    for i in sorted([int(x) for x in selected], reverse=True):
-        if 0 <= i < len(adatok):
-            del adatok[i]
-
+    recs = list(utolso_torolt)
+    utolso_torolt.clear()
+    adatok.extend(recs)
+    tar.kimeno_torles([d["Azonosító"] for d in recs], visszaallit_recs=recs)
     update_tree()
-    # friss állapot visszahúzása biztos ami biztos
-    sync_from_server()
+    kimeno_utemez(0)
 
 # --- Legördülők szerkesztése ---
 def szerkesztes_legordulok():
@@ -352,7 +861,7 @@ def szerkesztes_legordulok():
         if val not in listak[f]:
             listak[f].append(val)
             update_options(); opt_cb["values"] = sorted(listak[f])
-            sync_to_server(); messagebox.showinfo("Siker", f"Új opció: {val}")
+            jelol_meta(); messagebox.showinfo("Siker", f"Új opció: {val}")
 
     def mod_opcio():
         f = field_cb.get(); old = opt_cb.get()
@@ -363,7 +872,7 @@ def szerkesztes_legordulok():
         if not new or new == old: return
         i = listak[f].index(old); listak[f][i] = new
         update_options(); opt_cb["values"] = sorted(listak[f]); opt_cb.set(new)
-        sync_to_server(); messagebox.showinfo("Siker", f"Módosítva: {old} → {new}")
+        jelol_meta(); messagebox.showinfo("Siker", f"Módosítva: {old} → {new}")
 
     def torol_opcio():
         f = field_cb.get(); sel = opt_cb.get()
@@ -371,21 +880,21 @@ def szerkesztes_legordulok():
             messagebox.showwarning("Figyelmeztetés", "Válassz mezőt és opciót!")
             return
         listak[f].remove(sel); update_options(); opt_cb["values"] = sorted(listak[f]); opt_cb.set("")
-        sync_to_server(); messagebox.showinfo("Siker", f"Törölve: {sel}")
+        jelol_meta(); messagebox.showinfo("Siker", f"Törölve: {sel}")
 
     tk.Button(ablak, text="Új opció", command=uj_opcio).grid(row=2, column=1, padx=5, pady=5, sticky="e")
     tk.Button(ablak, text="Opció módosítás", command=mod_opcio).grid(row=3, column=1, padx=5, pady=5, sticky="e")
     tk.Button(ablak, text="Opció törlés", command=torol_opcio).grid(row=4, column=1, padx=5, pady=5, sticky="e")
 
     def close():
-        sync_to_server(); update_tree(); ablak.destroy()
+        jelol_meta(); update_tree(); ablak.destroy()
     tk.Button(ablak, text="Mentés és bezárás", command=close).grid(row=5, column=0, columnspan=2, pady=10)
 
     ablak.transient(root); ablak.grab_set()
 
 # --- QR előnézet + nyomtatás (darabonként) ---
 def qr_generalas():
-    selected = tree.selection()
+    selected = kivalasztott_indexek()
     if not selected:
         messagebox.showwarning("Figyelem", "Válassz legalább egy sort!")
         return
@@ -399,15 +908,12 @@ def qr_generalas():
 
     qr_images = []
 
-    for i in selected:
-        sor = adatok[int(i)]
-        url = f"{SERVER_URL}/edit/{sor['Azonosító']}"
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(url); qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white").convert("RGB")
-        qr_images.append(img)
-        disp = img.resize((260, 260), getattr(Image, "LANCZOS", Image.BICUBIC))
-        tkimg = ImageTk.PhotoImage(disp)
+    # mátrixok egyszer, utána egész modulméretű raszter (nincs átméretezés/elmosás)
+    urls = [f"{SERVER_URL}/edit/{adatok[i]['Azonosító']}" for i in selected]
+    for i, m in zip(selected, encode_many(urls, border=5)):
+        sor = adatok[i]
+        qr_images.append(rasterize(m, 10, "1"))
+        tkimg = ImageTk.PhotoImage(rasterize_fit(m, 260, "L"))
 
         item = tk.Frame(frame, borderwidth=2, relief="solid", pady=10)
         tk.Label(item, text=f"Azonosító: {sor['Azonosító']}").pack(pady=5)
@@ -439,7 +945,8 @@ def ment_local():
 def betolt_local():
     path = filedialog.askopenfilename(filetypes=[("JSON","*.json")])
     if not path: return
-    global adatok, mezok, listak
+    global adatok, mezok, listak, adat_rev, adat_etag
+    adat_rev = adat_etag = None  # a betöltött lista eltér a szerverétől → következő szinkron teljes legyen
     with open(path, "r", encoding="utf-8") as f:
         blob = json.load(f)
         if isinstance(blob, list):
@@ -461,20 +968,24 @@ def betolt_local():
             listak.setdefault("Beszállító", ["Beszállító 1","Beszállító 2","Beszállító 3"])
             listak.setdefault("Hely", ["Raktár A","Raktár B","Kijelölt hely"])
             listak.setdefault("Osztály", ["Fénykép","Eladva","Javításra"])
-    sync_to_server(); update_tree(); messagebox.showinfo("Betöltve", path)
+    for r in adatok:
+        if not r.get("Azonosító"):
+            r["Azonosító"] = gen_id()  # a naplóhoz azonosító kell; a szerver is így pótolná
+    tar.mindent_ment(adatok, mezok, listak, None)
+    jelol_meta(); jelol_rekordok(adatok)
+    update_tree(); messagebox.showinfo("Betöltve", path)
 
 # --- A4 2×2 PDF 100% nyomtatás (több kiválasztott) ---
 def pdf_100_nyomtat():
     """Több kiválasztott rekord → A4 2x2 PDF oldalak, 100% (SumatraPDF 'noscale' ha elérhető)."""
     try:
-        DPI = 300
-        pages, A4_W, A4_H = build_pages_fullA4_from_selection(DPI=DPI)
-        if not pages: return
+        urls = kivalasztott_urlek()
+        if not urls: return
         import subprocess, sys
         tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
         path = tmp.name; tmp.close()
-        first, rest = pages[0], pages[1:]
-        first.save(path, save_all=True, append_images=rest, resolution=DPI)
+        # vektoros QR-ek, oldalanként a fájlba írva → a memória nem nő a címkék számával
+        label_pdf.write_label_pdf_pool(path, urls, cols=2, rows=2)
 
         # Próbáljuk SumatraPDF-et (noscale)
         candidates = [
@@ -502,97 +1013,126 @@ def pdf_100_nyomtat():
         import traceback; traceback.print_exc()
         messagebox.showerror("Hiba", f"PDF hiba: {e}")
 
-def build_pages_fullA4_from_selection(DPI=300):
-    """A4 (210x297mm) 2x2 teljes felosztás, margó nélkül."""
-    selected = tree.selection()
+def kivalasztott_urlek():
+    """A kijelölt sorok /edit URL-jei (a címkékre ez kerül QR-ként)."""
+    selected = kivalasztott_indexek()
     if not selected:
         messagebox.showwarning("Figyelem", "Válassz ki legalább egy sort!")
-        return [], 0, 0
-
-    def mm_to_px(mm): return int(round(mm / 25.4 * DPI))
-    A4_W, A4_H = mm_to_px(210), mm_to_px(297)
-    SLOT_W, SLOT_H = A4_W // 2, A4_H // 2
-    INSET = 0
-
-    items = []
-    for i in selected:
-        sor = adatok[int(i)]
-        az = sor.get("Azonosító", "")
-        url = f"{SERVER_URL}/edit/{az}"
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(url); qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white").convert("RGB")
-        items.append(img)
-
-    # Töltsük ki a 4-es oldalakat
-    from PIL import Image as PILImage
-    while len(items) % 4 != 0:
-        items.append(PILImage.new("RGB", (300, 300), "white"))
-
-    pages = []
-    for start in range(0, len(items), 4):
-        page = PILImage.new("RGB", (A4_W, A4_H), "white")
-        positions = [
-            (0 * SLOT_W, 0 * SLOT_H),
-            (1 * SLOT_W, 0 * SLOT_H),
-            (0 * SLOT_W, 1 * SLOT_H),
-            (1 * SLOT_W, 1 * SLOT_H),
-        ]
-        for img, (x, y) in zip(items[start:start+4], positions):
-            target_w = SLOT_W - 2 * INSET
-            target_h = SLOT_H - 2 * INSET
-            side = min(target_w, target_h)
-            resample = getattr(PILImage, 'LANCZOS', Image.BICUBIC)
-            qr_resized = img.resize((side, side), resample)
-            paste_x = x + (SLOT_W - side) // 2
-            paste_y = y + (SLOT_H - side) // 2
-            page.paste(qr_resized, (paste_x, paste_y))
-        pages.append(page)
-    return pages, A4_W, A4_H
+        return []
+    return [f"{SERVER_URL}/edit/{adatok[i].get('Azonosító', '')}" for i in selected]
 
 # --- Fő UI ---
-root = tk.Tk()
-root.title("QR Kód Generáló – Szerver szinkron")
-
-style = ttk.Style(); style.theme_use("default")
-style.configure("Custom.Treeview", background="white", foreground="black",
-                rowheight=25, fieldbackground="white", bordercolor="black",
-                borderwidth=1, relief="solid", font=("Arial", 10))
-style.map("Custom.Treeview", background=[("selected", "#004080")], foreground=[("selected", "white")])
-style.configure("Custom.Treeview.Heading", font=("Arial", 10, "bold"), bordercolor="black", borderwidth=1, relief="solid")
-
-frame_main = tk.Frame(root); frame_main.pack(fill="both", expand=True)
-tree = ttk.Treeview(frame_main, show="headings", selectmode="extended", style="Custom.Treeview")
-vsb = ttk.Scrollbar(frame_main, orient="vertical", command=tree.yview)
-hsb = ttk.Scrollbar(frame_main, orient="horizontal", command=tree.xview)
-tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
-vsb.pack(side="right", fill="y"); hsb.pack(side="bottom", fill="x")
-tree.pack(fill="both", expand=True, padx=10, pady=10)
-
-frame = tk.Frame(root); frame.pack(pady=8)
-frame_4up = tk.Frame(root); frame_4up.pack(pady=4)
-
-tk.Button(frame, text="Új sor", command=lambda: sor_beviteli_ablak()).grid(row=0, column=0, padx=5)
-tk.Button(frame, text="Módosítás", command=lambda: sor_beviteli_ablak(adatok[int(tree.selection()[0])], int(tree.selection()[0])) if tree.selection() else messagebox.showwarning("Figyelem","Válassz sort!")).grid(row=0, column=1, padx=5)
-tk.Button(frame, text="Törlés", command=torles).grid(row=0, column=2, padx=5)
-tk.Button(frame, text="QR előnézet", command=qr_generalas).grid(row=0, column=3, padx=5)
-tk.Button(frame, text="Legördülők szerkesztése", command=szerkesztes_legordulok).grid(row=0, column=4, padx=5)
-tk.Button(frame, text="Mezők szerkesztése", command=mezok_kezelese).grid(row=0, column=5, padx=5)
-tk.Button(frame, text="Szinkron (Szerver→Helyi)", command=sync_from_server).grid(row=0, column=6, padx=5)
-tk.Button(frame, text="Mentés Szerverre", command=sync_to_server).grid(row=0, column=7, padx=5)
-tk.Button(frame, text="Lokális mentés", command=ment_local).grid(row=0, column=8, padx=5)
-tk.Button(frame, text="Lokális betöltés", command=betolt_local).grid(row=0, column=9, padx=5)
-
-tk.Button(frame_4up, text="A4 4× QR – PDF (100%)", command=pdf_100_nyomtat).pack()
-
-zoom_frame = tk.Frame(root); zoom_frame.pack(side="bottom", fill="x", padx=5, pady=5)
-scale = tk.Scale(zoom_frame, from_=8, to=24, orient="horizontal", command=lambda v: (style.configure("Custom.Treeview", rowheight=int(int(v)*1.5)+10, font=("Arial", int(v))), style.configure("Custom.Treeview.Heading", font=("Arial", int(v), "bold")), resize_columns()), label="Zoom")
-scale.set(10); scale.pack(side="right")
-
-# Indulás: szinkron, ha elérhető a szerver
-try:
-    sync_from_server()
-except Exception:
+# (a process pool gyermekfolyamatai importálják ezt a modult: ott ne épüljön fel a UI)
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    root = tk.Tk()
+    root.title("QR Kód Generáló – Szerver szinkron")
+
+    style = ttk.Style(); style.theme_use("default")
+    style.configure("Custom.Treeview", background="white", foreground="black",
+                    rowheight=25, fieldbackground="white", bordercolor="black",
+                    borderwidth=1, relief="solid", font=("Arial", 10))
+    style.map("Custom.Treeview", background=[("selected", "#004080")], foreground=[("selected", "white")])
+    style.configure("Custom.Treeview.Heading", font=("Arial", 10, "bold"), bordercolor="black", borderwidth=1, relief="solid")
+
+    frame_kereso = tk.Frame(root); frame_kereso.pack(fill="x", padx=10, pady=(8, 0))
+    tk.Label(frame_kereso, text="Keresés:").pack(side="left")
+    kereso_var = tk.StringVar()
+    tk.Entry(frame_kereso, textvariable=kereso_var, width=40).pack(side="left", padx=5)
+    tk.Button(frame_kereso, text="×", command=lambda: kereso_var.set("")).pack(side="left")
+    kereso_lbl = tk.Label(frame_kereso, text="", fg="#004080"); kereso_lbl.pack(side="left", padx=10)
+    _kereso_idozito = {"id": None}
+
+    def kereses_kesz(szoveg, valasz):
+        if szoveg != nezet["szoveg"]:
+            return  # közben tovább gépeltek
+        nezet["talalat"] = [t["azonosito"] for t in valasz.get("talalatok", [])]
+        update_tree()
+        kereso_lbl.config(text=f"{valasz.get('total', 0)} találat a szerveren")
+
+    def kereses_utemez(*_):
+        # gépelés közben nem kérdezünk minden leütésnél; azonnal a helyi tárból szűrünk,
+        # a szerver (ékezetfüggetlen, relevancia szerinti) találatai utána érkeznek.
+        # Offline / szerverhiba esetén a helyi eredmény marad.
+        if _kereso_idozito["id"]:
+            root.after_cancel(_kereso_idozito["id"])
+        def futtat():
+            _kereso_idozito["id"] = None
+            szoveg = kereso_var.get()
+            nezet["szoveg"], nezet["talalat"] = szoveg, None
+            virt["eleje"] = 0
+            update_tree()
+            kereso_lbl.config(text="")
+            if szoveg.strip():
+                halo_kuld(api_search, szoveg, kulcs="kereses",
+                          kesz=lambda v: kereses_kesz(szoveg, v),
+                          hiba=lambda exc: kereso_lbl.config(text="helyi keresés (szerver nem érhető el)"))
+        _kereso_idozito["id"] = root.after(250, futtat)
+
+    kereso_var.trace_add("write", kereses_utemez)
+
+    frame_main = tk.Frame(root); frame_main.pack(fill="both", expand=True)
+    tree = ttk.Treeview(frame_main, show="headings", selectmode="extended", style="Custom.Treeview")
+    vsb = ttk.Scrollbar(frame_main, orient="vertical", command=virt_yview)
+    hsb = ttk.Scrollbar(frame_main, orient="horizontal", command=tree.xview)
+    tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+    vsb.pack(side="right", fill="y"); hsb.pack(side="bottom", fill="x")
+    tree.pack(fill="both", expand=True, padx=10, pady=10)
+    tree.bind("<Configure>", lambda e: virt_render() if virt["aktiv"] else None)
+    tree.bind("<MouseWheel>", virt_gorget)
+    tree.bind("<Button-4>", virt_gorget)
+    tree.bind("<Button-5>", virt_gorget)
+    tree.bind("<Button-1>", virt_kattintas)
+    tree.bind("<<TreeviewSelect>>", virt_kijeloles)
+    tree.bind("<Up>", virt_nyil(-1))
+    tree.bind("<Down>", virt_nyil(1))
+
+    frame = tk.Frame(root); frame.pack(pady=8)
+    frame_4up = tk.Frame(root); frame_4up.pack(pady=4)
+
+    tk.Button(frame, text="Új sor", command=lambda: sor_beviteli_ablak()).grid(row=0, column=0, padx=5)
+    tk.Button(frame, text="Módosítás", command=lambda: sor_beviteli_ablak(adatok[kivalasztott_indexek()[0]], kivalasztott_indexek()[0]) if kivalasztott_indexek() else messagebox.showwarning("Figyelem","Válassz sort!")).grid(row=0, column=1, padx=5)
+    tk.Button(frame, text="Törlés", command=torles).grid(row=0, column=2, padx=5)
+    tk.Button(frame, text="QR előnézet", command=qr_generalas).grid(row=0, column=3, padx=5)
+    tk.Button(frame, text="Legördülők szerkesztése", command=szerkesztes_legordulok).grid(row=0, column=4, padx=5)
+    tk.Button(frame, text="Mezők szerkesztése", command=mezok_kezelese).grid(row=0, column=5, padx=5)
+    tk.Button(frame, text="Szinkron (Szerver→Helyi)", command=sync_from_server).grid(row=0, column=6, padx=5)
+    tk.Button(frame, text="Mentés Szerverre", command=sync_to_server).grid(row=0, column=7, padx=5)
+    tk.Button(frame, text="Lokális mentés", command=ment_local).grid(row=0, column=8, padx=5)
+    tk.Button(frame, text="Lokális betöltés", command=betolt_local).grid(row=0, column=9, padx=5)
+
+    tk.Button(frame_4up, text="A4 4× QR – PDF (100%)", command=pdf_100_nyomtat).pack(side="left", padx=5)
+    tk.Button(frame_4up, text="Törlés visszavonása", command=torles_visszavonas).pack(side="left", padx=5)
+
+    zoom_frame = tk.Frame(root); zoom_frame.pack(side="bottom", fill="x", padx=5, pady=5)
+    scale = tk.Scale(zoom_frame, from_=8, to=24, orient="horizontal", command=zoom, label="Zoom")
+    scale.set(10); scale.pack(side="right")
+    halo_lbl = tk.Label(zoom_frame, text="", fg="#004080"); halo_lbl.pack(side="left")
+    kimeno_lbl = tk.Label(zoom_frame, text="", fg="#004080"); kimeno_lbl.pack(side="left", padx=10)
+    kimeno_lbl.bind("<Button-1>", lambda e: kimeno_hibasak_ablak())
+
+    def kilepes():
+        # a futó kérést megvárjuk; a még függő műveletek a helyi tárban maradnak, a következő indításkor mennek fel
+        _halo.shutdown(wait=True)
+        tar.close()
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", kilepes)
+
+    # Indulás: a helyi tárból azonnal rajzolunk (hálózat nélkül is), a szinkron a háttérben frissít
+    try:
+        tar = HelyiTar()
+    except Exception as e:
+        messagebox.showwarning("Helyi tár", f"A helyi tár nem nyitható meg, csak memóriában dolgozunk:\n{e}")
+        tar = HelyiTar(":memory:")
+    if not tar.ures():
+        adatok, _m, _l, adat_rev = tar.betolt()
+        adat_etag = tar.etag()
+        mezok = _m or fix_mezok.copy()
+        listak = _l if _l is not None else listak
     update_tree()
+    root.after(50, halo_feldolgoz)
+    kimeno_utemez(0)   # az előző futásból maradt műveletek
+    sync_from_server(jelez=False)
 
-root.mainloop()
+    root.mainloop()
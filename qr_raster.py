@@ -0,0 +1,42 @@
+# qr_raster.py — közös QR mátrix + raszterizálás (szerver és desktop)
+import io
+from functools import partial
+
+import numpy as np
+import qrcode
+from PIL import Image
+
+def qr_matrix(data: str, border: int = 2) -> np.ndarray:
+    """A QR modulmátrixa bool tömbként (True = sötét), csendes zónával együtt."""
+    qr = qrcode.QRCode(version=1, border=border)
+    qr.add_data(data); qr.make(fit=True)
+    return np.array(qr.get_matrix(), dtype=bool)
+
+def encode_many(datas, border: int = 2, executor=None) -> list:
+    """
+    Sok adat kódolása egyszerre. executor (pl. ProcessPoolExecutor) megadásakor
+    párhuzamosan fut; a mátrixok kicsik, olcsón utaznak a folyamatok között.
+    """
+    if executor is None:
+        return [qr_matrix(d, border) for d in datas]
+    return list(executor.map(partial(qr_matrix, border=border), datas, chunksize=16))
+
+def rasterize(m: np.ndarray, module_px: int, mode: str = "1") -> Image.Image:
+    """
+    Mátrix → kép pontosan module_px képpontos modulokkal (átméretezés/elmosás nélkül).
+    mode: "1" (1 bites) vagy "L" (8 bites szürke).
+    """
+    module_px = max(1, int(module_px))
+    light = np.repeat(np.repeat(~m, module_px, axis=0), module_px, axis=1)
+    if mode == "1":
+        return Image.fromarray(light)
+    return Image.fromarray(light.astype(np.uint8) * 255, mode="L")
+
+def rasterize_fit(m: np.ndarray, side_px: int, mode: str = "1") -> Image.Image:
+    """A legnagyobb egész modulméret, amivel a kép még belefér side_px-be."""
+    return rasterize(m, max(1, side_px // len(m)), mode)
+
+def png_bytes(m: np.ndarray, module_px: int) -> bytes:
+    bio = io.BytesIO()
+    rasterize(m, module_px, "1").save(bio, format="PNG", optimize=True)
+    return bio.getvalue()
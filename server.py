@@ -1,8 +1,13 @@
 # server.py — Flask + SQLAlchemy backend a QR apphoz
-import os, io, json, uuid
-from flask import Flask, request, jsonify, render_template, redirect, url_for, send_file, abort
+import os, re, sys, json, time, uuid, queue, sqlite3, tempfile, copy, zlib, gzip, base64, hashlib, threading
+from concurrent.futures import Future
+from collections import OrderedDict
+from flask import Flask, request, has_request_context, jsonify, render_template, redirect, url_for, send_file, abort, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import text, Column, Integer, String, Text, inspect
+from sqlalchemy import text, Column, Integer, String, Text, inspect, bindparam, literal_column, or_, and_, func, event, tuple_
+from sqlalchemy.engine import Engine
+import metrics
+import wire
 
 # -------------------- Flask & DB --------------------
 app = Flask(__name__, template_folder="templates")
@@ -17,6 +22,42 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 db = SQLAlchemy(app)
 
+# -------------------- SQLite: WAL, busy timeout, írási tranzakciók --------------------
+# Több gunicorn worker + mobil /qr POST-ok + desktop /update ugyanarra a fájlra:
+# - WAL: az olvasók nem várnak az íróra (és fordítva), synchronous=NORMAL WAL mellett biztonságos;
+# - busy_timeout: a zárra várunk, nem dobunk azonnal "database is locked"-ot;
+# - az író kérések tranzakciója BEGIN IMMEDIATE: a zárat az elején kérjük, így nem fordulhat elő,
+#   hogy egy olvasással indult tranzakció íráskor nem tud zárat váltani (ezt a busy_timeout sem oldja meg).
+# A BEGIN-t ezért mi adjuk ki (a pysqlite saját tranzakciókezelése kikapcsolva, ld. SQLAlchemy
+# pysqlite dokumentáció); ettől a SAVEPOINT is megbízhatóan működik (írási sor).
+SQLITE_TUNE = os.environ.get("SQLITE_TUNE", "1") != "0"
+SQLITE_BUSY_MS = int(os.environ.get("SQLITE_BUSY_MS", "30000"))
+SQLITE_MMAP_MB = int(os.environ.get("SQLITE_MMAP_MB", "256"))
+IRO_METODUSOK = {"POST", "PUT", "PATCH", "DELETE"}
+_iro_szal = threading.local()   # az írási sor szála: minden tranzakciója író
+
+@event.listens_for(Engine, "connect")
+def _sqlite_kapcsolat(dbapi_conn, conn_record):
+    if not SQLITE_TUNE or not isinstance(dbapi_conn, sqlite3.Connection):
+        return
+    dbapi_conn.isolation_level = None   # BEGIN-t a "begin" eseményben adjuk ki
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_MS}")
+    cur.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+    cur.close()
+
+@event.listens_for(Engine, "begin")
+def _sqlite_begin(conn):
+    if conn.dialect.name != "sqlite" or conn.connection.dbapi_connection.isolation_level is not None:
+        return
+    mod = conn.info.pop("sqlite_begin", None)
+    if mod is None:
+        iro = getattr(_iro_szal, "aktiv", False) or (has_request_context() and request.method in IRO_METODUSOK)
+        mod = "BEGIN IMMEDIATE" if iro else "BEGIN"
+    conn.exec_driver_sql(mod)
+
 # -------------------- Modellek --------------------
 class Adat(db.Model):
     __tablename__ = "adat"
@@ -24,12 +65,21 @@ class Adat(db.Model):
     azonosito = Column(String(64), unique=True, nullable=True)  # régi DB-ben hiányozhat; pótoljuk
     data = Column(Text)                                         # JSON szöveg
     deleted = Column(Integer, default=0)                        # 0=aktív, 1=törölt (soft delete)
+    rev = Column(Integer, default=0, index=True)                # utolsó módosítás revíziója (delta szinkron)
 
 class MetaKV(db.Model):
     __tablename__ = "meta_kv"
     key = Column(String(64), primary_key=True)
     value = Column(Text)
 
+class SorszamSzamlalo(db.Model):
+    """Utoljára kiosztott Sorszám (Név, Fok, Beszállító) csoportonként."""
+    __tablename__ = "sorszam_szamlalo"
+    nev = Column(String(255), primary_key=True)
+    fok = Column(String(255), primary_key=True)
+    beszallito = Column(String(255), primary_key=True)
+    utolso = Column(Integer, nullable=False, default=0)
+
 # --- Alap mezők és legördülők, ha meta még üres ---
 DEFAULT_FIELDS = [
     "Azonosító", "Sorszám", "Fémzárszám",
@@ -42,6 +92,11 @@ DEFAULT_LISTS = {
     "Osztály": ["Fénykép", "Eladva", "Javításra"],
 }
 
+# meta_kv kulcs: adat tábla revízió-számlálója (monoton nő minden írásnál)
+DATA_REV_KEY = "data_rev"
+# meta_kv kulcs: meta verziószáma (save_meta és /update lépteti; a workerek ezt figyelik)
+META_VER_KEY = "meta_ver"
+
 # -------------------- Segédek --------------------
 def gen_id(n=8) -> str:
     return uuid.uuid4().hex[:n].upper()
@@ -58,48 +113,705 @@ def is_all_empty_except_id(rec: dict) -> bool:
             return False
     return True
 
-def ensure_schema():
+def bump_counter(key: str) -> int:
     """
-    Táblák létrehozása + hiányzó oszlopok pótlása (SQLite/Postgres kompatibilis),
-    egyedi index az azonosítóra; régi sorok azonosítójának feltöltése.
+    meta_kv számláló növelése a futó tranzakcióban; az új értéket adja vissza.
+    Az UPDATE commitig zárolja a sort, így a párhuzamos írók sorban kapnak
+    revíziót, és commit-sorrendben is látszanak (a delta szinkron erre épít).
     """
-    db.create_all()
-    insp = inspect(db.engine)
-    tables = set(insp.get_table_names())
-    if "adat" not in tables or "meta_kv" not in tables:
-        db.create_all()
-        insp = inspect(db.engine)
-        tables = set(insp.get_table_names())
+    res = db.session.execute(
+        text("UPDATE meta_kv SET value = CAST(CAST(value AS INTEGER) + 1 AS TEXT) WHERE key = :k"),
+        {"k": key},
+    )
+    if res.rowcount == 0:
+        db.session.add(MetaKV(key=key, value="1"))
+        db.session.flush()
+        return 1
+    return int(db.session.execute(text("SELECT value FROM meta_kv WHERE key = :k"), {"k": key}).scalar())
 
-    # oszlopok lekérdezése az 'adat' tábláról
-    cols = {c["name"] for c in insp.get_columns("adat")}
+def read_counter(key: str) -> int:
+    val = db.session.execute(text("SELECT value FROM meta_kv WHERE key = :k"), {"k": key}).scalar()
+    try:
+        return int(val or 0)
+    except (TypeError, ValueError):
+        return 0
 
-    # ALTER-ek tranzakcióban
-    with db.engine.begin() as conn:
-        if "azonosito" not in cols:
-            conn.execute(text("ALTER TABLE adat ADD COLUMN azonosito TEXT"))
-        if "deleted" not in cols:
-            conn.execute(text("ALTER TABLE adat ADD COLUMN deleted INTEGER DEFAULT 0"))
-        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS idx_adat_azonosito ON adat(azonosito)"))
-
-    # régi sorok azonosítójának feltöltése + deleted alapérték
-    rows = Adat.query.all()
-    for row in rows:
-        if not getattr(row, "azonosito", None):
+def bump_data_rev() -> int:
+    """
+    Új adat revízió egy sorokat módosító íráshoz (a futó tranzakcióban). Mentett mezőlista
+    nélkül a /meta az adatokból tanul, ezért ilyenkor a meta verziója is lép: a workerek
+    meta cache-e és a /meta, /data ETag-je is érvénytelen lesz.
+    """
+    if _tanult_meta():
+        bump_counter(META_VER_KEY)
+    return bump_counter(DATA_REV_KEY)
+
+def version_etag(*parts) -> str:
+    """
+    ETag a verziószámokból (data_rev, meta_ver) és a kérés paramétereiből — a törzs
+    hash-e nélkül, így a sorok beolvasása előtt eldönthető, hogy változott-e valami.
+    Gyenge ETag: a számláló olvasása után commitolt sor még belefér a válaszba.
+    """
+    return hashlib.sha1(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()[:24]
+
+def not_modified(etag: str):
+    """304 válasz, ha a kliens If-None-Match fejléce egyezik, különben None."""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    resp = Response(status=304, headers={"Cache-Control": "no-cache"})
+    resp.set_etag(etag, weak=True)
+    return resp
+
+def with_etag(resp, etag: str):
+    """ETag + no-cache (a kliens mindig revalidáljon) a sikeres válaszra; a hibákat érintetlenül hagyjuk."""
+    if isinstance(resp, Response) and resp.status_code == 200:
+        resp.set_etag(etag, weak=True)
+        resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+# -------------------- Séma migrációk --------------------
+class SchemaVersion(db.Model):
+    __tablename__ = "schema_version"
+    version = Column(Integer, primary_key=True)
+
+MIGRATION_LOCK_ID = 0x51524150   # pg_advisory_xact_lock kulcs ("QRAP")
+MIGRATE_CHUNK = 1000             # backfill darabméret
+MIGRATION_LOCK_WAIT_MS = 10 * 60 * 1000  # SQLite: ennyit vár a zárra a többi worker
+
+def _m1_alap(conn):
+    """
+    Táblák + hiányzó oszlopok (azonosito, deleted); régi sorok azonosítójának
+    feltöltése darabonként, memóriabeli ütközés-halmazzal; egyedi index.
+    """
+    db.metadata.create_all(bind=conn, tables=[Adat.__table__, MetaKV.__table__])
+    cols = {c["name"] for c in inspect(conn).get_columns("adat")}
+    if "azonosito" not in cols:
+        conn.execute(text("ALTER TABLE adat ADD COLUMN azonosito TEXT"))
+    if "deleted" not in cols:
+        conn.execute(text("ALTER TABLE adat ADD COLUMN deleted INTEGER DEFAULT 0"))
+
+    seen = {az for (az,) in conn.execute(text("SELECT azonosito FROM adat WHERE azonosito IS NOT NULL AND azonosito <> ''"))}
+    last = 0
+    while True:
+        rows = conn.execute(text(
+            "SELECT id, data FROM adat WHERE (azonosito IS NULL OR azonosito = '') AND id > :last "
+            "ORDER BY id LIMIT :n"
+        ), {"last": last, "n": MIGRATE_CHUNK}).fetchall()
+        if not rows:
+            break
+        upd = []
+        for rid, data in rows:
             try:
-                rec = json.loads(row.data or "{}")
+                rec = json.loads(data or "{}")
             except Exception:
                 rec = {}
-            base = (rec.get("Azonosító") or "").strip().upper() or gen_id()
-            cand = base
-            n = 1
-            while Adat.query.filter_by(azonosito=cand).first():
+            base = (str(rec.get("Azonosító") or "") if isinstance(rec, dict) else "").strip().upper() or gen_id()
+            cand, n = base, 1
+            while cand in seen:
                 n += 1
                 cand = f"{base}-{n}"
-            row.azonosito = cand
-        if row.deleted is None:
-            row.deleted = 0
-    db.session.commit()
+            seen.add(cand)
+            upd.append({"i": rid, "a": cand})
+        conn.execute(text("UPDATE adat SET azonosito = :a WHERE id = :i"), upd)
+        last = rows[-1][0]
+
+    conn.execute(text("UPDATE adat SET deleted = 0 WHERE deleted IS NULL"))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS idx_adat_azonosito ON adat(azonosito)"))
+
+def _m2_revizio(conn):
+    """rev oszlop + index a delta szinkronhoz; a számláló indítása a legnagyobb revízióról."""
+    cols = {c["name"] for c in inspect(conn).get_columns("adat")}
+    if "rev" not in cols:
+        conn.execute(text("ALTER TABLE adat ADD COLUMN rev INTEGER DEFAULT 0"))
+    conn.execute(text("UPDATE adat SET rev = 0 WHERE rev IS NULL"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_adat_rev ON adat(rev)"))
+    conn.execute(text(
+        "INSERT INTO meta_kv (key, value) "
+        "SELECT :k, CAST(COALESCE((SELECT MAX(rev) FROM adat), 0) AS TEXT) "
+        "WHERE NOT EXISTS (SELECT 1 FROM meta_kv WHERE key = :k)"
+    ), {"k": DATA_REV_KEY})
+
+def _m3_sorszam(conn):
+    """Sorszám számláló tábla, feltöltve a meglévő adatokból."""
+    SorszamSzamlalo.__table__.create(bind=conn, checkfirst=True)
+    _rebuild_sorszam(conn)
+
+# Teljes szöveges index: az aktív sorok összes JSON értéke (a mezőnevek nélkül).
+# SQLite: FTS5 tábla (rowid = adat.id), triggerek tartják karban minden írásnál
+# (upsert, soft delete / visszaállítás, mező átnevezés/törlés). A remove_diacritics 2
+# miatt az ékezetek nem számítanak (arvizturo ↔ Árvíztűrő); a prefix index a rövid
+# előtagos kereséseket (gépelés közben) gyorsítja.
+# a json_each csak érvényes JSON-ra fut: a WHEN/WHERE kiértékelési sorrendjére nem építünk
+# (SQLite a konstans részkifejezéseket a feltétel elé emelheti), hibás sornál NULL
+FTS_SZOVEG_SQL = ("(CASE WHEN json_valid({col}.data) THEN"
+                  " (SELECT group_concat(value, ' ') FROM json_each({col}.data)) END)")
+FTS_SQLITE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS adat_fts USING fts5(szoveg, tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3')",
+    "CREATE TRIGGER IF NOT EXISTS adat_fts_ai AFTER INSERT ON adat "
+    "WHEN NEW.deleted = 0 AND json_valid(NEW.data) BEGIN "
+    " INSERT INTO adat_fts (rowid, szoveg) VALUES (NEW.id, " + FTS_SZOVEG_SQL.format(col="NEW") + "); END",
+    # változatlan tartalmú újraküldésnél (teljes szinkron) nem nyúlunk az indexhez
+    "CREATE TRIGGER IF NOT EXISTS adat_fts_au AFTER UPDATE OF data, deleted ON adat "
+    "WHEN OLD.data IS NOT NEW.data OR OLD.deleted IS NOT NEW.deleted BEGIN "
+    " DELETE FROM adat_fts WHERE rowid = OLD.id;"
+    " INSERT INTO adat_fts (rowid, szoveg) SELECT NEW.id, " + FTS_SZOVEG_SQL.format(col="NEW") +
+    " WHERE NEW.deleted = 0 AND json_valid(NEW.data); END",
+    "CREATE TRIGGER IF NOT EXISTS adat_fts_ad AFTER DELETE ON adat BEGIN "
+    " DELETE FROM adat_fts WHERE rowid = OLD.id; END",
+]
+# Postgres: generált tsvector oszlop + GIN index ('simple' konfiguráció, unaccent ha elérhető).
+# A függvényeknek IMMUTABLE-nek kell lenniük a generált oszlophoz; hibás JSON-nál a nyers szöveg.
+FTS_PG = [
+    "CREATE OR REPLACE FUNCTION qr_kereso_szoveg(d text) RETURNS text LANGUAGE plpgsql IMMUTABLE AS $$ "
+    "BEGIN RETURN (SELECT string_agg(value, ' ') FROM jsonb_each_text(d::jsonb)); "
+    "EXCEPTION WHEN others THEN RETURN d; END $$",
+    "ALTER TABLE adat ADD COLUMN IF NOT EXISTS kereso tsvector GENERATED ALWAYS AS "
+    "(to_tsvector('simple', qr_unaccent(coalesce(qr_kereso_szoveg(data), '')))) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_adat_kereso ON adat USING gin (kereso)",
+]
+
+def _m4_kereses(conn):
+    """Teljes szöveges index (SQLite FTS5 / Postgres tsvector + GIN), a meglévő sorokkal feltöltve."""
+    if conn.dialect.name == "sqlite":
+        try:
+            conn.exec_driver_sql(FTS_SQLITE[0])
+        except Exception as e:   # FTS5 nélkül fordított SQLite: a /search LIKE-kal keres
+            app.logger.warning("FTS5 nem érhető el, a keresés index nélkül fut: %s", e)
+            return
+        for sql in FTS_SQLITE[1:]:
+            conn.exec_driver_sql(sql)
+        conn.exec_driver_sql("DELETE FROM adat_fts")
+        conn.exec_driver_sql(
+            "INSERT INTO adat_fts (rowid, szoveg) SELECT id, " + FTS_SZOVEG_SQL.format(col="adat") +
+            " FROM adat WHERE deleted = 0 AND json_valid(data)"
+        )
+    elif conn.dialect.name == "postgresql":
+        unaccent = True
+        try:
+            with conn.begin_nested():
+                conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS unaccent")
+        except Exception as e:
+            app.logger.warning("unaccent bővítmény nem érhető el, ékezetérzékeny keresés: %s", e)
+            unaccent = False
+        body = "SELECT public.unaccent('public.unaccent'::regdictionary, t)" if unaccent else "SELECT t"
+        conn.exec_driver_sql(
+            f"CREATE OR REPLACE FUNCTION qr_unaccent(t text) RETURNS text LANGUAGE sql IMMUTABLE AS $$ {body} $$"
+        )
+        for sql in FTS_PG:
+            conn.exec_driver_sql(sql)
+
+def _m5_kereses_vedelem(conn):
+    """Az FTS triggerek újralétrehozása a json_valid védelemmel (a 4-es migráció régi triggerei helyett)."""
+    if conn.dialect.name != "sqlite" or not inspect(conn).has_table("adat_fts"):
+        return
+    for nev in ("adat_fts_ai", "adat_fts_au"):
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {nev}")
+    for sql in FTS_SQLITE[1:3]:
+        conn.exec_driver_sql(sql)
+
+# (verzió, migráció) — csak a végére szabad újat fűzni
+MIGRATIONS = [
+    (1, _m1_alap),
+    (2, _m2_revizio),
+    (3, _m3_sorszam),
+    (4, _m4_kereses),
+    (5, _m5_kereses_vedelem),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def schema_version() -> int:
+    """Az adatbázis aktuális séma verziója (0, ha még nincs schema_version tábla)."""
+    try:
+        with db.engine.connect() as conn:
+            return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+    except Exception:
+        return 0
+
+def _migration_lock(conn):
+    """Egyetlen folyamat migrálhat: Postgresen advisory lock, SQLite-on írási zár (BEGIN IMMEDIATE)."""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": MIGRATION_LOCK_ID})
+    elif conn.dialect.name == "sqlite":
+        # a zárra váró workerek ne adják fel az alap busy timeout után
+        # (a PRAGMA-k közvetlenül a DBAPI kapcsolaton: ne indítsanak tranzakciót a zár előtt)
+        raw = conn.connection.dbapi_connection
+        busy = raw.execute("PRAGMA busy_timeout").fetchone()[0]
+        raw.execute(f"PRAGMA busy_timeout = {MIGRATION_LOCK_WAIT_MS}")
+        if raw.isolation_level is None:
+            # SQLITE_TUNE: a BEGIN-t a "begin" esemény adja ki → az első utasítás nyitja
+            conn.info["sqlite_begin"] = "BEGIN IMMEDIATE"
+            conn.exec_driver_sql("SELECT 1")
+        else:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        raw.execute(f"PRAGMA busy_timeout = {int(busy or 0)}")
+
+def run_migrations():
+    """
+    Függőben lévő migrációk futtatása egy tranzakcióban, zár alatt.
+    Ha a séma naprakész, ez egyetlen verzió-lekérdezés.
+    """
+    if schema_version() >= SCHEMA_VERSION:
+        return
+    with db.engine.connect() as conn:
+        _migration_lock(conn)
+        SchemaVersion.__table__.create(bind=conn, checkfirst=True)
+        # a zár megszerzése alatt egy másik worker már migrálhatott
+        cur = conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+        for ver, fn in MIGRATIONS:
+            if ver > cur:
+                app.logger.info("Séma migráció: %s (%s)", ver, fn.__name__)
+                fn(conn)
+                conn.execute(text("INSERT INTO schema_version (version) VALUES (:v)"), {"v": ver})
+        conn.commit()
+
+def _sql_str(s: str) -> str:
+    return "'" + s.replace("'", "''") + "'"
+
+def _json_valid_sql(dialect, col: str = "adat.data"):
+    """
+    SQL feltétel: col érvényes JSON-e (SQLite: json_valid, Postgres 16+: IS JSON OBJECT).
+    dialect: név vagy SQLAlchemy dialektus (a Postgres verzióhoz); None, ha nincs olcsó ellenőrzés.
+    """
+    name = getattr(dialect, "name", dialect)
+    if name == "sqlite":
+        return f"json_valid({col})"
+    if name == "postgresql" and (getattr(dialect, "server_version_info", None) or (0,)) >= (16,):
+        return f"{col} IS JSON OBJECT"
+    return None
+
+def _json_field_sql(dialect, key: str, col: str = "adat.data") -> str:
+    """
+    A json_field() SQL szövege; a kiemelt mezők indexei is ebből készülnek (col="data").
+    Érvényességi feltétellel védve: egy hibás (pl. csonka) sor NULL-t ad, nem hibát.
+    """
+    if '"' in key or "\\" in key:
+        raise ValueError(f"Nem támogatott mezőnév: {key}")
+    if getattr(dialect, "name", dialect) == "postgresql":
+        expr = f"(CAST({col} AS jsonb) ->> {_sql_str(key)})"
+    else:
+        path = '$."' + key + '"'
+        expr = f"json_extract({col}, {_sql_str(path)})"
+    guard = _json_valid_sql(dialect, col)
+    return f"(CASE WHEN {guard} THEN {expr} END)" if guard else expr
+
+def json_field(key: str):
+    """
+    Az adat.data JSON egy kulcsának SQL kifejezése (SQLite: json_extract,
+    Postgres: jsonb ->>). Az utat literálként írjuk be, hogy egy azonos
+    kifejezésre épített index is illeszkedhessen.
+    """
+    return literal_column(_json_field_sql(db.engine.dialect, key))
+
+# -------------------- Kiemelt mezők (kifejezés-indexek) --------------------
+# vesszővel elválasztott mezőnevek; ezekre a ?Mező=érték szűrés index-keresés
+PROMOTED_FIELDS = [f.strip() for f in os.environ.get("PROMOTED_FIELDS", "Fémzárszám,Hely,Beszállító,Osztály").split(",")
+                   if f.strip()]
+PROMOTED_KEY = "promoted_fields"   # meta_kv: {mező: {"expr": indexelt kifejezés[, "hiba": ...]}} (JSON)
+
+def _promoted_index_name(key: str) -> str:
+    return "ix_adat_p_" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+def _promoted_allapot(value) -> dict:
+    """A tárolt index állapot; a régi (mezőlista) formátumnál kifejezés nélkül → újraépül."""
+    try:
+        v = json.loads(value or "{}")
+    except ValueError:
+        return {}
+    if isinstance(v, list):
+        return {key: {} for key in v}
+    return v if isinstance(v, dict) else {}
+
+def ensure_promoted_indexes():
+    """
+    B-fa kifejezés-index a kiemelt mezőkre, pontosan a json_field() kifejezésére
+    (a lekérdezés így index-keresés). Az indexet az adatbázis minden írásnál
+    (/update, /qr, /edit) maga frissíti, létrehozáskor a meglévő sorokat is
+    feltölti. A kikerült mezők indexét eldobjuk; ha egy mező kifejezése változott
+    (pl. az érvényességi feltétel, Postgres 16-ra frissítés), újraépítjük.
+    A sikertelen létrehozást (pl. régi Postgresen egy hibás JSON sor miatt) feljegyezzük,
+    és nem próbáljuk újra minden induláskor (csak beállítás változásakor vagy
+    'flask --app server promoted-reindex'-re). Változatlan beállításnál ez
+    egyetlen meta_kv lekérdezés.
+    """
+    q = text("SELECT value FROM meta_kv WHERE key = :k")
+    with db.engine.connect() as conn:
+        kell = {}
+        for key in PROMOTED_FIELDS:
+            try:
+                kell[key] = _json_field_sql(conn.dialect, key, col="data")
+            except ValueError as e:
+                app.logger.warning("Kiemelt mező kihagyva: %s", e)
+
+        def naprakesz(allapot):
+            return allapot.keys() == kell.keys() and all(allapot[k].get("expr") == e for k, e in kell.items())
+
+        if naprakesz(_promoted_allapot(conn.execute(q, {"k": PROMOTED_KEY}).scalar())):
+            return
+        conn.rollback()
+        _migration_lock(conn)
+        regi = _promoted_allapot(conn.execute(q, {"k": PROMOTED_KEY}).scalar())
+        if naprakesz(regi):
+            conn.commit()
+            return
+        for key, st in regi.items():
+            if kell.get(key) != st.get("expr"):
+                conn.exec_driver_sql(f"DROP INDEX IF EXISTS {_promoted_index_name(key)}")
+        uj = {}
+        for key, expr in kell.items():
+            if regi.get(key, {}).get("expr") == expr:
+                uj[key] = regi[key]
+                continue
+            app.logger.info("Kiemelt mező index: %s", key)
+            try:
+                with conn.begin_nested():
+                    conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {_promoted_index_name(key)} ON adat (({expr}))")
+                uj[key] = {"expr": expr}
+            except Exception as e:
+                app.logger.error("Kiemelt mező index sikertelen (%s), index nélkül szűrünk: %s", key, e)
+                uj[key] = {"expr": expr, "hiba": str(getattr(e, "orig", e))[:500]}
+        cfg = json.dumps(uj, ensure_ascii=False)
+        if conn.execute(text("UPDATE meta_kv SET value = :v WHERE key = :k"), {"k": PROMOTED_KEY, "v": cfg}).rowcount == 0:
+            conn.execute(text("INSERT INTO meta_kv (key, value) VALUES (:k, :v)"), {"k": PROMOTED_KEY, "v": cfg})
+        conn.commit()
+
+def _promoted_hibak() -> dict:
+    """A sikertelen kiemelt mező indexek: {mező: hibaüzenet}."""
+    with db.engine.connect() as conn:
+        value = conn.execute(text("SELECT value FROM meta_kv WHERE key = :k"), {"k": PROMOTED_KEY}).scalar()
+    return {k: v["hiba"] for k, v in _promoted_allapot(value).items() if v.get("hiba")}
+
+@app.cli.command("promoted-reindex")
+def promoted_reindex_cmd():
+    """A sikertelen kiemelt mező indexek újrapróbálása (pl. a hibás sorok javítása után)."""
+    hibas = _promoted_hibak()
+    if hibas:
+        with db.engine.begin() as conn:
+            value = conn.execute(text("SELECT value FROM meta_kv WHERE key = :k"), {"k": PROMOTED_KEY}).scalar()
+            allapot = {k: v for k, v in _promoted_allapot(value).items() if k not in hibas}
+            conn.execute(text("UPDATE meta_kv SET value = :v WHERE key = :k"),
+                         {"k": PROMOTED_KEY, "v": json.dumps(allapot, ensure_ascii=False)})
+    ensure_promoted_indexes()
+    hibas = _promoted_hibak()
+    print(f"Sikertelen: {hibas}" if hibas else "Kész.")
+
+# -------------------- Tömeges írás --------------------
+LOOKUP_CHUNK = 500     # ennyi azonosító megy egy IN (...) lekérdezésbe
+UPSERT_CHUNK = 2000    # ennyi rekord kerül egy tranzakcióba (commit darabonként)
+
+def _dialect_insert():
+    """A futó dialektus ON CONFLICT-képes insert()-je (SQLite/Postgres); None, ha nincs ilyen."""
+    name = db.engine.dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+def _upsert_stmt():
+    """INSERT ... ON CONFLICT (azonosito) DO UPDATE a futó dialektushoz; None, ha nem támogatott."""
+    insert = _dialect_insert()
+    if insert is None:
+        return None
+    stmt = insert(Adat.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=["azonosito"],
+        set_={"data": stmt.excluded.data, "deleted": 0, "rev": stmt.excluded.rev},
+    )
+
+def fetch_existing(azonositok) -> dict:
+    """azonosito → (data, deleted) a már meglévő sorokra, darabolt IN (...) lekérdezésekkel."""
+    ids = list(azonositok)
+    out = {}
+    for i in range(0, len(ids), LOOKUP_CHUNK):
+        q = db.session.query(Adat.azonosito, Adat.data, Adat.deleted).filter(Adat.azonosito.in_(ids[i:i + LOOKUP_CHUNK]))
+        for az, data, deleted in q:
+            out[az] = (data, deleted)
+    return out
+
+# -------------------- Sorszám kiosztás --------------------
+SORSZAM_KULCS = ("Név", "Fok", "Beszállító")
+
+def sorszam_key(rec: dict):
+    """(Név, Fok, Beszállító) levágott szövegként; None, ha valamelyik üres."""
+    key = tuple(str(rec.get(f) if rec.get(f) is not None else "").strip() for f in SORSZAM_KULCS)
+    return key if all(key) else None
+
+def alloc_sorszam(key, k: int = 1) -> int:
+    """
+    k egymást követő Sorszám lefoglalása a futó tranzakcióban; a legutolsót adja vissza.
+    Az upsert zárolja a számláló sort commitig, így párhuzamos workerek sem kapnak azonos számot.
+    """
+    t = SorszamSzamlalo.__table__
+    params = {"nev": key[0], "fok": key[1], "beszallito": key[2]}
+    insert = _dialect_insert()
+    if insert is not None:
+        stmt = insert(t).values(utolso=k, **params)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=["nev", "fok", "beszallito"], set_={"utolso": t.c.utolso + k}))
+    else:
+        res = db.session.execute(t.update().filter_by(**params).values(utolso=t.c.utolso + k))
+        if res.rowcount == 0:
+            db.session.execute(t.insert().values(utolso=k, **params))
+    return db.session.execute(t.select().with_only_columns(t.c.utolso).filter_by(**params)).scalar()
+
+def alloc_sorszam_tobb(igeny: dict) -> dict:
+    """
+    Sorszámok lefoglalása sok kulcsra egyszerre: {kulcs: darab} → {kulcs: utolsó}.
+    Egy executemany upsert (utolso += darab), majd darabolt SELECT ... WHERE kulcs IN (...),
+    így az utasítások száma nem nő a kulcsok számával. A kulcsok rendezve mennek, hogy a
+    párhuzamos írók azonos sorrendben zárolják a számláló sorokat (nincs holtpont).
+    """
+    keys = sorted(igeny)
+    insert = _dialect_insert()
+    if insert is None:
+        return {key: alloc_sorszam(key, igeny[key]) for key in keys}
+    if not keys:
+        return {}
+    t = SorszamSzamlalo.__table__
+    stmt = insert(t)
+    stmt = stmt.on_conflict_do_update(index_elements=["nev", "fok", "beszallito"],
+                                      set_={"utolso": t.c.utolso + stmt.excluded.utolso})
+    db.session.execute(stmt, [{"nev": k[0], "fok": k[1], "beszallito": k[2], "utolso": igeny[k]} for k in keys])
+    out = {}
+    kulcs = tuple_(t.c.nev, t.c.fok, t.c.beszallito)
+    for i in range(0, len(keys), LOOKUP_CHUNK):
+        q = t.select().with_only_columns(t.c.nev, t.c.fok, t.c.beszallito, t.c.utolso).where(
+            kulcs.in_(keys[i:i + LOOKUP_CHUNK]))
+        for nev, fok, beszallito, utolso in db.session.execute(q):
+            out[(nev, fok, beszallito)] = utolso
+    return out
+
+def _assign_sorszam(recs: dict, existing: dict, kiosztott):
+    """
+    Sorszám a teljes (Név, Fok, Beszállító) kulcsú rekordokra: ha a meglévő sor kulcsa
+    nem változott, marad a régi szám; új sor vagy megváltozott kulcs esetén újat kapunk.
+    """
+    need = {}
+    for az, rec in recs.items():
+        key = sorszam_key(rec)
+        if key is None:
+            continue
+        old = None
+        if az in existing:
+            try:
+                old = json.loads(existing[az][0] or "{}")
+            except Exception:
+                old = None
+        if isinstance(old, dict) and sorszam_key(old) == key and old.get("Sorszám") not in (None, ""):
+            rec["Sorszám"] = old["Sorszám"]
+        else:
+            need.setdefault(key, []).append(rec)
+    utolsok = alloc_sorszam_tobb({key: len(group) for key, group in need.items()})
+    for key, group in need.items():
+        last = utolsok[key]
+        for n, rec in enumerate(group, start=last - len(group) + 1):
+            rec["Sorszám"] = n
+            if kiosztott is not None:
+                kiosztott[rec["Azonosító"]] = n
+
+def _rebuild_sorszam(conn) -> int:
+    """Számlálók újraszámolása az összes (törölt is) sor legnagyobb Sorszámából."""
+    maxes = {}
+    res = conn.execution_options(yield_per=MIGRATE_CHUNK).execute(text("SELECT data FROM adat"))
+    for (data,) in res:
+        try:
+            rec = json.loads(data or "{}")
+        except Exception:
+            continue
+        key = sorszam_key(rec) if isinstance(rec, dict) else None
+        if key is None:
+            continue
+        try:
+            n = int(rec.get("Sorszám"))
+        except (TypeError, ValueError):
+            n = 0
+        maxes[key] = max(maxes.get(key, 0), n)
+    conn.execute(SorszamSzamlalo.__table__.delete())
+    rows = [{"nev": k[0], "fok": k[1], "beszallito": k[2], "utolso": v} for k, v in maxes.items()]
+    if rows:
+        conn.execute(SorszamSzamlalo.__table__.insert(), rows)
+    return len(rows)
+
+def rebuild_sorszam_counters() -> int:
+    with db.engine.begin() as conn:
+        return _rebuild_sorszam(conn)
+
+@app.cli.command("sorszam-rebuild")
+def sorszam_rebuild_cmd():
+    """Sorszám számlálók újraépítése a meglévő adatokból (flask --app server sorszam-rebuild)."""
+    print(f"Kész: {rebuild_sorszam_counters()} számláló.")
+
+def upsert_records(recs, kiosztott=None, commit=True) -> int:
+    """
+    Rekordok tömeges upsertje Azonosító szerint (üres rekordokat kihagyjuk).
+    A Sorszámot a szerver osztja ki (lásd _assign_sorszam); ha 'kiosztott' szótár
+    meg van adva, az újonnan kiosztott számok azonosító szerint bekerülnek.
+    A változatlan, aktív sorokat nem írjuk újra, így nem kapnak új revíziót.
+    UPSERT_CHUNK-onként commitol; minden darab saját revíziót kap.
+    commit=False: a hívó tranzakciójában marad (írási sor, submit_write).
+    Visszaadja a feldolgozott (egyedi azonosítójú) rekordok számát.
+    """
+    batch = {}
+    for rec in recs:
+        if not isinstance(rec, dict) or is_all_empty_except_id(rec):
+            continue
+        az = (rec.get("Azonosító") or "").strip() or gen_id()
+        rec["Azonosító"] = az
+        batch[az] = rec  # ismétlődő azonosító: az utolsó nyer
+
+    ids = list(batch)
+    stmt = _upsert_stmt()
+    for i in range(0, len(ids), UPSERT_CHUNK):
+        chunk = {az: batch[az] for az in ids[i:i + UPSERT_CHUNK]}
+        existing = fetch_existing(chunk)
+        _assign_sorszam(chunk, existing, kiosztott)
+        rows = []
+        for az, rec in chunk.items():
+            data = json.dumps(rec, ensure_ascii=False)
+            if existing.get(az) != (data, 0):
+                rows.append({"azonosito": az, "data": data})
+        if not rows:
+            # nincs változás (ilyenkor új Sorszám sem foglalódott); a zárakat engedjük el
+            if commit:
+                db.session.rollback()
+            continue
+        rev = bump_data_rev()
+        for r in rows:
+            r["deleted"] = 0
+            r["rev"] = rev
+        if stmt is not None:
+            db.session.execute(stmt, rows)
+        else:
+            # egyéb dialektus: a lekérdezett állapot alapján külön UPDATE és INSERT (executemany)
+            upd = [{"b_az": r["azonosito"], "b_data": r["data"], "b_rev": rev} for r in rows if r["azonosito"] in existing]
+            ins = [r for r in rows if r["azonosito"] not in existing]
+            if upd:
+                db.session.execute(
+                    Adat.__table__.update()
+                    .where(Adat.azonosito == bindparam("b_az"))
+                    .values(data=bindparam("b_data"), deleted=0, rev=bindparam("b_rev")),
+                    upd,
+                )
+            if ins:
+                db.session.execute(Adat.__table__.insert(), ins)
+        if commit:
+            db.session.commit()
+    return len(ids)
+
+def set_deleted(azonositok, flag: int) -> int:
+    """
+    Soft delete (flag=1) vagy visszaállítás (flag=0) darabonként egyetlen UPDATE-tel:
+    UPDATE adat SET deleted=:flag, rev=:rev WHERE azonosito IN (...) AND deleted != :flag
+    A már ilyen állapotú sorok nem kapnak új revíziót; ha semmi sem változott, a
+    számláló sem lép. Visszaadja az érintett sorok számát.
+    """
+    ids = list(dict.fromkeys(str(a) for a in azonositok))
+    cnt = 0
+    for i in range(0, len(ids), LOOKUP_CHUNK):
+        rev = bump_data_rev()
+        res = db.session.execute(
+            Adat.__table__.update()
+            .where(Adat.azonosito.in_(ids[i:i + LOOKUP_CHUNK]), Adat.deleted != flag)
+            .values(deleted=flag, rev=rev)
+        )
+        if res.rowcount:
+            cnt += res.rowcount
+            db.session.commit()
+        else:
+            db.session.rollback()  # semmi nem változott → a revíziót se égessük el
+    return cnt
+
+# -------------------- Írási sor (opcionális, WRITE_QUEUE=1) --------------------
+# Workerenként egy író szál: a párhuzamos kis írásokat (mobil /qr, /edit) egy tranzakcióba
+# gyűjti (egy BEGIN IMMEDIATE + egy commit / fsync sok űrlap helyett egyenként). Minden munka
+# saját SAVEPOINT-ban fut, így egy hibás beküldés nem viszi el a csoport többi tagját.
+WRITE_QUEUE = os.environ.get("WRITE_QUEUE", "") == "1"
+WRITE_QUEUE_BATCH = int(os.environ.get("WRITE_QUEUE_BATCH", "64"))        # legfeljebb ennyi munka / tranzakció
+WRITE_QUEUE_WAIT_MS = float(os.environ.get("WRITE_QUEUE_WAIT_MS", "2"))  # ennyit várunk további munkára
+WRITE_QUEUE_TIMEOUT_S = 60
+
+class WriteQueue:
+    def __init__(self):
+        self.q = queue.Queue()
+        self.lock = threading.Lock()
+        self.szal = None
+
+    def _indit(self):
+        # lustán, az első íráskor: gunicorn fork után a workerben induljon
+        with self.lock:
+            if self.szal is None or not self.szal.is_alive():
+                self.szal = threading.Thread(target=self._fut, name="iro", daemon=True)
+                self.szal.start()
+
+    def submit(self, fn, args):
+        fut = Future()
+        self._indit()
+        self.q.put((fn, args, fut))
+        return fut.result(timeout=WRITE_QUEUE_TIMEOUT_S)
+
+    def _fut(self):
+        _iro_szal.aktiv = True
+        with app.app_context():
+            while True:
+                munkak = [self.q.get()]
+                hatarido = time.perf_counter() + WRITE_QUEUE_WAIT_MS / 1000
+                while len(munkak) < WRITE_QUEUE_BATCH:
+                    try:
+                        munkak.append(self.q.get(timeout=max(0.0, hatarido - time.perf_counter())))
+                    except queue.Empty:
+                        break
+                self._csoport(munkak)
+
+    def _csoport(self, munkak):
+        kesz = []
+        try:
+            for fn, args, fut in munkak:
+                sp = db.session.begin_nested()
+                try:
+                    eredmeny = fn(*args)
+                except Exception as e:
+                    sp.rollback()
+                    fut.set_exception(e)
+                    continue
+                sp.commit()
+                kesz.append((fut, eredmeny))
+            db.session.commit()
+        except Exception as e:
+            # a közös tranzakció hibája (zár, commit) minden még nyitott munkát érint
+            db.session.rollback()
+            for _, _, fut in munkak:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        finally:
+            db.session.close()
+            mx.inc("qr_write_queue_batches_total")
+            mx.inc("qr_write_queue_jobs_total", v=len(munkak))
+        for fut, eredmeny in kesz:
+            fut.set_result(eredmeny)
+
+_write_queue = WriteQueue()
+
+def submit_write(fn, *args):
+    """
+    fn(*args) egy írási tranzakcióban; fn nem commitol (pl. upsert_records(..., commit=False)).
+    WRITE_QUEUE=1 esetén az író szálon, más kérések írásaival egy tranzakcióban;
+    egyébként azonnal, a kérés saját session-jében. fn eredményét adja vissza.
+    """
+    if WRITE_QUEUE:
+        # a kérés saját (olvasó, de író kérésként BEGIN IMMEDIATE) tranzakcióját lezárjuk,
+        # különben az író szál a kérés zárára várna, a kérés pedig az író szálra
+        db.session.commit()
+        return _write_queue.submit(fn, args)
+    try:
+        eredmeny = fn(*args)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return eredmeny
 
 def load_meta_defaults():
     """
@@ -128,7 +840,16 @@ def load_meta_defaults():
     mezok = ["Azonosító"] + [m for m in mezok if m != "Azonosító"]
     return {"mezok": mezok, "listak": listak}
 
-def load_meta():
+def _tanult_meta() -> bool:
+    """Igaz, ha nincs érdemi mentett mezőlista, vagyis a meta az adatokból tanult alapérték."""
+    m1 = MetaKV.query.get("mezok")
+    try:
+        mezok = json.loads(m1.value) if m1 and m1.value else []
+    except ValueError:
+        mezok = []
+    return not [x for x in mezok if x != "Azonosító"]
+
+def _load_meta_uncached():
     """
     Mentett meta beolvasása. Ha nincs, vagy csak 'Azonosító' lenne,
     használjuk az alapértékeket (DEFAULT_FIELDS/DEFAULT_LISTS),
@@ -163,17 +884,47 @@ def load_meta():
 
     return out
 
-def save_meta(mezok, listak):
+# workerenkénti meta gyorsítótár: (meta_ver, meta)
+_meta_cache = {"ver": None, "meta": None}
+meta_cache_stats = {"hit": 0, "miss": 0}
+
+def load_meta():
+    """
+    Meta a gyorsítótárból; egy olcsó verzió-lekérdezéssel ellenőrzi, hogy
+    másik worker (save_meta, /update) nem léptette-e azóta a verziót.
+    """
+    try:
+        ver = read_counter(META_VER_KEY)
+    except Exception:
+        ver = None
+    if ver is not None and _meta_cache["ver"] == ver:
+        meta_cache_stats["hit"] += 1
+        return copy.deepcopy(_meta_cache["meta"])
+    meta_cache_stats["miss"] += 1
+    out = _load_meta_uncached()
+    if ver is not None:
+        _meta_cache["ver"], _meta_cache["meta"] = ver, copy.deepcopy(out)
+    return out
+
+def _write_meta(mezok, listak):
+    """Meta írása + verzió léptetése a futó tranzakcióban (commit nélkül)."""
     m1 = MetaKV.query.get("mezok") or MetaKV(key="mezok")
     m2 = MetaKV.query.get("listak") or MetaKV(key="listak")
     m1.value = json.dumps(mezok, ensure_ascii=False)
     m2.value = json.dumps(listak, ensure_ascii=False)
-    db.session.add(m1); db.session.add(m2); db.session.commit()
+    db.session.add(m1); db.session.add(m2)
+    bump_counter(META_VER_KEY)
+
+def save_meta(mezok, listak):
+    _write_meta(mezok, listak)
+    db.session.commit()
 
 # -------------------- Meta endpointok --------------------
 @app.get("/meta")
 def meta_get():
-    return jsonify(load_meta())
+    """Mezők + legördülők; ETag a meta verzióból (If-None-Match → 304)."""
+    etag = version_etag("meta", read_counter(META_VER_KEY))
+    return not_modified(etag) or with_etag(jsonify(load_meta()), etag)
 
 @app.post("/meta")
 def meta_post():
@@ -185,31 +936,411 @@ def meta_post():
     save_meta(mezok, listak)
     return jsonify({"ok": True})
 
+# -------------------- Mező átnevezés / törlés (adatbázison belül) --------------------
+FIELD_CHUNK = 2000   # ennyi id-tartomány megy egy UPDATE-be (a tranzakció egy)
+
+def _field_sql(dialect: str, uj):
+    """
+    UPDATE, ami az adat.data JSON-ban átnevezi (uj != None) vagy törli a :regi kulcsot.
+    Csak a kulcsot tartalmazó sorokat írja; átnevezésnél a már :uj kulccsal is rendelkező
+    sorokhoz nem nyúl (nem írjuk felül). A törölt sorok tartalma is átíródik (visszaállításkor
+    már az új név jön vissza), de a revíziójuk marad: a kliensek nem töltik le őket újra.
+    """
+    where = "WHERE id > :lo AND id <= :hi AND "
+    rev = "rev = CASE WHEN deleted = 0 THEN :rev ELSE rev END"
+    if dialect == "postgresql":
+        doc = "CAST(data AS jsonb)"
+        if uj is None:
+            expr = f"{doc} - :regi"
+        else:
+            expr = f"({doc} - :regi) || jsonb_build_object(:uj, {doc} -> :regi)"
+            where += f"NOT jsonb_exists({doc}, :uj) AND "
+        return f"UPDATE adat SET data = CAST({expr} AS text), {rev} {where}jsonb_exists({doc}, :regi)"
+    where += "json_valid(data) AND "
+    if uj is None:
+        expr = "json_remove(data, :p_regi)"
+    else:
+        expr = "json_set(json_remove(data, :p_regi), :p_uj, json_extract(data, :p_regi))"
+        where += "json_type(data, :p_uj) IS NULL AND "
+    return f"UPDATE adat SET data = {expr}, {rev} {where}json_type(data, :p_regi) IS NOT NULL"
+
+def rename_or_drop_field(regi: str, uj=None) -> int:
+    """
+    JSON kulcs átnevezése/törlése minden adat soron, id-tartományonként külön UPDATE-tel,
+    de egyetlen tranzakcióban a meta (mezok/listak) írásával együtt: hiba esetén semmi
+    sem változik (nincs félig átnevezett állapot). Visszaadja a módosított sorok számát.
+    """
+    meta = load_meta()
+    mezok = [m for m in meta["mezok"] if m != regi] if uj is None else [uj if m == regi else m for m in meta["mezok"]]
+    listak = dict(meta["listak"])
+    if regi in listak:
+        vals = listak.pop(regi)
+        if uj is not None:
+            listak[uj] = vals
+
+    sql = text(_field_sql(db.engine.dialect.name, uj))
+    params = {"regi": regi, "uj": uj, "p_regi": '$."' + regi + '"', "p_uj": '$."' + (uj or "") + '"'}
+    lo, hi = db.session.query(func.min(Adat.id), func.max(Adat.id)).one()
+    bounds = list(range((lo or 1) - 1, hi or 0, FIELD_CHUNK)) or [0]
+
+    try:
+        rev = bump_data_rev()
+        cnt = 0
+        for start in bounds:
+            cnt += db.session.execute(sql, dict(params, lo=start, hi=start + FIELD_CHUNK, rev=rev)).rowcount
+        _write_meta(mezok, listak)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return cnt
+
+def _field_conflict(regi: str, uj: str) -> bool:
+    """Van-e olyan sor, amelyben a régi és az új kulcs is szerepel (átnevezésnél felülírnánk)."""
+    if db.engine.dialect.name == "postgresql":
+        sql = "SELECT 1 FROM adat WHERE jsonb_exists(CAST(data AS jsonb), :regi) AND jsonb_exists(CAST(data AS jsonb), :uj) LIMIT 1"
+    else:
+        sql = ("SELECT 1 FROM adat WHERE json_valid(data) AND json_type(data, :p_regi) IS NOT NULL "
+               "AND json_type(data, :p_uj) IS NOT NULL LIMIT 1")
+    params = {"regi": regi, "uj": uj, "p_regi": '$."' + regi + '"', "p_uj": '$."' + uj + '"'}
+    return db.session.execute(text(sql), params).first() is not None
+
+def _field_name_error(name):
+    if not isinstance(name, str) or not name.strip():
+        return "Adj meg mezőnevet."
+    if name == "Azonosító":
+        return "Az 'Azonosító' mező nem módosítható."
+    if '"' in name or "\\" in name:
+        return "A mezőnév nem tartalmazhat idézőjelet vagy visszaperjelet."
+    return None
+
+@app.post("/field/rename")
+def field_rename():
+    """Mező átnevezése az összes soron és a metában: {"regi": "...", "uj": "..."}"""
+    payload = request.get_json(force=True, silent=True) or {}
+    regi, uj = payload.get("regi"), payload.get("uj")
+    err = _field_name_error(regi) or _field_name_error(uj)
+    if not err and (regi == uj or uj in load_meta()["mezok"]):
+        err = "Már létezik ilyen mező!"
+    if err:
+        return jsonify({"ok": False, "error": err}), 400
+    if _field_conflict(regi, uj):
+        return jsonify({"ok": False, "error": f"Van olyan sor, amelyben '{uj}' már szerepel."}), 409
+    cnt = rename_or_drop_field(regi, uj)
+    return jsonify({"ok": True, "updated": cnt, "rev": read_counter(DATA_REV_KEY)})
+
+@app.post("/field/drop")
+def field_drop():
+    """Mező törlése az összes sorból és a metából: {"mezo": "..."}"""
+    payload = request.get_json(force=True, silent=True) or {}
+    mezo = payload.get("mezo")
+    err = _field_name_error(mezo)
+    if err:
+        return jsonify({"ok": False, "error": err}), 400
+    cnt = rename_or_drop_field(mezo)
+    return jsonify({"ok": True, "updated": cnt, "rev": read_counter(DATA_REV_KEY)})
+
 # -------------------- Adat endpointok --------------------
+STREAM_CHUNK = 1000          # ennyi sort olvasunk egyszerre (yield_per / szerveroldali kurzor)
+STREAM_BUF = 64 * 1024       # kb. ekkora darabokban írunk a válaszba
+
+def _json_ervenyes_sql():
+    """
+    SQL kifejezés: érvényes JSON-e a data oszlop (lásd _json_valid_sql).
+    None, ha a dialektus ezt nem tudja olcsón; ilyenkor a sort Pythonban ellenőrizzük.
+    """
+    sql = _json_valid_sql(db.engine.dialect)
+    return literal_column(sql) if sql else None
+
+def _data_query(since, delta, ervenyes=False):
+    """
+    (azonosito, data, deleted) sorok id szerint: delta esetén rev > since, különben az aktívak.
+    ervenyes=True: negyedik oszlopként a data érvényessége (lásd _json_ervenyes_sql; None, ha nincs).
+    """
+    q = db.session.query(Adat.azonosito, Adat.data, Adat.deleted)
+    if ervenyes:
+        expr = _json_ervenyes_sql()
+        q = q.add_columns(expr if expr is not None else literal_column("NULL"))
+    q = q.filter(Adat.rev > since) if delta else q.filter(Adat.deleted == 0)
+    return q.order_by(Adat.id)
+
+def _row_json(azonosito, data, ervenyes=None) -> str:
+    """
+    A tárolt JSON szöveg változatlanul (json.loads/dumps nélkül);
+    ha az Azonosító hiányzik belőle, elé fűzzük. A hibás (pl. csonka) sor a nem
+    streamelt válaszhoz hasonlóan csak az Azonosítót kapja, hogy a dokumentum ép maradjon.
+    ervenyes: az SQL-ből kapott érvényesség; None esetén json.loads dönt.
+    """
+    data = (data or "").strip()
+    if ervenyes is None and data.startswith("{"):
+        try:
+            json.loads(data)
+            ervenyes = True
+        except ValueError:
+            ervenyes = False
+    if not data.startswith("{") or data == "{}" or not ervenyes:
+        return json.dumps({"Azonosító": azonosito or ""}, ensure_ascii=False)
+    if '"Azonosító"' in data or '"Azonos\\u00edt\\u00f3"' in data:
+        return data
+    return '{"Azonosító": ' + json.dumps(azonosito or "", ensure_ascii=False) + ", " + data[1:]
+
+def _iter_data_json(head: dict, since, delta):
+    """A /data válasz darabokban: fej, majd a sorok közvetlenül a tárolt szövegből."""
+    yield json.dumps(head, ensure_ascii=False)[:-1] + ', "adatok": ['
+    buf, size, first, torolt = [], 0, True, []
+    for az, data, deleted, ervenyes in _data_query(since, delta, ervenyes=True).yield_per(STREAM_CHUNK):
+        if deleted:
+            torolt.append(az)
+            continue
+        piece = _row_json(az, data, ervenyes) if first else "," + _row_json(az, data, ervenyes)
+        first = False
+        buf.append(piece); size += len(piece)
+        if size >= STREAM_BUF:
+            yield "".join(buf)
+            buf, size = [], 0
+    buf.append("]")
+    if delta:
+        buf.append(', "torolt": ' + json.dumps(torolt, ensure_ascii=False))
+    buf.append("}")
+    yield "".join(buf)
+
+def _gzip_iter(chunks):
+    z = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for c in chunks:
+        out = z.compress(c.encode("utf-8"))
+        if out:
+            yield out
+    yield z.flush()
+
+PAGE_MAX = 5000
+PAGE_PARAMS = {"since", "stream", "limit", "after", "sort", "count"}
+
+def _encode_cursor(vals) -> str:
+    return base64.urlsafe_b64encode(json.dumps(vals, ensure_ascii=False).encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(cur: str):
+    return json.loads(base64.urlsafe_b64decode(cur + "=" * (-len(cur) % 4)).decode("utf-8"))
+
+def _field_filter(expr, val: str, dialect: str = None):
+    """
+    Egyenlőség; '*' végű érték esetén előtag-egyezés (LIKE 'x%').
+    Postgresen a ->> mindig szöveget ad (a számként tárolt 12345 is '12345'), ott csak
+    szövegesen hasonlítunk; SQLite-on a json_extract számot ad vissza, ott mindkettő kell.
+    """
+    if val.endswith("*"):
+        pre = val[:-1].replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return expr.like(pre + "%", escape="\\")
+    if (dialect or db.engine.dialect.name) != "sqlite":
+        return expr == val
+    try:
+        num = json.loads(val)
+    except Exception:
+        num = None
+    if isinstance(num, (int, float)) and not isinstance(num, bool):
+        return or_(expr == val, expr == num)  # a JSON-ben számként tárolt értékek (pl. Sorszám)
+    return expr == val
+
+# --- Tömör formátum (wire.py): MessagePack, oszlopos sorok; gzip-elt kérés törzsek ---
+UPDATE_MAX_BYTES = int(os.environ.get("UPDATE_MAX_BYTES", 256 * 1024 * 1024))  # kicsomagolt törzs felső korlátja
+GZIP_MIN = 1024   # ennél kisebb válaszokat nem tömörítünk
+
+def _msgpack_kert() -> bool:
+    """A kliens a MessagePack-et jobban szereti a JSON-nál (Accept), és a szerveren is elérhető."""
+    return wire.elerheto() and request.accept_mimetypes.best_match(["application/json", wire.MSGPACK]) == wire.MSGPACK
+
+def _formatumok(resp):
+    """
+    Mit fogad el a szerver a kérés törzsben: Accept-Encoding válaszfejléc (RFC 7694)
+    és Accept-Post. A kliens csak ezek láttán küld gzip-elt / msgpack törzset.
+    """
+    resp.headers["Accept-Encoding"] = "gzip"
+    resp.headers["Accept-Post"] = "application/json, " + wire.MSGPACK if wire.elerheto() else "application/json"
+    return resp
+
+def _msgpack_valasz(out: dict):
+    body = wire.kodol(out)
+    resp = Response(body, mimetype=wire.MSGPACK, headers={"Vary": "Accept, Accept-Encoding"})
+    if request.accept_encodings["gzip"] and len(body) >= GZIP_MIN:
+        resp.set_data(gzip.compress(body, compresslevel=6))
+        resp.headers["Content-Encoding"] = "gzip"
+    return resp
+
+def _request_payload():
+    """
+    A kérés törzse dict-ként: JSON vagy MessagePack (Content-Type szerint),
+    Content-Encoding: gzip esetén kicsomagolva (legfeljebb UPDATE_MAX_BYTES).
+    (payload, None) vagy (None, hibaválasz).
+    """
+    enc = (request.headers.get("Content-Encoding") or "").strip().lower()
+    if enc not in ("", "identity", "gzip"):
+        return None, (jsonify({"ok": False, "error": f"Nem támogatott Content-Encoding: {enc}"}), 415)
+    msgpack_body = request.mimetype == wire.MSGPACK
+    if msgpack_body and not wire.elerheto():
+        return None, (jsonify({"ok": False, "error": "A szerveren nincs msgpack (pip install msgpack)."}), 415)
+    if enc != "gzip" and not msgpack_body:
+        return request.get_json(force=True, silent=True) or {}, None
+
+    raw = request.get_data(cache=False)
+    if enc == "gzip":
+        d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            raw = d.decompress(raw, UPDATE_MAX_BYTES)
+        except zlib.error:
+            return None, (jsonify({"ok": False, "error": "Hibás gzip törzs."}), 400)
+        if d.unconsumed_tail:
+            return None, (jsonify({"ok": False, "error": "Túl nagy kérés törzs."}), 413)
+    try:
+        payload = wire.dekodol(raw) if msgpack_body else json.loads(raw.decode("utf-8"))
+    except Exception:
+        payload = None
+    return (payload if isinstance(payload, dict) else {}), None
+
+def _data_page(meta, rev):
+    """
+    Lapozott lekérdezés (keyset): ?limit=N&after=<cursor>&sort=[-]Mező&count=1,
+    szűrés mezőnév szerint: ?Hely=Raktár A (egyenlőség), ?Beszállító=Besz* (előtag).
+    Kiemelt mezőn (PROMOTED_FIELDS, pl. ?Fémzárszám=FZ-123) az egyenlőség index-keresés.
+    A szűrés és rendezés az adatbázisban fut; csak aktív sorok.
+    """
+    try:
+        limit = max(1, min(int(request.args.get("limit", 100)), PAGE_MAX))
+    except ValueError:
+        return jsonify({"ok": False, "error": "Hibás 'limit'."}), 400
+
+    q = db.session.query(Adat.id, Adat.azonosito, Adat.data).filter(Adat.deleted == 0)
+    try:
+        for key in request.args:
+            if key in PAGE_PARAMS:
+                continue
+            if key not in meta["mezok"]:
+                return jsonify({"ok": False, "error": f"Ismeretlen mező: {key}"}), 400
+            expr = json_field(key)
+            vals = request.args.getlist(key)
+            q = q.filter(or_(*[_field_filter(expr, v) for v in vals]))
+
+        sort = request.args.get("sort") or ""
+        desc = sort.startswith("-")
+        sort = sort.lstrip("-")
+        if sort and sort not in meta["mezok"]:
+            return jsonify({"ok": False, "error": f"Ismeretlen rendezési mező: {sort}"}), 400
+        skey = func.coalesce(json_field(sort), "") if sort else None
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    total = q.count() if request.args.get("count") == "1" else None
+
+    after = request.args.get("after")
+    if after:
+        try:
+            cur = _decode_cursor(after)
+            if skey is None:
+                q = q.filter(Adat.id > int(cur[0]))
+            elif desc:
+                q = q.filter(or_(skey < cur[0], and_(skey == cur[0], Adat.id < int(cur[1]))))
+            else:
+                q = q.filter(or_(skey > cur[0], and_(skey == cur[0], Adat.id > int(cur[1]))))
+        except Exception:
+            return jsonify({"ok": False, "error": "Hibás 'after' cursor."}), 400
+
+    if skey is None:
+        q = q.add_columns(literal_column("NULL")).order_by(Adat.id)
+    elif desc:
+        q = q.add_columns(skey).order_by(skey.desc(), Adat.id.desc())
+    else:
+        q = q.add_columns(skey).order_by(skey, Adat.id)
+
+    res = q.limit(limit + 1).all()
+    more = len(res) > limit
+    rows = []
+    for rid, az, data, sval in res[:limit]:
+        try:
+            rec = json.loads(data or "{}")
+        except Exception:
+            rec = {}
+        rec.setdefault("Azonosító", az or "")
+        rows.append(rec)
+    nxt = None
+    if more:
+        rid, sval = res[limit - 1][0], res[limit - 1][3]
+        nxt = _encode_cursor([rid] if skey is None else [sval, rid])
+    out = {"mezok": meta["mezok"], "listak": meta["listak"], "adatok": rows, "rev": rev, "next": nxt}
+    if total is not None:
+        out["total"] = total
+    return jsonify(out)
+
 @app.get("/data")
 def data_get():
-    """Aktív sorok + meta JSON-ben (desktop app ezt hívja)."""
+    """
+    Aktív sorok + meta JSON-ben (desktop app ezt hívja).
+    ?since=<rev>: csak az azóta módosult sorok ('adatok') és az azóta
+    törölt azonosítók ('torolt'); 'rev' az új high-water mark.
+    ?stream=1: darabolt olvasás és streamelt (igény szerint gzip-elt) válasz,
+    a memóriahasználat nem nő a sorok számával.
+    ?limit=N: lapozott, szűrt, rendezett lekérdezés (lásd _data_page).
+    Accept: application/x-msgpack → tömör, oszlopos MessagePack (wire.py), gzip-pel,
+    ha a kliens elfogadja (a teljes és a delta válaszra; stream/limit mellett JSON).
+    ETag: data_rev + meta_ver + a paraméterek a 'since' nélkül + formátum. Egy adott
+    URL-en a válasz csak ezektől függ; így a legutóbbi válasz ETag-jével küldött
+    ?since=<rev> kérés 304-et kap, ha azóta semmi sem változott (sorok olvasása nélkül).
+    """
+    since = request.args.get("since", type=int)
+    # a számlálót a sorok ELŐTT olvassuk: ami közben commitol, az legfeljebb kétszer jön, kimaradni nem marad ki
+    rev = read_counter(DATA_REV_KEY)
+    delta = bool(since and 0 < since <= rev)
+    stream = request.args.get("stream") == "1"
+    mp = not stream and "limit" not in request.args and _msgpack_kert()
+    gz = (stream or mp) and bool(request.accept_encodings["gzip"])
+    params = sorted((k, v) for k, v in request.args.items(multi=True) if k != "since")
+    etag = version_etag("data", rev, read_counter(META_VER_KEY), params, gz, mp)
+    resp = not_modified(etag)
+    if resp is not None:
+        return resp
     meta = load_meta()
-    rows = []
-    for a in Adat.query.filter_by(deleted=0).all():
+
+    if "limit" in request.args:
+        return with_etag(_data_page(meta, rev), etag)
+
+    if stream:
+        head = {"mezok": meta["mezok"], "listak": meta["listak"], "rev": rev, "delta": delta}
+        chunks = _iter_data_json(head, since, delta)
+        headers = {"Vary": "Accept-Encoding"}
+        if gz:
+            chunks = _gzip_iter(chunks)
+            headers["Content-Encoding"] = "gzip"
+        return with_etag(_formatumok(Response(stream_with_context(chunks), mimetype="application/json", headers=headers)), etag)
+
+    rows, torolt = [], []
+    for az, data, deleted in _data_query(since, delta):
+        if deleted:
+            torolt.append(az)
+            continue
         try:
-            rec = json.loads(a.data or "{}")
+            rec = json.loads(data or "{}")
         except Exception:
             rec = {}
-        rec.setdefault("Azonosító", a.azonosito or "")
+        rec.setdefault("Azonosító", az or "")
         rows.append(rec)
-    return jsonify({"mezok": meta["mezok"], "listak": meta["listak"], "adatok": rows})
+
+    out = {"mezok": meta["mezok"], "listak": meta["listak"], "adatok": rows, "rev": rev, "delta": delta}
+    if delta:
+        out["torolt"] = torolt
+    return with_etag(_formatumok(_msgpack_valasz(out) if mp else jsonify(out)), etag)
 
 @app.post("/update")
 def data_update():
     """
     Desktop szinkron / upsert.
     Body: {"mezok":[...], "listak":{...}, "adatok":[{...}, ...]}
+    (JSON, vagy Content-Type: application/x-msgpack oszlopos sorokkal; gzip-elve is).
     - mezok/listak mentése (ha megadva),
     - adatok upsert Azonosító szerint (üres rekordokat kihagyjuk),
+      tömegesen: darabolt IN (...) lekérdezés + INSERT ... ON CONFLICT,
+    - Sorszám kiosztás a szerveren; az újonnan kiosztottak a 'sorszamok'-ban,
     - törlés NEM történik itt (ahhoz /delete).
     """
-    payload = request.get_json(force=True, silent=True) or {}
+    payload, hiba = _request_payload()
+    if hiba:
+        return hiba
     mezok = payload.get("mezok")
     listak = payload.get("listak")
     adatok = payload.get("adatok", [])
@@ -217,26 +1348,9 @@ def data_update():
     if isinstance(mezok, list) and isinstance(listak, dict):
         save_meta(mezok, listak)
 
-    upserted = 0
-    for rec in adatok:
-        if not isinstance(rec, dict):
-            continue
-        if is_all_empty_except_id(rec):
-            continue
-
-        az = (rec.get("Azonosító") or "").strip() or gen_id()
-        rec["Azonosító"] = az
-
-        row = Adat.query.filter_by(azonosito=az).first()
-        if row:
-            row.data = json.dumps(rec, ensure_ascii=False)
-            row.deleted = 0
-        else:
-            db.session.add(Adat(azonosito=az, data=json.dumps(rec, ensure_ascii=False), deleted=0))
-        upserted += 1
-
-    db.session.commit()
-    return jsonify({"ok": True, "upserted": upserted})
+    kiosztott = {}
+    upserted = upsert_records(adatok if isinstance(adatok, list) else [], kiosztott)
+    return _formatumok(jsonify({"ok": True, "upserted": upserted, "sorszamok": kiosztott}))
 
 @app.post("/delete")
 def delete_bulk():
@@ -248,26 +1362,134 @@ def delete_bulk():
     ids = payload.get("azonositok", [])
     if not isinstance(ids, list):
         return jsonify({"ok": False, "error": "Adj meg 'azonositok' listát."}), 400
-    cnt = 0
-    for az in ids:
-        row = Adat.query.filter_by(azonosito=str(az)).first()
-        if row and row.deleted != 1:
-            row.deleted = 1
-            cnt += 1
-    db.session.commit()
+    cnt = set_deleted(ids, 1)
     return jsonify({"ok": True, "deleted": cnt})
 
+@app.post("/restore")
+def restore_bulk():
+    """
+    Soft delete visszavonása: {"azonositok": ["ID1","ID2",...]}
+    """
+    payload = request.get_json(force=True, silent=True) or {}
+    ids = payload.get("azonositok", [])
+    if not isinstance(ids, list):
+        return jsonify({"ok": False, "error": "Adj meg 'azonositok' listát."}), 400
+    return jsonify({"ok": True, "restored": set_deleted(ids, 0)})
+
 @app.post("/delete/<azonosito>")
 def delete_one(azonosito):
-    row = Adat.query.filter_by(azonosito=azonosito).first()
-    if not row:
+    if not db.session.query(Adat.id).filter_by(azonosito=azonosito).first():
         abort(404)
-    row.deleted = 1
-    db.session.commit()
+    set_deleted([azonosito], 1)   # már törölt sornál nincs új revízió
     if request.is_json or request.headers.get("Accept","").startswith("application/json"):
         return jsonify({"ok": True})
     return redirect(url_for("qr_page"))
 
+# -------------------- Teljes szöveges keresés --------------------
+SEARCH_MAX = 500          # legfeljebb ennyi találat egy lapon
+SEARCH_SZO_MAX = 10       # ennyi szóig vesszük figyelembe a keresést
+SEARCH_RANG_MAX = 5000    # efölött nem rangsorolunk (bm25/ts_rank minden találatra fut): a legújabbak jönnek előre
+_fts = {}                 # dialektus → van-e teljes szöveges index (első kereséskor nézzük meg)
+
+def _kereso_szavak(q: str) -> list:
+    return q.replace('"', " ").split()[:SEARCH_SZO_MAX]
+
+def _fts_van() -> bool:
+    dialect = db.engine.dialect.name
+    if dialect not in _fts:
+        if dialect == "sqlite":
+            sql = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'adat_fts'"
+        elif dialect == "postgresql":
+            sql = "SELECT 1 FROM information_schema.columns WHERE table_name = 'adat' AND column_name = 'kereso'"
+        else:
+            sql = None
+        _fts[dialect] = bool(sql and db.session.execute(text(sql)).first())
+    return _fts[dialect]
+
+def _kereses_sql(szavak, dialect):
+    """
+    (találatok SQL, darabszám SQL, paraméterek) a dialektus szerint, vagy None, ha nincs
+    kereshető szó. Minden szó előtag-egyezés, ÉS kapcsolattal. A találatok SQL-ben
+    {rendez}: relevancia vagy a legújabbak elöl.
+    """
+    if dialect == "sqlite":
+        # minden szó idézett kifejezés + '*': a felhasználó szövege nem lehet FTS5 szintaxis.
+        # Az index csak aktív sorokat tartalmaz (a triggerek gondoskodnak róla).
+        args = {"q": " ".join('"' + w + '"*' for w in szavak)}
+        return (
+            "SELECT a.azonosito, snippet(adat_fts, 0, '[', ']', '…', 12), -bm25(adat_fts) "
+            "FROM adat_fts JOIN adat a ON a.id = adat_fts.rowid "
+            "WHERE adat_fts MATCH :q ORDER BY {rendez} LIMIT :n OFFSET :o",
+            "SELECT COUNT(*) FROM adat_fts WHERE adat_fts MATCH :q",
+            args,
+            {"relevancia": "rank, adat_fts.rowid", "legujabb": "adat_fts.rowid DESC"},
+        )
+    # Postgres: a szavak betű/szám darabjai előtagként (így nincs tsquery szintaxis hiba)
+    darabok = [d for w in szavak for d in re.findall(r"\w+", w)]
+    if not darabok:
+        return None
+    args = {"q": " & ".join(d + ":*" for d in darabok)}
+    tsq = "to_tsquery('simple', qr_unaccent(:q))"
+    return (
+        f"SELECT azonosito, ts_headline('simple', qr_kereso_szoveg(data), {tsq}, "
+        f"'StartSel=[, StopSel=], MaxWords=12, MinWords=4'), ts_rank(kereso, {tsq}) AS pont "
+        f"FROM adat WHERE deleted = 0 AND kereso @@ {tsq} ORDER BY {{rendez}} LIMIT :n OFFSET :o",
+        f"SELECT COUNT(*) FROM adat WHERE deleted = 0 AND kereso @@ {tsq}",
+        args,
+        {"relevancia": "pont DESC, id", "legujabb": "id DESC"},
+    )
+
+def _kereses_like(szavak, limit, offset):
+    """Index nélküli tartalék (FTS5 nélküli SQLite, egyéb adatbázis): részszöveg minden szóra, legújabbak elöl."""
+    q = db.session.query(Adat.azonosito).filter(Adat.deleted == 0)
+    for w in szavak:
+        w = w.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        q = q.filter(Adat.data.like("%" + w + "%", escape="\\"))
+    rows = [(az, None, None) for (az,) in q.order_by(Adat.id.desc()).offset(offset).limit(limit + 1)]
+    return rows, q.count()
+
+@app.get("/search")
+def search():
+    """
+    Keresés az aktív sorok összes mezőértékében: ?q=szavak&limit=50&offset=0.
+    Minden szóra előtag-egyezés, ékezet- és kisbetű-függetlenül. Relevancia szerint
+    rendez (SQLite: bm25, Postgres: ts_rank); nagyon sok találatnál (SEARCH_RANG_MAX)
+    a legújabbak jönnek előre. Válasz: azonosítók + kiemelt részlet ([...] között
+    a találat), 'total', 'rendezes' és 'next' (a következő lap offsetje).
+    """
+    szavak = _kereso_szavak(request.args.get("q", ""))
+    if not szavak:
+        return jsonify({"ok": False, "error": "Adj meg keresett szöveget ('q')."}), 400
+    try:
+        limit = max(1, min(int(request.args.get("limit", 50)), SEARCH_MAX))
+        offset = max(0, int(request.args.get("offset", 0)))
+    except ValueError:
+        return jsonify({"ok": False, "error": "Hibás 'limit' vagy 'offset'."}), 400
+
+    rendezes = "legujabb"
+    if not _fts_van():
+        rows, total = _kereses_like(szavak, limit, offset)
+    else:
+        sqls = _kereses_sql(szavak, db.engine.dialect.name)
+        if sqls is None:
+            rows, total = [], 0
+        else:
+            sql, count_sql, args, sorrend = sqls
+            # a darabszám olcsó (csak az index); a rangsor az összes találatra számolódik
+            total = db.session.execute(text(count_sql), args).scalar() or 0
+            if total <= SEARCH_RANG_MAX:
+                rendezes = "relevancia"
+            sql = sql.format(rendez=sorrend[rendezes])
+            rows = db.session.execute(text(sql), dict(args, n=limit + 1, o=offset)).fetchall() if total else []
+
+    return jsonify({
+        "ok": True,
+        "talalatok": [{"azonosito": az, "reszlet": reszlet, "pont": pont} for az, reszlet, pont in rows[:limit]],
+        "total": total,
+        "rendezes": rendezes,
+        "next": offset + limit if len(rows) > limit else None,
+    })
+
 # -------------------- QR / Edit oldalak --------------------
 @app.route("/qr", methods=["GET", "POST"])
 def qr_page():
@@ -294,13 +1516,7 @@ def qr_page():
             msg = "Nem jött létre tétel: nem adtál meg adatot."
             return render_template("qr.html", mezok=meta["mezok"], listak=meta["listak"], created=None, msg=msg)
 
-        row = Adat.query.filter_by(azonosito=az).first()
-        if row:
-            row.data = json.dumps(rec, ensure_ascii=False)
-            row.deleted = 0
-        else:
-            db.session.add(Adat(azonosito=az, data=json.dumps(rec, ensure_ascii=False), deleted=0))
-        db.session.commit()
+        submit_write(upsert_records, [rec], None, False)
         created = az
 
     return render_template("qr.html", mezok=meta["mezok"], listak=meta["listak"], created=created, msg=msg)
@@ -324,8 +1540,7 @@ def edit_row(azonosito):
     if request.method == "POST":
         # Törlés?
         if request.form.get("delete") == "1":
-            row.deleted = 1
-            db.session.commit()
+            set_deleted([azonosito], 1)
             return redirect(url_for("qr_page"))
 
         # Mentés
@@ -337,44 +1552,399 @@ def edit_row(azonosito):
                 new_rec[f] = request.form.get(f, "")
 
         if is_all_empty_except_id(new_rec):
-            row.deleted = 1
+            set_deleted([azonosito], 1)
         else:
-            row.data = json.dumps(new_rec, ensure_ascii=False)
-            row.deleted = 0
-        db.session.commit()
+            submit_write(upsert_records, [new_rec], None, False)
         return redirect(url_for("edit_row", azonosito=azonosito))
 
     return render_template("edit.html", rec=rec, mezok=meta["mezok"], listak=meta["listak"], azonosito=azonosito)
 
+# -------------------- QR kép gyorsítótár --------------------
+QR_CACHE_SIZE = int(os.environ.get("QR_CACHE_SIZE", "512"))   # memóriában tartott PNG-k száma (LRU)
+QR_CACHE_DIR = os.environ.get("QR_CACHE_DIR")                  # opcionális lemezes cache könyvtár
+QR_CACHE_DIR_MAX = int(os.environ.get("QR_CACHE_DIR_MAX", "20000"))   # ennyi PNG marad a lemezen (a legrégebbiek törlődnek)
+QR_RENDER_VER = "2"   # renderelési paraméterek változásakor léptetni (cache kulcs és ETag része)
+QR_MAX_AGE = 365 * 24 * 3600
+
+_qr_cache = OrderedDict()
+_qr_lock = threading.Lock()
+qr_cache_stats = {"hit": 0, "disk_hit": 0, "miss": 0, "not_modified": 0}
+_qr_disk_writes = 0
+
+def _qr_key(edit_url: str) -> str:
+    """A kép csak az edit URL-től (azonosító + külső alap URL) és a render verziótól függ."""
+    return hashlib.sha1(f"{QR_RENDER_VER}|{edit_url}".encode("utf-8")).hexdigest()
+
+def _qr_cache_get(key: str):
+    with _qr_lock:
+        png = _qr_cache.get(key)
+        if png is not None:
+            _qr_cache.move_to_end(key)
+            qr_cache_stats["hit"] += 1
+            return png
+    if QR_CACHE_DIR:
+        path = os.path.join(QR_CACHE_DIR, key + ".png")
+        try:
+            with open(path, "rb") as f:
+                png = f.read()
+            os.utime(path)   # LRU: a takarítás a legrégebben használtakat viszi
+        except OSError:
+            return None
+        _qr_cache_put(key, png, disk=False)
+        with _qr_lock:
+            qr_cache_stats["disk_hit"] += 1
+        return png
+    return None
+
+def _qr_disk_prune():
+    """A legrégebben használt PNG-k törlése, hogy legfeljebb QR_CACHE_DIR_MAX maradjon."""
+    try:
+        files = [e for e in os.scandir(QR_CACHE_DIR) if e.name.endswith(".png")]
+        files.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+        for e in files[QR_CACHE_DIR_MAX:]:
+            os.remove(e.path)
+    except OSError as e:
+        app.logger.warning("QR lemezes cache takarítás sikertelen: %s", e)
+
+def _qr_cache_put(key: str, png: bytes, disk: bool = True):
+    global _qr_disk_writes
+    with _qr_lock:
+        _qr_cache[key] = png
+        _qr_cache.move_to_end(key)
+        while len(_qr_cache) > QR_CACHE_SIZE:
+            _qr_cache.popitem(last=False)
+    if disk and QR_CACHE_DIR:
+        try:
+            os.makedirs(QR_CACHE_DIR, exist_ok=True)
+            path = os.path.join(QR_CACHE_DIR, key + ".png")
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(png)
+            os.replace(tmp, path)
+        except OSError as e:
+            app.logger.warning("QR lemezes cache írás sikertelen: %s", e)
+            return
+        # a könyvtár bejárása nem olcsó: csak minden ~tizedik korlátnyi írás után takarítunk
+        with _qr_lock:
+            _qr_disk_writes += 1
+            takarit = _qr_disk_writes % max(1, QR_CACHE_DIR_MAX // 10) == 0
+        if takarit:
+            _qr_disk_prune()
+
 @app.route("/qrimg/<azonosito>.png")
 def qr_image(azonosito):
-    """PNG QR a /edit/<azonosito> linkre."""
+    """PNG QR a /edit/<azonosito> linkre (LRU + opcionális lemezes cache, ETag/304)."""
+    edit_url = url_for("edit_row", azonosito=azonosito, _external=True)
+    key = _qr_key(edit_url)
+    headers = {"Cache-Control": f"public, max-age={QR_MAX_AGE}"}
+
+    if request.if_none_match.contains(key):
+        with _qr_lock:
+            qr_cache_stats["not_modified"] += 1
+        resp = Response(status=304, headers=headers)
+        resp.set_etag(key)
+        return resp
+
+    png = _qr_cache_get(key)
+    if png is None:
+        try:
+            import qr_raster
+        except Exception:
+            abort(500, "qrcode/numpy csomag nincs telepítve (pip install qrcode Pillow numpy)")
+        png = qr_raster.png_bytes(qr_raster.qr_matrix(edit_url, border=2), module_px=10)   # 1 bites PNG
+        _qr_cache_put(key, png)
+        with _qr_lock:
+            qr_cache_stats["miss"] += 1
+
+    resp = Response(png, mimetype="image/png", headers=headers)
+    resp.set_etag(key)
+    return resp
+
+# -------------------- Címke PDF (A4, N×M rács) --------------------
+LABEL_CACHE_DIR = os.environ.get("LABEL_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "qr_label_cache")
+LABEL_CACHE_MAX = int(os.environ.get("LABEL_CACHE_MAX", "50"))   # ennyi PDF marad a lemezen (a legrégebbiek törlődnek)
+LABEL_MAX_GRID = 10      # oszlopok/sorok felső korlátja
+LABEL_MAX_IDS = 20000    # egy kérésben legfeljebb ennyi címke
+LABEL_PARAMS = {"azonositok", "cols", "rows"}
+LABEL_RENDER_VER = "1"   # a PDF elrendezés változásakor léptetni (a QR_RENDER_VER-rel együtt a kulcs része)
+LABEL_POOL_WORKERS = int(os.environ.get("LABEL_POOL_WORKERS", "0"))   # >0: ennyi folyamatos QR pool; 0 = soros
+
+label_cache_stats = {"hit": 0, "miss": 0, "not_modified": 0}
+_label_pool = None
+_label_pool_lock = threading.Lock()
+
+def _label_executor():
+    """
+    Workerenként egy, lustán (a fork után) indított process pool a QR kódoláshoz;
+    kérésenként indított pool induló költsége elvinné a nyereséget. None = soros.
+    """
+    global _label_pool
+    if LABEL_POOL_WORKERS <= 0:
+        return None
+    with _label_pool_lock:
+        if _label_pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            _label_pool = ProcessPoolExecutor(max_workers=LABEL_POOL_WORKERS)
+        return _label_pool
+
+def _label_ids(payload: dict):
+    """
+    A nyomtatandó aktív azonosítók sorrendben: vagy megadott lista ('azonositok'),
+    vagy mezőszűrő ({"Hely": "Raktár A"}, '*' végű érték = előtag, mint a /data-nál).
+    """
+    ids = payload.get("azonositok")
+    if ids:
+        if not isinstance(ids, list) or not all(isinstance(a, str) for a in ids):
+            raise ValueError("Az 'azonositok' szövegek listája legyen.")
+        if len(ids) > LABEL_MAX_IDS:
+            raise ValueError(f"Legfeljebb {LABEL_MAX_IDS} címke kérhető egyszerre.")
+        ids = list(dict.fromkeys(a for a in ids if a))
+        aktiv = {az for az, (_, deleted) in fetch_existing(ids).items() if not deleted}
+        return [az for az in ids if az in aktiv]
+
+    szuro = payload.get("szuro") or {}
+    if not szuro or not isinstance(szuro, dict):
+        raise ValueError("Adj meg 'azonositok' listát vagy mezőszűrőt.")
+    meta = load_meta()
+    q = db.session.query(Adat.azonosito).filter(Adat.deleted == 0, Adat.azonosito.isnot(None))
+    for key, vals in szuro.items():
+        if key not in meta["mezok"]:
+            raise ValueError(f"Ismeretlen mező: {key}")
+        expr = json_field(key)
+        vals = vals if isinstance(vals, list) else [vals]
+        q = q.filter(or_(*[_field_filter(expr, str(v)) for v in vals]))
+    return [az for (az,) in q.order_by(Adat.id).limit(LABEL_MAX_IDS + 1)]
+
+def _label_key(ids, cols: int, rows: int, base_url: str) -> str:
+    h = hashlib.sha1(f"{QR_RENDER_VER}|{LABEL_RENDER_VER}|{cols}x{rows}|{base_url}".encode("utf-8"))
+    for az in ids:
+        h.update(b"\n" + az.encode("utf-8"))
+    return h.hexdigest()
+
+def _label_cache_prune():
+    """A legrégebben használt PDF-ek törlése, hogy legfeljebb LABEL_CACHE_MAX maradjon."""
+    try:
+        files = [e for e in os.scandir(LABEL_CACHE_DIR) if e.name.endswith(".pdf")]
+        files.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+        for e in files[LABEL_CACHE_MAX:]:
+            os.remove(e.path)
+    except OSError as e:
+        app.logger.warning("Címke cache takarítás sikertelen: %s", e)
+
+def _label_tee(chunks, path: str):
+    """A streamelt PDF darabjai közben egy ideiglenes fájlba is mennek; csak teljes PDF kerül a cache-be."""
+    tmp = f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
     try:
-        import qrcode
+        f = open(tmp, "wb")
+    except OSError as e:
+        app.logger.warning("Címke cache írás sikertelen: %s", e)
+        yield from chunks
+        return
+    ok = False
+    try:
+        with f:
+            for c in chunks:
+                f.write(c)
+                yield c
+        os.replace(tmp, path)
+        ok = True
+        _label_cache_prune()
+    finally:
+        if not ok:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+@app.route("/labels.pdf", methods=["GET", "POST"])
+def labels_pdf():
+    """
+    Címkeív PDF sok azonosítóhoz, oldalanként streamelve (a dokumentum nincs egyben a memóriában).
+    POST JSON: {"azonositok": [...]} vagy {"szuro": {"Hely": "Raktár A"}}, + "cols", "rows" (alap 2×2).
+    GET: ?azonositok=ID1,ID2&cols=3&rows=8 vagy mezőszűrő: ?Beszállító=Besz*
+    Ugyanarra a halmazra + elrendezésre a lemezes cache-ből szolgál ki (ETag/304 is).
+    """
+    if request.method == "POST":
+        payload = request.get_json(force=True, silent=True) or {}
+        if not isinstance(payload, dict):
+            return jsonify({"ok": False, "error": "JSON objektumot várunk."}), 400
+    else:
+        az = request.args.get("azonositok", "")
+        payload = {
+            "azonositok": [a.strip() for a in az.split(",") if a.strip()],
+            "szuro": {k: request.args.getlist(k) for k in request.args if k not in LABEL_PARAMS},
+            "cols": request.args.get("cols"), "rows": request.args.get("rows"),
+        }
+    try:
+        cols = int(payload.get("cols") or 2)
+        rows = int(payload.get("rows") or 2)
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "error": "Hibás 'cols'/'rows'."}), 400
+    if not (1 <= cols <= LABEL_MAX_GRID and 1 <= rows <= LABEL_MAX_GRID):
+        return jsonify({"ok": False, "error": f"'cols' és 'rows' 1..{LABEL_MAX_GRID} között lehet."}), 400
+    try:
+        ids = _label_ids(payload)
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    if not ids:
+        return jsonify({"ok": False, "error": "Nincs nyomtatható (aktív) sor."}), 404
+    if len(ids) > LABEL_MAX_IDS:
+        return jsonify({"ok": False, "error": f"Legfeljebb {LABEL_MAX_IDS} címke kérhető egyszerre."}), 400
+
+    base_url = url_for("edit_row", azonosito="", _external=True)
+    key = _label_key(ids, cols, rows, base_url)
+    if request.if_none_match.contains(key):
+        label_cache_stats["not_modified"] += 1
+        resp = Response(status=304)
+        resp.set_etag(key)
+        return resp
+
+    path = os.path.join(LABEL_CACHE_DIR, key + ".pdf")
+    if os.path.exists(path):
+        try:
+            os.utime(path)   # LRU: a takarítás a legrégebben használtakat viszi
+            resp = send_file(path, mimetype="application/pdf", download_name="cimkek.pdf", etag=key)
+            label_cache_stats["hit"] += 1
+            return resp
+        except OSError:
+            pass   # közben törölte egy másik worker → újrarendereljük
+
+    try:
+        import label_pdf
     except Exception:
-        abort(500, "qrcode csomag nincs telepítve (pip install qrcode Pillow)")
-    edit_url = url_for("edit_row", azonosito=azonosito, _external=True)
-    qr = qrcode.QRCode(version=1, box_size=10, border=2)
-    qr.add_data(edit_url); qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white").convert("RGB")
-    bio = io.BytesIO(); img.save(bio, format="PNG"); bio.seek(0)
-    return send_file(bio, mimetype="image/png")
+        abort(500, "qrcode/numpy csomag nincs telepítve (pip install qrcode Pillow numpy)")
+    label_cache_stats["miss"] += 1
+    chunks = label_pdf.iter_label_pdf([base_url + az for az in ids], cols, rows, executor=_label_executor())
+    try:
+        os.makedirs(LABEL_CACHE_DIR, exist_ok=True)
+        chunks = _label_tee(chunks, path)
+    except OSError as e:
+        app.logger.warning("Címke cache könyvtár nem elérhető: %s", e)
+    resp = Response(chunks, mimetype="application/pdf",
+                    headers={"Content-Disposition": 'inline; filename="cimkek.pdf"'})
+    resp.set_etag(key)
+    return resp
 
 # -------------------- Diagnosztika --------------------
 @app.get("/_health")
 def _health():
     try:
         Adat.query.limit(1).all()
-        return {"ok": True}
+        return {"ok": True, "qr_cache": dict(qr_cache_stats, size=len(_qr_cache)),
+                "label_cache": label_cache_stats, "meta_cache": meta_cache_stats}
     except Exception as e:
         return {"ok": False, "error": str(e)}, 500
 
-# -------------------- Boot: séma biztosítása importkor --------------------
+# -------------------- Metrikák (/_metrics) + lassú kérés napló --------------------
+# gunicorn alatt a workerek a master pid-jéhez tartozó közös könyvtárba írnak; METRICS_DIR felülírja
+METRICS_DIR = os.environ.get("METRICS_DIR") or (
+    os.path.join(tempfile.gettempdir(), f"qr_metrics_{os.getppid()}") if "gunicorn" in sys.modules else None)
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "1000"))   # e fölött a kérés a naplóba kerül, SQL-lel
+SLOW_SQL_TOP = 5          # a lassú kérés leglassabb ennyi SQL utasítása kerül a naplóba
+SQL_MINTA_MAX = 200       # kérésenként legfeljebb ennyi utasítást tartunk meg a naplóhoz
+
+mx = metrics.Registry(METRICS_DIR)
+mx.describe("qr_http_requests_total", "counter", "Kérések útvonal, metódus és státusz szerint")
+mx.describe("qr_http_request_duration_seconds", "histogram", "Kérés ideje (streamelt válasznál az utolsó bájtig)",
+            metrics.LATENCY_BUCKETS)
+mx.describe("qr_http_response_size_bytes", "histogram", "Válasz mérete", metrics.SIZE_BUCKETS)
+mx.describe("qr_http_request_sql_statements", "histogram", "SQL utasítások száma kérésenként", metrics.COUNT_BUCKETS)
+mx.describe("qr_http_request_sql_seconds_total", "counter", "Kérések SQL ideje útvonalanként")
+mx.describe("qr_http_slow_requests_total", "counter", f"SLOW_REQUEST_MS ({SLOW_REQUEST_MS:g} ms) fölötti kérések")
+mx.describe("qr_sql_statements_total", "counter", "Összes SQL utasítás (kérésen kívül is)")
+mx.describe("qr_sql_seconds_total", "counter", "Összes SQL idő")
+mx.describe("qr_cache_requests_total", "counter", "Gyorsítótár kimenetek (meta, qr, label)")
+mx.describe("qr_db_pool_connections", "gauge", "Kapcsolat-pool állapota")
+mx.describe("qr_write_queue_batches_total", "counter", "Írási sor: tranzakciók (WRITE_QUEUE=1)")
+mx.describe("qr_write_queue_jobs_total", "counter", "Írási sor: bennük futott írások")
+
+_keres = threading.local()   # a futó kérés mérései (szálanként)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _sql_kezd(conn, cursor, statement, parameters, context, executemany):
+    conn.info["qr_t0"] = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _sql_vege(conn, cursor, statement, parameters, context, executemany):
+    dt = time.perf_counter() - conn.info.pop("qr_t0", time.perf_counter())
+    mx.inc("qr_sql_statements_total")
+    mx.inc("qr_sql_seconds_total", v=dt)
+    if getattr(_keres, "sql", None) is not None:
+        _keres.n += 1
+        _keres.t += dt
+        if len(_keres.sql) < SQL_MINTA_MAX:
+            _keres.sql.append((dt, statement))
+
+@app.before_request
+def _metrika_kezd():
+    _keres.t0, _keres.n, _keres.t, _keres.sql = time.perf_counter(), 0, 0.0, []
+
+def _metrika_rogzit(labels: dict, status: int, meret: int):
+    dt = time.perf_counter() - _keres.t0
+    mx.inc("qr_http_requests_total", dict(labels, status=status))
+    mx.observe("qr_http_request_duration_seconds", labels, dt)
+    mx.observe("qr_http_response_size_bytes", labels, meret)
+    mx.observe("qr_http_request_sql_statements", labels, _keres.n)
+    mx.inc("qr_http_request_sql_seconds_total", labels, _keres.t)
+    if dt * 1000 >= SLOW_REQUEST_MS:
+        mx.inc("qr_http_slow_requests_total", labels)
+        top = sorted(_keres.sql, key=lambda x: x[0], reverse=True)[:SLOW_SQL_TOP]
+        app.logger.warning(
+            "Lassú kérés: %s %s -> %s, %.0f ms, %d SQL (%.0f ms)%s",
+            labels["method"], labels["route"], status, dt * 1000, _keres.n, _keres.t * 1000,
+            "".join(f"\n  {d * 1000:.1f} ms  {' '.join(st.split())[:500]}" for d, st in top),
+        )
+    _keres.sql = None
+    mx.flush()
+
+def _meret_szamlalo(chunks, kesz):
+    """Streamelt válasz: a méret és az idő a teljes törzs kiküldése után kerül rögzítésre."""
+    n = 0
+    try:
+        for c in chunks:
+            n += len(c)
+            yield c
+    finally:
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+        kesz(n)
+
+@app.after_request
+def _metrika_vege(resp):
+    labels = {"route": request.url_rule.rule if request.url_rule else "<nincs>", "method": request.method}
+    if resp.is_streamed and resp.content_length is None:
+        status = resp.status_code
+        resp.response = _meret_szamlalo(resp.response, lambda n: _metrika_rogzit(labels, status, n))
+    else:
+        _metrika_rogzit(labels, resp.status_code, resp.content_length or 0)
+    return resp
+
+@mx.collector
+def _cache_es_pool():
+    out = []
+    for cache, stats in (("meta", meta_cache_stats), ("qr", qr_cache_stats), ("label", label_cache_stats)):
+        out += [("qr_cache_requests_total", {"cache": cache, "result": k}, v) for k, v in stats.items()]
+    pool = db.engine.pool
+    for state in ("size", "checkedin", "checkedout", "overflow"):
+        fn = getattr(pool, state, None)
+        if callable(fn):
+            out.append(("qr_db_pool_connections", {"state": state}, fn()))
+    return out
+
+@app.get("/_metrics")
+def _metrics():
+    """Prometheus szöveges formátum, az összes worker összegzésével."""
+    mx.flush(force=True)
+    return Response(mx.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+# -------------------- Boot: séma migrációk (naprakész sémánál egy verzió-lekérdezés) --------------------
 with app.app_context():
     try:
-        ensure_schema()
+        run_migrations()
+        ensure_promoted_indexes()
     except Exception as e:
-        app.logger.exception("ensure_schema() failed on boot: %s", e)
+        app.logger.exception("run_migrations() failed on boot: %s", e)
 
 # -------------------- Fejlesztői futtatás --------------------
 if __name__ == "__main__":
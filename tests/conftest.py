@@ -0,0 +1,38 @@
+# tests/conftest.py — közös környezet: ideiglenes SQLite adatbázis, tiszta táblák tesztenként
+#
+# A server modul importkor köti meg az adatbázist és futtatja a migrációkat, ezért a
+# környezeti változókat az import előtt állítjuk be (egy folyamat = egy adatbázis).
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_TMP = tempfile.mkdtemp(prefix="qr_teszt_")
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(_TMP, "teszt.db"))
+os.environ.setdefault("LABEL_CACHE_DIR", os.path.join(_TMP, "labels"))
+os.environ.setdefault("METRICS_DIR", os.path.join(_TMP, "metrics"))
+os.environ["QR_CACHE_DIR"] = ""
+
+import server
+
+@pytest.fixture
+def client():
+    """Test client üres adatokkal (a séma és a kiemelt mező beállítás megmarad)."""
+    with server.app.app_context():
+        db = server.db
+        db.session.execute(db.text("DELETE FROM adat"))
+        db.session.execute(db.text("DELETE FROM sorszam_szamlalo"))
+        db.session.execute(db.text("DELETE FROM meta_kv WHERE key <> :k"), {"k": server.PROMOTED_KEY})
+        db.session.commit()
+        server._meta_cache.update(ver=None, meta=None)
+        yield server.app.test_client()
+        db.session.rollback()
+
+def sorok(client, **params):
+    """GET /data → (adatok azonosító szerint, teljes válasz)."""
+    d = client.get("/data", query_string=params).get_json()
+    return {r["Azonosító"]: r for r in d["adatok"]}, d
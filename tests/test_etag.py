@@ -0,0 +1,63 @@
+# tests/test_etag.py — feltételes GET (ETag / If-None-Match) a /data és /meta végpontokon
+import re
+
+from sqlalchemy import event
+
+import server
+
+def _feltolt(client, *recs):
+    assert client.post("/update", json={"adatok": list(recs)}).status_code == 200
+
+def _ha_valtozott(client, url, etag, **kw):
+    return client.get(url, headers={"If-None-Match": etag}, **kw)
+
+def test_data_304_sorok_olvasasa_nelkul(client):
+    _feltolt(client, {"Azonosító": "A", "Név": "a"})
+    r = client.get("/data")
+    etag = r.headers["ETag"]
+    assert etag.startswith("W/") and r.headers["Cache-Control"] == "no-cache"
+
+    sqlek = []
+    def gyujt(_conn, _cur, sql, *_):
+        sqlek.append(sql)
+    event.listen(server.db.engine, "before_cursor_execute", gyujt)
+    try:
+        r2 = _ha_valtozott(client, "/data", etag)
+    finally:
+        event.remove(server.db.engine, "before_cursor_execute", gyujt)
+    assert r2.status_code == 304 and r2.data == b"" and r2.headers["ETag"] == etag
+    assert not [s for s in sqlek if re.search(r"FROM adat\b", s)], sqlek
+
+def test_data_etag_irasra_ervenytelen(client):
+    _feltolt(client, {"Azonosító": "A", "Név": "a"})
+    etag = client.get("/data").headers["ETag"]
+    _feltolt(client, {"Azonosító": "A", "Név": "a"})   # változatlan újraküldés: marad
+    assert _ha_valtozott(client, "/data", etag).status_code == 304
+    for iras in (lambda: _feltolt(client, {"Azonosító": "A", "Név": "b"}),
+                 lambda: client.post("/delete", json={"azonositok": ["A"]}),
+                 lambda: client.post("/restore", json={"azonositok": ["A"]}),
+                 lambda: client.post("/field/rename", json={"regi": "Név", "uj": "Név2"})):
+        iras()
+        r = _ha_valtozott(client, "/data", etag)
+        assert r.status_code == 200 and r.headers["ETag"] != etag
+        etag = r.headers["ETag"]
+
+def test_data_etag_since_es_parameterek(client):
+    _feltolt(client, {"Azonosító": "A", "Név": "a"})
+    r = client.get("/data")
+    etag, rev = r.headers["ETag"], r.get_json()["rev"]
+    # a legutóbbi válasz ETag-je a delta kérésre is érvényes ('since' nem része)
+    assert _ha_valtozott(client, "/data", etag, query_string={"since": rev}).status_code == 304
+    # más paraméter / formátum: más ETag
+    assert _ha_valtozott(client, "/data", etag, query_string={"limit": 10}).status_code == 200
+    assert _ha_valtozott(client, "/data", etag, query_string={"stream": 1}).status_code == 200
+
+def test_meta_304_es_ervenytelenites(client):
+    client.post("/meta", json={"mezok": ["Azonosító", "Név"], "listak": {}})
+    etag = client.get("/meta").headers["ETag"]
+    assert _ha_valtozott(client, "/meta", etag).status_code == 304
+    _feltolt(client, {"Azonosító": "A", "Név": "a"})   # mentett metánál a sorírás nem érinti
+    assert _ha_valtozott(client, "/meta", etag).status_code == 304
+    client.post("/meta", json={"mezok": ["Azonosító", "Név", "Hely"], "listak": {}})
+    r = _ha_valtozott(client, "/meta", etag)
+    assert r.status_code == 200 and "Hely" in r.get_json()["mezok"]
@@ -0,0 +1,61 @@
+# tests/test_fields.py — mező átnevezése / törlése az adatbázisban (/field/rename, /field/drop)
+import json
+
+import pytest
+
+import server
+from conftest import sorok
+
+def _alap(client, n=3):
+    client.post("/update", json={
+        "mezok": ["Azonosító", "Név", "Hely"], "listak": {"Hely": ["Raktár"]},
+        "adatok": [{"Azonosító": f"A{i}", "Név": f"n{i}", "Hely": f"h{i}"} for i in range(n)],
+    })
+
+def _nyers(azonosito):
+    return json.loads(server.Adat.query.filter_by(azonosito=azonosito).one().data)
+
+def test_atnevezes_sorokban_es_metaban(client):
+    _alap(client)
+    r = client.post("/field/rename", json={"regi": "Hely", "uj": "Tárhely"}).get_json()
+    assert r["ok"] and r["updated"] == 3
+    meta = client.get("/meta").get_json()
+    assert "Tárhely" in meta["mezok"] and "Hely" not in meta["mezok"]
+    assert meta["listak"]["Tárhely"][:1] == ["Raktár"]
+    adat, _ = sorok(client)
+    assert adat["A1"]["Tárhely"] == "h1" and "Hely" not in adat["A1"]
+
+def test_torles(client):
+    _alap(client)
+    assert client.post("/field/drop", json={"mezo": "Hely"}).get_json()["updated"] == 3
+    assert "Hely" not in client.get("/meta").get_json()["mezok"]
+    assert all("Hely" not in r for r in sorok(client)[0].values())
+
+def test_meglevo_mezore_nem_nevez_at(client):
+    _alap(client)
+    assert client.post("/field/rename", json={"regi": "Foo", "uj": "Hely"}).status_code == 400
+    assert client.post("/field/rename", json={"regi": "Név", "uj": 'Ro"ssz'}).status_code == 400
+    client.post("/update", json={"adatok": [{"Azonosító": "A0", "Név": "n0", "Hely": "h0", "Régi": "r", "Új": "u"}]})
+    assert client.post("/field/rename", json={"regi": "Régi", "uj": "Új"}).status_code == 409
+    assert _nyers("A0")["Új"] == "u"
+
+def test_torolt_sor_atirodik_de_nem_kap_revet(client):
+    _alap(client)
+    client.post("/delete", json={"azonositok": ["A0"]})
+    _, d = sorok(client)
+    client.post("/field/rename", json={"regi": "Hely", "uj": "Tárhely"})
+    adat, d2 = sorok(client, since=d["rev"])
+    assert sorted(adat) == ["A1", "A2"] and d2["torolt"] == []
+    assert _nyers("A0")["Tárhely"] == "h0"
+
+def test_hiba_eseten_semmi_sem_valtozik(client, monkeypatch):
+    _alap(client, n=10)
+    monkeypatch.setattr(server, "FIELD_CHUNK", 2)   # több UPDATE darab
+
+    def hibas(*_):
+        raise RuntimeError("meta írás hiba")
+    monkeypatch.setattr(server, "_write_meta", hibas)
+    with pytest.raises(RuntimeError):
+        server.rename_or_drop_field("Hely", "Tárhely")
+    assert all("Hely" in _nyers(f"A{i}") for i in range(10))
+    assert "Hely" in client.get("/meta").get_json()["mezok"]
@@ -0,0 +1,24 @@
+# tests/test_labels.py — címke PDF: pool használat és a kérés ellenőrzése
+from concurrent.futures import ThreadPoolExecutor
+
+import label_pdf
+
+URLEK = [f"https://pelda.hu/edit/{i}" for i in range(label_pdf.POOL_KUSZOB + 6)]
+
+def test_kereskent_nem_indul_pool(monkeypatch):
+    def tilos(*_a, **_k):
+        raise AssertionError("kérésenként nem indulhat process pool")
+    monkeypatch.setattr(label_pdf, "ProcessPoolExecutor", tilos)
+    soros = b"".join(label_pdf.iter_label_pdf(URLEK, 2, 2))
+    with ThreadPoolExecutor(2) as pool:   # a hívó által adott (hosszú életű) executor
+        parhuzamos = b"".join(label_pdf.iter_label_pdf(URLEK, 2, 2, executor=pool))
+    assert soros == parhuzamos and soros.startswith(b"%PDF")
+
+def test_hibas_azonosito_lista_400(client):
+    client.post("/update", json={"adatok": [{"Azonosító": "A", "Név": "a"}]})
+    for payload in ({"azonositok": "A"}, {"azonositok": [1, 2]}, {"azonositok": {"A": 1}},
+                    {"azonositok": [["A"]]}, {"szuro": "Hely"}, ["A"]):
+        r = client.post("/labels.pdf", json=payload)
+        assert r.status_code == 400, (payload, r.status_code)
+    r = client.post("/labels.pdf", json={"azonositok": ["A", "NINCS"]})
+    assert r.status_code == 200 and r.mimetype == "application/pdf"
@@ -0,0 +1,88 @@
+# tests/test_local_store.py — a desktop helyi tára (local_store.HelyiTar)
+import sqlite3
+
+import pytest
+
+from local_store import HelyiTar
+
+@pytest.fixture
+def tar(tmp_path):
+    t = HelyiTar(str(tmp_path / "helyi.db"))
+    yield t
+    t.close()
+
+def _r(az, **mezok):
+    return dict({"Azonosító": az}, **mezok)
+
+# --- helyi tükör (user-017) ---
+def test_ures_tar(tar):
+    assert tar.ures() and tar.betolt() == ([], None, None, None) and tar.etag() is None
+
+def test_mindent_ment_es_delta(tmp_path, tar):
+    tar.mindent_ment([_r("A", Név="Alma"), _r("B", Név="Béka")], ["Azonosító", "Név"], {"Név": []}, rev=5, etag="e1")
+    tar.delta_ment([_r("B", Név="Bab"), _r("C", Név="Cékla")], ["A"], ["Azonosító", "Név"], {}, rev=7, etag="e2")
+    tar.close()
+    ujra = HelyiTar(str(tmp_path / "helyi.db"))   # újraindítás után is megvan
+    adatok, mezok, listak, rev = ujra.betolt()
+    assert [r["Azonosító"] for r in adatok] == ["B", "C"] and adatok[0]["Név"] == "Bab"
+    assert mezok == ["Azonosító", "Név"] and listak == {} and rev == 7 and ujra.etag() == "e2"
+    ujra.close()
+
+def test_keres_es_rendez(tar):
+    tar.mindent_ment([_r("A", Név="Körte", Db=10), _r("B", Név="alma", Db=9), _r("C", Név="KORTEFA", Hely="körte polc")], [], {})
+    assert tar.keres("körte") == ["A", "C"]
+    assert tar.keres("", rendez="Név") == ["B", "C", "A"]   # NOCASE; "Kö" > "KO"
+    assert tar.keres("", rendez="Db", csokkeno=True)[:2] == ["A", "B"]
+    assert tar.keres("azonosító") == []   # az Azonosító nem része a keresőszövegnek
+
+# --- kimenő sor (user-018) ---
+def _sor(tar):
+    return [(m, az, adat) for _, m, az, adat in tar.kimeno_kovetkezo(100)]
+
+def test_kimeno_upsert_osszevonas(tar):
+    tar.kimeno_upsert([_r("A", Név="1")])
+    tar.kimeno_torles(["B"])
+    tar.kimeno_upsert([_r("A", Név="2")])   # a legutóbbi 'A' művelet upsert → felülírja
+    tar.kimeno_upsert([_r("B", Név="x")])   # 'B' utolsó művelete törlés → új elem, sorrend marad
+    assert tar.kimeno_db() == 3
+    assert _sor(tar) == [("upsert", "A", _r("A", Név="2"))]   # a törlés előtt megáll
+    tar.kimeno_kesz([i for i, *_ in tar.kimeno_kovetkezo(100)])
+    assert [m for m, *_ in _sor(tar)] == ["delete"]
+    assert tar.kimeno_azonositok() == {"B"}
+
+def test_kimeno_meta_osszevonas_es_mezomuvelet(tar):
+    tar.kimeno_meta(["Azonosító", "X"], {})
+    tar.kimeno_upsert([_r("A", X="1")])
+    tar.kimeno_meta(["Azonosító", "X", "Y"], {})   # felülírja az elsőt
+    tar.kimeno_mezo("mezo_atnevez", {"regi": "X", "uj": "Z"})
+    tar.kimeno_meta(["Azonosító", "Z", "Y"], {})   # a mezőművelet után új elem
+    assert [(m, az) for m, az, _ in _sor(tar)] == [("meta", None), ("upsert", "A")]
+    assert _sor(tar)[0][2]["mezok"] == ["Azonosító", "X", "Y"]
+    assert tar.kimeno_db() == 4 and tar.kimeno_meta_fuggo()
+    with pytest.raises(ValueError):
+        tar.kimeno_mezo("ismeretlen", {})
+
+def test_elutasitott_felreteve_ujra(tar):
+    tar.kimeno_upsert([_r("A", Név="rossz")])
+    tar.kimeno_torles(["B"])
+    elso = tar.kimeno_kovetkezo(100)
+    tar.kimeno_sikertelen([elso[0][0]], "400: hibás mező")
+    # a félretett művelet nem tartja fel a sort, és nem számít függőnek
+    assert [m for m, *_ in _sor(tar)] == ["delete"]
+    assert tar.kimeno_db() == 1 and tar.kimeno_hibas_db() == 1 and tar.kimeno_azonositok() == {"B"}
+    assert tar.kimeno_hibasak() == [(elso[0][0], "upsert", "A", "400: hibás mező")]
+    tar.kimeno_upsert([_r("A", Név="jó")])   # a hibásat nem írja felül: új elem
+    assert tar.kimeno_hibasak()[0][0] == elso[0][0] and tar.kimeno_db() == 2
+    tar.kimeno_ujra([elso[0][0]])
+    assert tar.kimeno_hibas_db() == 0 and [m for m, *_ in _sor(tar)] == ["upsert"]   # eredeti helyén, elöl
+
+def test_regi_kimeno_tabla_bovul(tmp_path):
+    path = str(tmp_path / "regi.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE kimeno (id INTEGER PRIMARY KEY AUTOINCREMENT, muvelet TEXT NOT NULL,"
+                 " azonosito TEXT, adat TEXT, letrehozva REAL NOT NULL)")
+    conn.execute("INSERT INTO kimeno (muvelet, azonosito, adat, letrehozva) VALUES ('delete', 'A', NULL, 0)")
+    conn.commit(); conn.close()
+    tar = HelyiTar(path)
+    assert tar.kimeno_db() == 1 and tar.kimeno_hibas_db() == 0
+    tar.close()
@@ -0,0 +1,55 @@
+# tests/test_meta.py — workerenkénti meta cache és a meta verzió (meta_ver) léptetése
+import server
+from server import META_VER_KEY, read_counter
+
+def _urlap(client, **mezok):
+    form = {f: "" for f in client.get("/meta").get_json()["mezok"] if f != "Azonosító"}
+    form.update(mezok)
+    r = client.post("/qr", data=form)
+    assert r.status_code == 200, r.data
+
+def test_qr_utan_a_meta_latja_az_uj_erteket(client):
+    r = client.get("/meta")
+    etag = r.headers["ETag"]
+    assert "Új Beszállító Kft" not in r.get_json()["listak"].get("Beszállító", [])
+
+    _urlap(client, Név="Teszt Elek", Beszállító="Új Beszállító Kft")
+    assert client.get("/meta", headers={"If-None-Match": etag}).status_code == 200
+    listak = client.get("/meta").get_json()["listak"]
+    assert "Új Beszállító Kft" in listak["Beszállító"] and "Teszt Elek" in listak["Név"]
+
+def test_tanult_meta_torlesre_es_visszaallitasra_is_lep(client):
+    client.post("/update", json={"adatok": [{"Azonosító": "A", "Hely": "Polc 9"}]})
+    v = read_counter(META_VER_KEY)
+    client.post("/delete", json={"azonositok": ["A"]})
+    assert read_counter(META_VER_KEY) > v
+    assert "Polc 9" not in client.get("/meta").get_json()["listak"].get("Hely", [])
+    client.post("/restore", json={"azonositok": ["A"]})
+    assert "Polc 9" in client.get("/meta").get_json()["listak"]["Hely"]
+
+def test_data_etag_valtozik_qr_utan(client):
+    r = client.get("/data")
+    _urlap(client, Név="Másik")
+    assert client.get("/data", headers={"If-None-Match": r.headers["ETag"]}).status_code == 200
+
+def test_mentett_metanal_az_iras_nem_lepteti(client):
+    client.post("/meta", json={"mezok": ["Azonosító", "Név"], "listak": {}})
+    v = read_counter(META_VER_KEY)
+    client.post("/update", json={"adatok": [{"Azonosító": "A", "Név": "a"}]})
+    client.post("/delete", json={"azonositok": ["A"]})
+    assert read_counter(META_VER_KEY) == v
+
+def test_valtozatlan_ujrakuldes_nem_lepteti(client):
+    client.post("/update", json={"adatok": [{"Azonosító": "A", "Név": "a"}]})
+    etag = client.get("/meta").headers["ETag"]
+    client.post("/update", json={"adatok": [{"Azonosító": "A", "Név": "a"}]})
+    assert client.get("/meta", headers={"If-None-Match": etag}).status_code == 304
+
+def test_cache_talalat_amig_a_verzio_nem_valtozik(client):
+    client.post("/meta", json={"mezok": ["Azonosító", "Név"], "listak": {}})
+    client.get("/meta")
+    hit = server.meta_cache_stats["hit"]
+    assert client.get("/meta").get_json()["mezok"] == ["Azonosító", "Név"]
+    assert server.meta_cache_stats["hit"] == hit + 1
+    client.post("/meta", json={"mezok": ["Azonosító", "Név", "Hely"], "listak": {}})
+    assert client.get("/meta").get_json()["mezok"] == ["Azonosító", "Név", "Hely"]
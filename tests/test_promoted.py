@@ -0,0 +1,58 @@
+# tests/test_promoted.py — kiemelt mezők kifejezés-indexei
+import json
+
+from sqlalchemy import event
+
+import server
+
+def _index_sql(key):
+    with server.db.engine.connect() as conn:
+        return conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE name = ?",
+                                    (server._promoted_index_name(key),)).scalar()
+
+def _allapot():
+    with server.db.engine.connect() as conn:
+        return json.loads(conn.exec_driver_sql("SELECT value FROM meta_kv WHERE key = ?",
+                                               (server.PROMOTED_KEY,)).scalar())
+
+def test_vedett_kifejezes_es_regi_index_ujraepul(client):
+    assert "json_valid" in _index_sql("Hely")
+    nev = server._promoted_index_name("Hely")
+    with server.db.engine.begin() as conn:   # régi telepítés: védelem nélküli index, mezőlista állapot
+        conn.exec_driver_sql(f"DROP INDEX {nev}")
+        conn.exec_driver_sql(f"""CREATE INDEX {nev} ON adat ((json_extract(data, '$."Hely"')))""")
+        conn.exec_driver_sql("UPDATE meta_kv SET value = ? WHERE key = ?",
+                             (json.dumps(server.PROMOTED_FIELDS), server.PROMOTED_KEY))
+    server.ensure_promoted_indexes()
+    assert "json_valid" in _index_sql("Hely")
+    assert _allapot()["Hely"] == {"expr": server._json_field_sql("sqlite", "Hely", col="data")}
+
+def test_sikertelen_index_nem_probalkozik_ujra(client, monkeypatch):
+    client.post("/update", json={"adatok": [{"Azonosító": "A", "Hely": "Polc"}]})
+    with server.db.engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO adat (azonosito, data, deleted, rev) VALUES ('ROSSZ', '{\"Hely\": ', 0, 1)")
+    monkeypatch.setattr(server, "_json_valid_sql", lambda *a, **k: None)   # mint a régi Postgres
+    try:
+        server.ensure_promoted_indexes()   # a hibás sor miatt a CREATE INDEX elhasal
+        assert set(server._promoted_hibak()) == set(server.PROMOTED_FIELDS)
+        assert _index_sql("Hely") is None
+
+        sqlek = []
+        def gyujt(_conn, _cur, sql, *_):
+            sqlek.append(sql)
+        event.listen(server.db.engine, "before_cursor_execute", gyujt)
+        try:
+            server.ensure_promoted_indexes()   # újraindítás: nem próbálja újra
+        finally:
+            event.remove(server.db.engine, "before_cursor_execute", gyujt)
+        assert not [s for s in sqlek if "INDEX" in s or "IMMEDIATE" in s], sqlek
+
+        with server.db.engine.begin() as conn:
+            conn.exec_driver_sql("DELETE FROM adat WHERE azonosito = 'ROSSZ'")
+        kimenet = server.app.test_cli_runner().invoke(args=["promoted-reindex"])
+        assert "Kész." in kimenet.output and server._promoted_hibak() == {}
+        assert "json_valid" not in _index_sql("Hely")
+    finally:
+        monkeypatch.undo()
+        server.ensure_promoted_indexes()
+    assert "json_valid" in _index_sql("Hely") and server._promoted_hibak() == {}
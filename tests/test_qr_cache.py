@@ -0,0 +1,17 @@
+# tests/test_qr_cache.py — QR PNG lemezes cache korlátja
+import os
+import time
+
+import server
+
+def test_lemezes_cache_korlatos(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "QR_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(server, "QR_CACHE_DIR_MAX", 3)
+    for i in range(4):
+        server._qr_cache_put(f"k{i}", b"png")
+        os.utime(tmp_path / f"k{i}.png", (time.time() - 100 + i,) * 2)
+    server._qr_cache.clear()
+    assert server._qr_cache_get("k0") is None   # már törölve
+    assert server._qr_cache_get("k1") == b"png"   # lemezről; most ez a legutóbb használt
+    server._qr_cache_put("k4", b"png")
+    assert sorted(os.listdir(tmp_path)) == ["k1.png", "k3.png", "k4.png"]
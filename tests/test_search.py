@@ -0,0 +1,63 @@
+# tests/test_search.py — /search (SQLite FTS5) és az FTS triggerek
+import server
+
+def _keres(client, q, **params):
+    r = client.get("/search", query_string=dict(params, q=q))
+    assert r.status_code == 200, r.data
+    return r.get_json()
+
+def _talalat(client, q):
+    return sorted(t["azonosito"] for t in _keres(client, q)["talalatok"])
+
+def _feltolt(client, *recs):
+    assert client.post("/update", json={"adatok": list(recs)}).status_code == 200
+
+def test_ekezet_kisbetu_elotag(client):
+    _feltolt(client, {"Azonosító": "A", "Név": "Fűtőtest", "Hely": "Raktár A"},
+             {"Azonosító": "B", "Név": "Futószalag", "Hely": "Polc"})
+    assert _talalat(client, "FUTO") == ["A", "B"]
+    assert _talalat(client, "fűtőt") == ["A"]
+    assert _talalat(client, "fut raktar") == ["A"]   # minden szó kell
+    assert client.get("/search?q=").status_code == 400
+
+def test_modositas_es_torles_kikerul(client):
+    _feltolt(client, {"Azonosító": "A", "Név": "alma"}, {"Azonosító": "B", "Név": "alma"})
+    _feltolt(client, {"Azonosító": "B", "Név": "körte"})
+    assert _talalat(client, "alma") == ["A"] and _talalat(client, "korte") == ["B"]
+    client.post("/delete", json={"azonositok": ["A"]})
+    assert _talalat(client, "alma") == []
+    client.post("/restore", json={"azonositok": ["A"]})
+    assert _talalat(client, "alma") == ["A"]
+
+def test_lapozas(client):
+    _feltolt(client, *[{"Azonosító": f"T{i}", "Név": f"csavar {i}"} for i in range(5)])
+    d = _keres(client, "csavar", limit=2)
+    assert d["total"] == 5 and len(d["talalatok"]) == 2 and d["next"] == 2
+    assert _keres(client, "csavar", limit=2, offset=4)["next"] is None
+
+def _sql(sql):
+    server.db.session.execute(server.db.text(sql))
+    server.db.session.commit()
+
+def test_nem_json_iras_nem_hasal_el(client):
+    _feltolt(client, {"Azonosító": "A", "Név": "alma"})
+    _sql("INSERT INTO adat (azonosito, data, deleted, rev) VALUES ('X', 'nem json', 0, 1)")
+    _sql("UPDATE adat SET data = '{\"Név\": ' WHERE azonosito = 'A'")
+    assert _talalat(client, "alma") == []
+    _sql("UPDATE adat SET data = '{\"Név\": \"szilva\"}' WHERE azonosito = 'X'")
+    assert _talalat(client, "szilva") == ["X"]
+
+def test_m5_lecsereli_a_regi_triggereket(client):
+    regi = "(SELECT group_concat(value, ' ') FROM json_each({col}.data))"
+    with server.db.engine.begin() as conn:
+        for nev in ("adat_fts_ai", "adat_fts_au"):
+            conn.exec_driver_sql(f"DROP TRIGGER {nev}")
+        for sql in server.FTS_SQLITE[1:3]:   # a 4-es migráció korábbi, védelem nélküli triggerei
+            conn.exec_driver_sql(sql.replace(server.FTS_SZOVEG_SQL.format(col="NEW"), regi.format(col="NEW")))
+        conn.exec_driver_sql("DELETE FROM schema_version WHERE version >= 5")
+    server.run_migrations()
+    with server.db.engine.connect() as conn:
+        sqlek = [s for (s,) in conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name IN ('adat_fts_ai', 'adat_fts_au')")]
+    assert len(sqlek) == 2 and all("CASE WHEN json_valid(NEW.data)" in s for s in sqlek)
+    assert server.schema_version() == server.SCHEMA_VERSION
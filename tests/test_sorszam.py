@@ -0,0 +1,50 @@
+# tests/test_sorszam.py — Sorszám kiosztás (Név, Fok, Beszállító) csoportonként
+from sqlalchemy import event
+
+import server
+from conftest import sorok
+
+def _feltolt(client, *recs):
+    r = client.post("/update", json={"adatok": list(recs)})
+    assert r.status_code == 200, r.data
+    return r.get_json()
+
+def _rec(az, nev="n", fok="1", besz="b"):
+    return {"Azonosító": az, "Név": nev, "Fok": fok, "Beszállító": besz}
+
+def test_csoportonkent_folytatolagos(client):
+    d = _feltolt(client, _rec("A"), _rec("B"), _rec("C", fok="2"), {"Azonosító": "D", "Név": "n"})
+    assert d["sorszamok"] == {"A": 1, "B": 2, "C": 1}
+    d = _feltolt(client, _rec("E"), _rec("F", fok="2"))
+    assert d["sorszamok"] == {"E": 3, "F": 2}
+    adat, _ = sorok(client)
+    assert "Sorszám" not in adat["D"]
+
+def test_valtozatlan_kulcs_megtartja_valtozott_ujat_kap(client):
+    _feltolt(client, _rec("A"), _rec("B"))
+    d = _feltolt(client, dict(_rec("A"), Megjegyzés="x"), _rec("B", besz="masik"))
+    assert d["sorszamok"] == {"B": 1}
+    adat, _ = sorok(client)
+    assert adat["A"]["Sorszám"] == 1 and adat["B"]["Sorszám"] == 1 and adat["B"]["Beszállító"] == "masik"
+
+def test_sok_kulcs_keves_utasitas(client):
+    n = {"db": 0}
+    def szamol(*_):
+        n["db"] += 1
+    recs = [_rec(f"T{i:05d}", nev=f"n{i % 700}", fok=str(i % 3)) for i in range(3000)]
+    event.listen(server.db.engine, "before_cursor_execute", szamol)
+    try:
+        d = _feltolt(client, *recs)
+    finally:
+        event.remove(server.db.engine, "before_cursor_execute", szamol)
+    assert n["db"] < 80, n["db"]   # nem kulcsonként upsert + select
+    csoportok = {}
+    for r in recs:
+        csoportok.setdefault(server.sorszam_key(r), []).append(d["sorszamok"][r["Azonosító"]])
+    assert all(sorted(v) == list(range(1, len(v) + 1)) for v in csoportok.values())
+
+def test_dialektus_nelkuli_ag(client, monkeypatch):
+    _feltolt(client, _rec("A"))
+    monkeypatch.setattr(server, "_dialect_insert", lambda: None)
+    d = _feltolt(client, _rec("B"), _rec("C", nev="uj"))
+    assert d["sorszamok"] == {"B": 2, "C": 1}
@@ -0,0 +1,93 @@
+# tests/test_sync.py — delta szinkron (since/rev), tömeges upsert, tömeges törlés / visszaállítás
+from sqlalchemy import event
+
+import server
+from conftest import sorok
+
+def _feltolt(client, *recs):
+    r = client.post("/update", json={"adatok": list(recs)})
+    assert r.status_code == 200, r.data
+    return r.get_json()
+
+# --- delta szinkron (user-001) ---
+def test_delta_csak_a_valtozasok(client):
+    _feltolt(client, {"Azonosító": "A", "Név": "a"}, {"Azonosító": "B", "Név": "b"})
+    _, teljes = sorok(client)
+    assert teljes["delta"] is False and teljes["rev"] > 0
+
+    _feltolt(client, {"Azonosító": "B", "Név": "b2"})
+    adat, d = sorok(client, since=teljes["rev"])
+    assert d["delta"] is True
+    assert list(adat) == ["B"] and adat["B"]["Név"] == "b2"
+    assert d["torolt"] == [] and d["rev"] > teljes["rev"]
+
+def test_delta_ures_ha_nincs_valtozas(client):
+    _feltolt(client, {"Azonosító": "A", "Név": "a"})
+    _, d = sorok(client)
+    adat, d2 = sorok(client, since=d["rev"])
+    assert adat == {} and d2["torolt"] == [] and d2["rev"] == d["rev"]
+
+def test_delta_jelzi_a_torolteket(client):
+    _feltolt(client, {"Azonosító": "A", "Név": "a"}, {"Azonosító": "B", "Név": "b"})
+    _, d = sorok(client)
+    assert client.post("/delete", json={"azonositok": ["A"]}).status_code == 200
+    adat, d2 = sorok(client, since=d["rev"])
+    assert adat == {} and d2["torolt"] == ["A"]
+    assert list(sorok(client)[0]) == ["B"]
+
+# --- tömeges upsert (user-002) ---
+def test_upsert_utolso_nyer_ures_kimarad(client):
+    d = _feltolt(client, {"Azonosító": "A", "Név": "1"}, {"Azonosító": "A", "Név": "2"},
+                 {"Azonosító": "U", "Név": " "}, {"Név": "uj"})
+    assert d["upserted"] == 2
+    adat, _ = sorok(client)
+    assert adat["A"]["Név"] == "2" and "U" not in adat
+    assert any(r["Név"] == "uj" and r["Azonosító"] for r in adat.values())
+
+def test_upsert_valtozatlan_sor_nem_kap_uj_revet(client):
+    _feltolt(client, {"Azonosító": "A", "Név": "a"}, {"Azonosító": "B", "Név": "b"})
+    _, d = sorok(client)
+    _feltolt(client, {"Azonosító": "A", "Név": "a"}, {"Azonosító": "B", "Név": "b"})
+    adat, d2 = sorok(client, since=d["rev"])
+    assert adat == {} and d2["rev"] == d["rev"]
+
+def test_upsert_keves_sql_utasitas(client):
+    n = {"db": 0}
+    def szamol(*_):
+        n["db"] += 1
+    recs = [{"Azonosító": f"T{i:05d}", "Név": f"n{i}", "Megjegyzés": "x"} for i in range(3000)]
+    event.listen(server.db.engine, "before_cursor_execute", szamol)
+    try:
+        _feltolt(client, *recs)
+    finally:
+        event.remove(server.db.engine, "before_cursor_execute", szamol)
+    assert n["db"] < 60, n["db"]   # darabolt lekérdezés + executemany, nem soronként
+    assert len(sorok(client)[0]) == 3000
+
+# --- tömeges törlés / visszaállítás (user-003) ---
+def test_torles_visszaallitas(client):
+    _feltolt(client, {"Azonosító": "A", "Név": "a"}, {"Azonosító": "B", "Név": "b"})
+    r = client.post("/delete", json={"azonositok": ["A", "B", "NINCS"]}).get_json()
+    assert r["deleted"] == 2 and sorok(client)[0] == {}
+    r = client.post("/restore", json={"azonositok": ["A"]}).get_json()
+    assert r["restored"] == 1 and list(sorok(client)[0]) == ["A"]
+    assert client.post("/delete", json={"azonositok": "A"}).status_code == 400
+
+def test_ismetelt_torles_nem_lep_revet(client):
+    _feltolt(client, {"Azonosító": "A", "Név": "a"}, {"Azonosító": "B", "Név": "b"})
+    client.post("/delete", json={"azonositok": ["A"]})
+    _, d = sorok(client)
+    assert client.post("/delete", json={"azonositok": ["A"]}).get_json()["deleted"] == 0
+    assert client.post("/restore", json={"azonositok": ["B"]}).get_json()["restored"] == 0
+    assert client.post("/delete/A", headers={"Accept": "application/json"}).status_code == 200
+    adat, d2 = sorok(client, since=d["rev"])
+    assert adat == {} and d2["torolt"] == [] and d2["rev"] == d["rev"]
+    assert client.post("/delete/NINCS", headers={"Accept": "application/json"}).status_code == 404
+
+def test_szerkeszto_torles_egyszer_lep(client):
+    _feltolt(client, {"Azonosító": "A", "Név": "a"})
+    assert client.post("/edit/A", data={"delete": "1"}).status_code == 302
+    _, d = sorok(client)
+    client.post("/edit/A", data={"delete": "1"})
+    adat, d2 = sorok(client, since=d["rev"])
+    assert d2["torolt"] == [] and d2["rev"] == d["rev"]
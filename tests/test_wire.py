@@ -0,0 +1,74 @@
+# tests/test_wire.py — tömör átviteli formátum (MessagePack, oszlopos sorok) és gzip-elt /update
+import gzip
+
+import pytest
+
+import server
+import wire
+from conftest import sorok
+
+pytestmark = pytest.mark.skipif(not wire.elerheto(), reason="nincs msgpack")
+
+def _mp_post(client, payload, gz=False):
+    body = wire.kodol(payload)
+    headers = {"Content-Type": wire.MSGPACK}
+    if gz:
+        body = gzip.compress(body)
+        headers["Content-Encoding"] = "gzip"
+    return client.post("/update", data=body, headers=headers)
+
+def _mp_get(client, **params):
+    r = client.get("/data", query_string=params, headers={"Accept": wire.MSGPACK, "Accept-Encoding": "gzip"})
+    assert r.status_code == 200 and r.mimetype == wire.MSGPACK
+    body = gzip.decompress(r.data) if r.headers.get("Content-Encoding") == "gzip" else r.data
+    return wire.dekodol(body), r
+
+def test_oszlopos_hianyzo_es_null_kulon():
+    recs = [{"Azonosító": "A", "Név": None}, {"Azonosító": "B", "Hely": "Polc"}]
+    oszlopok, sorok_ = wire.oszlopos(recs, ["Azonosító", "Név"])
+    assert oszlopok == ["Azonosító", "Név", "Hely"] and len(sorok_[0]) == 3
+    assert wire.dekodol(wire.kodol({"adatok": recs, "mezok": ["Azonosító", "Név"]}))["adatok"] == recs
+
+def test_msgpack_oda_vissza(client):
+    recs = [{"Azonosító": "A", "Név": "Ár", "Megjegyzés": None, "Db": 3},
+            {"Azonosító": "B", "Hely": "Polc"}]
+    r = _mp_post(client, {"adatok": recs}, gz=True)
+    assert r.status_code == 200 and r.get_json()["upserted"] == 2
+    d, resp = _mp_get(client)
+    assert "Accept" in resp.headers["Vary"]
+    kapott = {x["Azonosító"]: x for x in d["adatok"]}
+    assert kapott["A"] == recs[0] and kapott["B"] == recs[1]   # a null megmarad, a hiányzó hiányzik
+    assert kapott == sorok(client)[0]   # ugyanaz, mint JSON-ben
+
+def test_nagy_valasz_gzip(client):
+    recs = [{"Azonosító": f"T{i}", "Megjegyzés": "ugyanaz a szöveg", "Beszállító": "Kft"} for i in range(200)]
+    assert _mp_post(client, {"adatok": recs}).status_code == 200
+    d, r = _mp_get(client)
+    assert r.headers["Content-Encoding"] == "gzip" and len(d["adatok"]) == 200
+    assert len(r.data) < len(client.get("/data").data) / 4
+
+def test_accept_szerinti_valasz(client):
+    client.post("/update", json={"adatok": [{"Azonosító": "A", "Név": "a"}]})
+    assert client.get("/data").mimetype == "application/json"
+    assert client.get("/data", headers={"Accept": "application/json, " + wire.MSGPACK + ";q=0.5"}).mimetype == "application/json"
+    _, r = _mp_get(client)
+    assert r.headers.get("Content-Encoding") is None   # kis válasz: nincs tömörítve
+    # stream / limit mellett JSON marad
+    assert client.get("/data?limit=5", headers={"Accept": wire.MSGPACK}).mimetype == "application/json"
+    d, _ = _mp_get(client, since=1)
+    assert d["delta"] is True and "torolt" in d
+    assert wire.MSGPACK in client.get("/data").headers["Accept-Post"]
+
+def test_update_gzip_413_415(client, monkeypatch):
+    body = gzip.compress(b'{"adatok": [{"Azonos\\u00edt\\u00f3": "G", "N\\u00e9v": "g"}]}')
+    r = client.post("/update", data=body, headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+    assert r.status_code == 200 and "G" in sorok(client)[0]
+    r = client.post("/update", data=b"nem gzip", headers={"Content-Encoding": "gzip"})
+    assert r.status_code == 400
+    r = client.post("/update", data=body, headers={"Content-Encoding": "br"})
+    assert r.status_code == 415
+    monkeypatch.setattr(server, "UPDATE_MAX_BYTES", 10)
+    r = client.post("/update", data=body, headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+    assert r.status_code == 413
+    monkeypatch.setattr(wire, "msgpack", None)
+    assert client.post("/update", data=b"\x80", headers={"Content-Type": wire.MSGPACK}).status_code == 415
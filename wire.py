@@ -0,0 +1,60 @@
+# wire.py — tömör, oszlopos átviteli formátum a szinkron végpontokhoz (/data, /update)
+# A JSON-ban minden rekord megismétli a mezőneveket ("Megjegyzés", "Beszállító", ...);
+# itt a mezőlista egyszer szerepel, a sorok értéktömbök, MessagePack kódolással.
+# A msgpack opcionális: ha nincs telepítve, a szerver és a kliens JSON-nal beszél.
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK = "application/x-msgpack"
+# hiányzó mező jelölése a sorokban (a null érték megmarad null-nak)
+HIANYZIK_KOD = 0
+
+def elerheto() -> bool:
+    return msgpack is not None
+
+def _hianyzik():
+    return msgpack.ExtType(HIANYZIK_KOD, b"")
+
+def oszlopos(recs, mezok=None):
+    """
+    [{mező: érték}] → (oszlopok, sorok). Az oszlopok a mezok sorrendjében, utána a
+    rekordokban előforduló további kulcsok; a rekordból hiányzó mező jelölve.
+    """
+    oszlopok = list(mezok or [])
+    ismert = set(oszlopok)
+    for rec in recs:
+        for k in rec:
+            if k not in ismert:
+                ismert.add(k)
+                oszlopok.append(k)
+    hiany = _hianyzik()
+    sorok = [[rec[k] if k in rec else hiany for k in oszlopok] for rec in recs]
+    return oszlopok, sorok
+
+def rekordok(oszlopok, sorok):
+    """(oszlopok, sorok) → [{mező: érték}] (a jelölt hiányzó mezők kimaradnak)."""
+    out = []
+    for sor in sorok:
+        out.append({k: v for k, v in zip(oszlopok, sor) if not isinstance(v, msgpack.ExtType)})
+    return out
+
+def kodol(payload: dict) -> bytes:
+    """
+    /data válasz vagy /update törzs → MessagePack. Az 'adatok' lista helyett
+    'oszlopok' + 'sorok'; a többi kulcs (mezok, listak, rev, torolt, ...) változatlan.
+    """
+    out = {k: v for k, v in payload.items() if k != "adatok"}
+    if "adatok" in payload:
+        out["oszlopok"], out["sorok"] = oszlopos(payload["adatok"] or [], payload.get("mezok"))
+    return msgpack.packb(out, use_bin_type=True)
+
+def dekodol(blob: bytes) -> dict:
+    """kodol() inverze: az 'oszlopok' + 'sorok' újra 'adatok' rekordlistává alakul."""
+    payload = msgpack.unpackb(blob, raw=False, strict_map_key=False)
+    if not isinstance(payload, dict):
+        raise ValueError("A msgpack törzs nem objektum.")
+    if "sorok" in payload:
+        payload["adatok"] = rekordok(payload.pop("oszlopok", []), payload.pop("sorok"))
+    return payload